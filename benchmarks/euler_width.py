@@ -0,0 +1,36 @@
+"""
+Замер масштабирования генератора Эйлера по ширине лабиринта.
+
+Запуск из корня проекта:
+    python -m benchmarks.euler_width
+
+Высота лабиринта фиксирована, ширина удваивается. При линейной обработке
+строки время на одну ячейку должно оставаться примерно постоянным.
+"""
+
+import time
+
+from maze_tools.generators.euler_generator import EulerGenerator
+
+
+def main():
+    """Главная функция"""
+
+    HEIGHT_MAZE = 50
+    WIDTHS_MAZE = [1000, 2000, 4000, 8000, 16000, 32000]
+
+    generator = EulerGenerator()
+    print(f'{"width":>8} {"seconds":>10} {"us/cell":>10}')
+    for width in WIDTHS_MAZE:
+        generator.seed = width
+        started = time.perf_counter()
+        # Строки не сохраняем, чтобы замерять только генерацию.
+        for _ in generator.iter_rows(HEIGHT_MAZE, width):
+            pass
+        elapsed = time.perf_counter() - started
+        per_cell = elapsed / (HEIGHT_MAZE * width) * 1e6
+        print(f'{width:>8} {elapsed:>10.3f} {per_cell:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,411 @@
+"""
+Замер генерации, решения и выгрузки лабиринтов на лестнице размеров.
+
+Запуск из корня проекта:
+    python -m benchmarks.suite --output benchmark.json
+    python -m benchmarks.suite --baseline benchmark.json --output new.json
+
+Для каждого этапа (generate, solve, render), движка этапа и размера
+лабиринта замеряется лучшее из нескольких времен выполнения, пиковая
+память и пропускная способность в ячейках в секунду. Результаты пишутся
+в JSON. Если передан базовый прогон, случаи, ставшие медленнее больше
+чем на порог, выводятся как регрессии, а код возврата становится 1.
+
+Пиковая память считается через tracemalloc, то есть учитываются только
+выделения через Python. Буферы изображений Pillow в нее не попадают.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from maze_tools.maze import Maze
+from maze_tools.generators.base_generator import BaseGenerator
+from maze_tools.generators.euler_generator import EulerGenerator
+from maze_tools.generators.parallel_euler_generator import (
+    ParallelEulerGenerator,
+)
+from maze_tools.generators.binary_tree_generator import BinaryTreeGenerator
+from maze_tools.generators.sidewinder_generator import SidewinderGenerator
+from maze_tools.resolvers.base_resolver import BaseResolver
+from maze_tools.resolvers.astar_resolver import AStarResolver
+from maze_tools.resolvers.tree_resolver import TreeResolver
+from maze_tools.resolvers.field_resolver import FieldResolver
+from maze_tools.resolvers.dead_end_resolver import DeadEndResolver
+from maze_tools.resolvers.junction_resolver import JunctionResolver
+from maze_tools.converter.image_converter import ImageConverter
+from maze_tools.converter.raster_image_converter import RasterImageConverter
+from maze_tools.converter.text_converter import TextConverter
+from maze_tools.converter.binary_converter import BinaryConverter
+
+
+# Версия формата файла с результатами.
+FORMAT_VERSION = 1
+
+# Лестница размеров (высота, ширина): квадратные и вытянутые лабиринты.
+SIZES = [
+    (10, 10),
+    (100, 100),
+    (1000, 1000),
+    (4000, 4000),
+    (10, 4000),
+    (4000, 10),
+]
+
+# Движки этапа generate: имя -> фабрика генератора по зерну.
+GENERATORS: Dict[str, Callable[[int], BaseGenerator]] = {
+    'euler': lambda seed: EulerGenerator(seed),
+    'parallel_euler': lambda seed: ParallelEulerGenerator(seed=seed),
+    'binary_tree': lambda seed: BinaryTreeGenerator(seed),
+    'sidewinder': lambda seed: SidewinderGenerator(seed),
+}
+
+# Движки этапа solve: имя -> фабрика решателя.
+RESOLVERS: Dict[str, Callable[[], BaseResolver]] = {
+    'astar': AStarResolver,
+    'tree': TreeResolver,
+    'field': FieldResolver,
+    'dead_end': DeadEndResolver,
+    'junction': JunctionResolver,
+}
+
+
+def _image_size(maze: Maze) -> int:
+    """
+    Размер изображения, при котором на ячейку приходится 2 пикселя.
+
+    :param maze: Лабиринт.
+    :return: Размер стороны изображения.
+    """
+
+    return max(700, 2 * max(maze.shape) + 1)
+
+
+# Движки этапа render: имя -> функция выгрузки лабиринта в файл.
+RENDERERS: Dict[str, Callable[[Maze, Path], None]] = {
+    'image': lambda maze, path: ImageConverter(
+        maze, path.with_suffix('.png'), _image_size(maze),
+        'white', 'black', 'green',
+    ).unload(),
+    'raster': lambda maze, path: RasterImageConverter(
+        maze, path.with_suffix('.png'), _image_size(maze),
+        'white', 'black', 'green',
+    ).unload(),
+    'text': lambda maze, path: TextConverter(
+        maze, path.with_suffix('.txt'), '#',
+    ).unload(),
+    'binary': lambda maze, path: BinaryConverter(
+        maze, path.with_suffix('.maze'),
+    ).unload(),
+}
+
+STAGES = {
+    'generate': GENERATORS,
+    'solve': RESOLVERS,
+    'render': RENDERERS,
+}
+
+
+class _Fixtures:
+    """
+    Лабиринты для этапов solve и render.
+
+    Строятся генератором Эйлера один раз на размер и переиспользуются
+    всеми движками, чтобы они решали и выгружали одни и те же лабиринты.
+    """
+
+    def __init__(self, seed: int) -> None:
+        self.__seed = seed
+        self.__mazes: Dict[Tuple[int, int], Maze] = {}
+
+    def get(self, height: int, width: int) -> Maze:
+        """
+        Получение лабиринта с началом, концом и решением.
+
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :return: Лабиринт.
+        """
+
+        maze = self.__mazes.get((height, width))
+        if maze is None:
+            maze = EulerGenerator(self.__seed).generate(height, width)
+            maze.start = (0, 0)
+            maze.end = (height - 1, width - 1)
+            maze.resolve = TreeResolver().create_path(maze)
+            self.__mazes[(height, width)] = maze
+        return maze
+
+
+def _make_case(stage: str, engine: str, height: int, width: int, seed: int,
+               fixtures: _Fixtures, directory: Path) -> Callable[[], None]:
+    """
+    Подготовка одного замеряемого вызова.
+
+    Все, что не относится к этапу (например, генерация лабиринта для
+    решения), делается здесь, до замера.
+
+    :param stage: Этап.
+    :param engine: Движок этапа.
+    :param height: Высота лабиринта.
+    :param width: Ширина лабиринта.
+    :param seed: Зерно генераторов.
+    :param fixtures: Лабиринты для этапов solve и render.
+    :param directory: Каталог для выгружаемых файлов.
+    :return: Функция без аргументов, время которой замеряется.
+    """
+
+    if stage == 'generate':
+        factory = GENERATORS[engine]
+        return lambda: factory(seed).generate(height, width)
+
+    maze = fixtures.get(height, width)
+    if stage == 'solve':
+        resolver_class = RESOLVERS[engine]
+
+        # Решатель создается заново, а индекс смежности лабиринта
+        # сбрасывается, чтобы не замерять их кэши: построение индекса -
+        # часть стоимости решения. Лабиринт уже решался при подготовке.
+        def run() -> None:
+            maze.invalidate_adjacency()
+            resolver_class().create_path(maze)
+
+        return run
+
+    renderer = RENDERERS[engine]
+    path = directory / f'{engine}_{height}x{width}'
+    return lambda: renderer(maze, path)
+
+
+def measure(run: Callable[[], None], repeat: int,
+            memory: bool = True) -> Tuple[float, Optional[int]]:
+    """
+    Замер времени и пиковой памяти вызова.
+
+    Время - лучшее из repeat запусков. Память замеряется отдельным
+    запуском, так как tracemalloc заметно замедляет выполнение.
+
+    :param run: Замеряемая функция.
+    :param repeat: Количество запусков для замера времени.
+    :param memory: Замерять ли пиковую память.
+    :return: Время в секундах и пиковая память в байтах (или None).
+    """
+
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return best, peak
+
+
+def run_suite(stages: List[str], engines: Optional[List[str]],
+              sizes: List[Tuple[int, int]], repeat: int = 3, seed: int = 0,
+              memory: bool = True,
+              log: Callable[[str], None] = print) -> List[dict]:
+    """
+    Прогон всех сочетаний этапов, движков и размеров.
+
+    :param stages: Этапы.
+    :param engines: Движки. Если не заданы - все движки этапов.
+    :param sizes: Размеры лабиринтов (высота, ширина).
+    :param repeat: Количество запусков для замера времени.
+    :param seed: Зерно генераторов.
+    :param memory: Замерять ли пиковую память.
+    :param log: Функция для вывода хода прогона.
+    :return: Записи с результатами.
+    """
+
+    results = []
+    fixtures = _Fixtures(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        for stage in stages:
+            for engine in STAGES[stage]:
+                if engines and engine not in engines:
+                    continue
+                for height, width in sizes:
+                    run = _make_case(stage, engine, height, width, seed,
+                                     fixtures, Path(directory))
+                    seconds, peak = measure(run, repeat, memory)
+                    cells = height * width
+                    record = {
+                        'stage': stage,
+                        'engine': engine,
+                        'height': height,
+                        'width': width,
+                        'cells': cells,
+                        'seconds': seconds,
+                        'peak_bytes': peak,
+                        'cells_per_second': cells / seconds if seconds
+                        else None,
+                    }
+                    results.append(record)
+                    log(_format_record(record))
+
+    return results
+
+
+def compare(results: List[dict], baseline: List[dict],
+            threshold: float = 0.25,
+            min_seconds: float = 0.001) -> List[dict]:
+    """
+    Поиск регрессий относительно базового прогона.
+
+    Сравниваются случаи с одинаковыми этапом, движком и размером.
+    Случаи, которые в обоих прогонах быстрее min_seconds, пропускаются:
+    их время в основном шум.
+
+    :param results: Записи текущего прогона.
+    :param baseline: Записи базового прогона.
+    :param threshold: Допустимое относительное замедление.
+    :param min_seconds: Минимальное время, с которого случай сравнивается.
+    :return: Записи регрессий с базовым временем и отношением времен.
+    """
+
+    def key(record: dict) -> tuple:
+        return (record['stage'], record['engine'],
+                record['height'], record['width'])
+
+    base = {key(record): record for record in baseline}
+    regressions = []
+    for record in results:
+        old = base.get(key(record))
+        if old is None:
+            continue
+        if max(record['seconds'], old['seconds']) < min_seconds:
+            continue
+        ratio = record['seconds'] / old['seconds'] if old['seconds'] \
+            else float('inf')
+        if ratio > 1 + threshold:
+            regressions.append({
+                **record,
+                'baseline_seconds': old['seconds'],
+                'ratio': ratio,
+            })
+
+    return regressions
+
+
+def _format_record(record: dict) -> str:
+    """
+    Строка таблицы с результатом одного случая.
+
+    :param record: Запись с результатом.
+    :return: Строка для вывода.
+    """
+
+    size = f'{record["height"]}x{record["width"]}'
+    peak = record['peak_bytes']
+    peak = '-' if peak is None else f'{peak / 2 ** 20:.1f}'
+    speed = record['cells_per_second']
+    speed = '-' if speed is None else f'{speed:.3g}'
+    return (f'{record["stage"]:>9} {record["engine"]:>15} {size:>11} '
+            f'{record["seconds"]:>10.4f} {peak:>10} {speed:>10}')
+
+
+def _parse_sizes(value: str) -> List[Tuple[int, int]]:
+    """
+    Разбор списка размеров вида "10x10,100x1000".
+
+    :param value: Строка с размерами.
+    :return: Размеры (высота, ширина).
+    """
+
+    sizes = []
+    for item in value.split(','):
+        height, _, width = item.strip().partition('x')
+        sizes.append((int(height), int(width or height)))
+    return sizes
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Главная функция"""
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help='этапы через запятую')
+    parser.add_argument('--engines', default='',
+                        help='движки через запятую (по умолчанию все)')
+    parser.add_argument('--sizes', type=_parse_sizes,
+                        help='размеры вида 10x10,100x1000')
+    parser.add_argument('--max-cells', type=int, default=0,
+                        help='пропускать лабиринты больше этого числа ячеек')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true',
+                        help='не замерять пиковую память')
+    parser.add_argument('--output', type=Path, help='файл для результатов')
+    parser.add_argument('--baseline', type=Path,
+                        help='файл базового прогона для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='допустимое относительное замедление')
+    args = parser.parse_args(argv)
+
+    stages = [stage for stage in args.stages.split(',') if stage]
+    for stage in stages:
+        if stage not in STAGES:
+            parser.error(f'неизвестный этап: {stage}')
+    engines = [engine for engine in args.engines.split(',') if engine]
+    sizes = args.sizes or SIZES
+    if args.max_cells:
+        sizes = [size for size in sizes
+                 if size[0] * size[1] <= args.max_cells]
+
+    print(f'{"stage":>9} {"engine":>15} {"size":>11} {"seconds":>10} '
+          f'{"peak MiB":>10} {"cells/s":>10}')
+    results = run_suite(stages, engines, sizes, args.repeat, args.seed,
+                        not args.no_memory)
+
+    if args.output:
+        report = {
+            'version': FORMAT_VERSION,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'results': results,
+        }
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())['results']
+        regressions = compare(results, baseline, args.threshold)
+        for record in regressions:
+            print(f'REGRESSION {_format_record(record)} '
+                  f'(было {record["baseline_seconds"]:.4f} с, '
+                  f'x{record["ratio"]:.2f})')
+        if regressions:
+            return 1
+        print('Регрессий нет')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,7 +16,7 @@ def main():
     maze_generator = EulerGenerator()
     maze = maze_generator.generate(HEIGTH_MAZE, WIDTH_MAZE)
     maze.start = (0, 0)
-    maze.end = (len(maze.map) - 1, len(maze.map[0]) - 1)
+    maze.end = (maze.shape[0] - 1, maze.shape[1] - 1)
 
     # Выгрузка лабиринта в изображение.
     image_converter = ImageConverter(
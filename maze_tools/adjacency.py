@@ -0,0 +1,158 @@
+from array import array
+from itertools import (
+    accumulate,
+    chain,
+    compress,
+)
+from typing import Tuple
+
+from .cell import (
+    L_BORDER,
+    T_BORDER,
+    R_BORDER,
+    B_BORDER,
+    ALL_BORDERS,
+)
+
+
+class AdjacencyIndex:
+    """
+    Индекс смежности ячеек лабиринта.
+
+    Хранит для каждой ячейки открытые направления (байт с битами
+    L_BORDER, T_BORDER, R_BORDER и B_BORDER, в котором направления
+    за край лабиринта уже убраны) и списки соседей в формате CSR:
+    соседи ячейки i - это neighbours[offsets[i]:offsets[i + 1]],
+    в порядке слева, справа, сверху, снизу. Ячейки задаются индексами
+    в сетке стен, поэтому поиск соседа - это чтение из массива без
+    создания координат и проверок границ.
+
+    Индекс строится по состоянию стен на момент создания. Обычно его
+    получают через Maze.adjacency, который перестраивает индекс после
+    изменения стен. Индекс целиком хранится в памяти: в идеальном
+    лабиринте около 13 байт на ячейку при 32-битных индексах. Стены
+    читаются блоками по BLOCK_SIZE байт, поэтому у MappedMaze файл
+    не копируется в память целиком.
+    """
+
+    # Размер блока стен, который читается и переводится за раз.
+    BLOCK_SIZE = 1024 * 1024
+
+    # Таблицы для bytes.translate. Стены ячейки -> открытые направления.
+    _OPEN_TABLE = bytes((ALL_BORDERS ^ borders) & ALL_BORDERS
+                        for borders in range(256))
+    # Открытые направления -> они же без заданного направления.
+    _CLEAR_TABLES = {
+        border: bytes(opened & ~border & 0xFF for opened in range(256))
+        for border in (L_BORDER, T_BORDER, R_BORDER, B_BORDER)
+    }
+    # Открытые направления -> 1, если заданное направление открыто.
+    _HAS_TABLES = {
+        border: bytes(int(bool(opened & border)) for opened in range(256))
+        for border in (L_BORDER, T_BORDER, R_BORDER, B_BORDER)
+    }
+    # Открытые направления -> количество соседей.
+    _DEGREE_TABLE = bytes(bin(opened & ALL_BORDERS).count('1')
+                          for opened in range(256))
+
+    __slots__ = (
+        '__height',
+        '__width',
+        '__opened',
+        '__offsets',
+        '__neighbours',
+    )
+
+    def __init__(self, height: int, width: int, walls: bytes) -> None:
+        """
+        Построение индекса.
+
+        Все шаги выполняются функциями стандартной библиотеки над целыми
+        массивами, без цикла Python по ячейкам.
+
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :param walls: Сетка стен лабиринта.
+        """
+
+        size = height * width
+        typecode = 'i' if size < 2 ** 31 else 'q'
+
+        # Открытые направления. Внешняя стена могла быть убрана, поэтому
+        # направления за край лабиринта закрываются явно.
+        opened = bytearray(size)
+        for start in range(0, size, self.BLOCK_SIZE):
+            stop = min(start + self.BLOCK_SIZE, size)
+            opened[start:stop] = \
+                bytes(walls[start:stop]).translate(self._OPEN_TABLE)
+        clear_tables = self._CLEAR_TABLES
+        opened[:width] = opened[:width].translate(clear_tables[T_BORDER])
+        opened[size - width:] = \
+            opened[size - width:].translate(clear_tables[B_BORDER])
+        opened[::width] = opened[::width].translate(clear_tables[L_BORDER])
+        opened[width - 1::width] = \
+            opened[width - 1::width].translate(clear_tables[R_BORDER])
+
+        # Соседи ячейки выбираются из четырех кандидатов по битам
+        # открытых направлений.
+        has_tables = self._HAS_TABLES
+        candidates = chain.from_iterable(zip(
+            range(-1, size - 1),
+            range(1, size + 1),
+            range(-width, size - width),
+            range(width, size + width),
+        ))
+        selectors = bytearray(4 * size)
+        for slot, border in enumerate((L_BORDER, R_BORDER,
+                                       T_BORDER, B_BORDER)):
+            selectors[slot::4] = opened.translate(has_tables[border])
+
+        self.__height = height
+        self.__width = width
+        self.__opened = bytes(opened)
+        self.__offsets = array(typecode, accumulate(
+            opened.translate(self._DEGREE_TABLE), initial=0))
+        self.__neighbours = array(typecode, compress(candidates, selectors))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.__height, self.__width
+
+    @property
+    def opened(self) -> bytes:
+        """Открытые направления ячеек, по байту на ячейку."""
+
+        return self.__opened
+
+    @property
+    def offsets(self) -> array:
+        """Начала списков соседей ячеек в neighbours (их size + 1)."""
+
+        return self.__offsets
+
+    @property
+    def neighbours(self) -> array:
+        """Индексы соседей всех ячеек подряд."""
+
+        return self.__neighbours
+
+    def degree(self, index: int) -> int:
+        """
+        Количество соседей ячейки.
+
+        :param index: Индекс ячейки.
+        :return: Количество ячеек, в которые можно пройти из данной.
+        """
+
+        return self.__offsets[index + 1] - self.__offsets[index]
+
+    def neighbours_of(self, index: int) -> array:
+        """
+        Соседи ячейки.
+
+        :param index: Индекс ячейки.
+        :return: Индексы ячеек, в которые можно пройти из данной.
+        """
+
+        return self.__neighbours[self.__offsets[index]:
+                                 self.__offsets[index + 1]]
@@ -0,0 +1,395 @@
+"""
+Пакетная генерация, решение и выгрузка лабиринтов в пуле процессов.
+
+Запуск:
+    python -m maze_tools.batch spec.json --output assets --processes 8
+
+Спецификация - JSON-файл вида:
+    {
+        "defaults": {"generator": "euler", "resolver": "astar",
+                     "formats": ["png", "txt"], "image_size": 700},
+        "jobs": [
+            {"name": "small", "height": 100, "width": 100,
+             "count": 1000, "seed": 1},
+            {"name": "huge", "height": 2000, "width": 2000,
+             "seeds": [7, 8], "generator": "sidewinder",
+             "formats": ["maze"]}
+        ]
+    }
+
+Каждое задание разворачивается в count лабиринтов с зернами seed,
+seed + 1, ... (или в лабиринты с зернами из seeds). Файлы лабиринта номер
+i задания name пишутся в <output>/<name>/<i // shard_size>/, чтобы
+в одном каталоге не было слишком много файлов. После каждого
+выполненного лабиринта в <output>/manifest.jsonl дописывается строка
+с его параметрами, файлами и временем этапов.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+)
+
+from .maze import Maze
+from .generators.base_generator import BaseGenerator
+from .generators.euler_generator import EulerGenerator
+from .generators.binary_tree_generator import BinaryTreeGenerator
+from .generators.sidewinder_generator import SidewinderGenerator
+from .resolvers.base_resolver import BaseResolver
+from .resolvers.astar_resolver import AStarResolver
+from .resolvers.tree_resolver import TreeResolver
+from .resolvers.field_resolver import FieldResolver
+from .resolvers.dead_end_resolver import DeadEndResolver
+from .resolvers.junction_resolver import JunctionResolver
+from .converter.raster_image_converter import RasterImageConverter
+from .converter.text_converter import TextConverter
+from .converter.binary_converter import BinaryConverter
+
+
+# Генераторы по имени: имя -> фабрика генератора по зерну. Генератор
+# ParallelEulerGenerator сюда не входит: задания уже выполняются
+# в отдельных процессах.
+GENERATORS: Dict[str, Callable[[int], BaseGenerator]] = {
+    'euler': lambda seed: EulerGenerator(seed),
+    'binary_tree': lambda seed: BinaryTreeGenerator(seed),
+    'sidewinder': lambda seed: SidewinderGenerator(seed),
+}
+
+# Резолверы по имени.
+RESOLVERS: Dict[str, Callable[[], BaseResolver]] = {
+    'astar': AStarResolver,
+    'tree': TreeResolver,
+    'field': FieldResolver,
+    'dead_end': DeadEndResolver,
+    'junction': JunctionResolver,
+}
+
+# Форматы выгрузки: расширение -> функция выгрузки лабиринта в файл.
+EXPORTERS: Dict[str, Callable[[Maze, Path, Dict[str, Any]], None]] = {
+    'png': lambda maze, path, options: RasterImageConverter(
+        maze, path, options['image_size'], options['background_color'],
+        options['border_color'], options['result_color'],
+    ).unload(),
+    'txt': lambda maze, path, options: TextConverter(
+        maze, path, options['result_symbol'],
+    ).unload(),
+    'maze': lambda maze, path, options: BinaryConverter(
+        maze, path, compress=options['compress'],
+    ).unload(),
+}
+
+# Параметры заданий по умолчанию.
+DEFAULTS: Dict[str, Any] = {
+    'generator': 'euler',
+    'resolver': 'astar',
+    'formats': ['png', 'txt'],
+    'count': 1,
+    'seed': 0,
+    'image_size': 700,
+    'background_color': 'white',
+    'border_color': 'black',
+    'result_color': 'green',
+    'result_symbol': '#',
+    'compress': False,
+}
+
+
+def load_tasks(spec: Dict[str, Any], shard_size: int = 1000) -> List[dict]:
+    """
+    Разворачивание спецификации в список задач - по задаче на лабиринт.
+
+    :param spec: Спецификация (см. описание модуля).
+    :param shard_size: Количество лабиринтов в одном каталоге.
+    :return: Список задач. Каждая задача - словарь с параметрами
+        лабиринта, именем и каталогом.
+    """
+
+    defaults = {**DEFAULTS, **spec.get('defaults', {})}
+    tasks = []
+    names = set()
+    for number, job in enumerate(spec['jobs']):
+        job = {**defaults, **job}
+        name = str(job.get('name', f'job{number}'))
+        if name in names:
+            raise ValueError(f'Повторяющееся имя задания: {name}')
+        names.add(name)
+
+        if job['generator'] not in GENERATORS:
+            raise ValueError(f'Неизвестный генератор: {job["generator"]}')
+        if job['resolver'] is not None and job['resolver'] not in RESOLVERS:
+            raise ValueError(f'Неизвестный резолвер: {job["resolver"]}')
+        for extension in job['formats']:
+            if extension not in EXPORTERS:
+                raise ValueError(f'Неизвестный формат: {extension}')
+
+        seeds = job.get('seeds')
+        if seeds is None:
+            seeds = range(job['seed'], job['seed'] + job['count'])
+        for index, seed in enumerate(seeds):
+            tasks.append({
+                **job,
+                'name': name,
+                'index': index,
+                'seed': seed,
+                'directory': f'{name}/{index // shard_size:04d}',
+                'file_stem': f'{name}_{index:06d}',
+            })
+
+    return tasks
+
+
+def run_task(task: Dict[str, Any], output: Path) -> Dict[str, Any]:
+    """
+    Генерация, решение и выгрузка одного лабиринта.
+
+    Выполняется в процессе пула, поэтому ошибка не выбрасывается,
+    а возвращается в результате.
+
+    :param task: Задача из load_tasks.
+    :param output: Корневой каталог для файлов.
+    :return: Запись для манифеста: параметры лабиринта, файлы, время
+        этапов в секундах и ошибка (или None).
+    """
+
+    timings: Dict[str, float] = {}
+    files: List[str] = []
+    result = {
+        'name': task['name'],
+        'index': task['index'],
+        'seed': task['seed'],
+        'height': task['height'],
+        'width': task['width'],
+        'generator': task['generator'],
+        'resolver': task['resolver'],
+        'files': files,
+        'timings': timings,
+        'path_length': None,
+        'error': None,
+    }
+
+    try:
+        started = time.perf_counter()
+        generator = GENERATORS[task['generator']](task['seed'])
+        maze = generator.generate(task['height'], task['width'])
+        maze.start = (0, 0)
+        maze.end = (task['height'] - 1, task['width'] - 1)
+        timings['generate'] = time.perf_counter() - started
+
+        if task['resolver'] is not None:
+            started = time.perf_counter()
+            maze.resolve = RESOLVERS[task['resolver']]().create_path(maze)
+            result['path_length'] = len(maze.resolve)
+            timings['solve'] = time.perf_counter() - started
+
+        directory = output / task['directory']
+        directory.mkdir(parents=True, exist_ok=True)
+        for extension in task['formats']:
+            started = time.perf_counter()
+            path = directory / f'{task["file_stem"]}.{extension}'
+            EXPORTERS[extension](maze, path, task)
+            files.append(str(path.relative_to(output)))
+            timings[f'export_{extension}'] = time.perf_counter() - started
+    except Exception as error:
+        result['error'] = f'{type(error).__name__}: {error}'
+
+    return result
+
+
+def run_batch(tasks: List[dict], output: Path,
+              processes: Optional[int] = None,
+              progress: Optional[Callable[[int, int, dict], None]] = None
+              ) -> Iterator[dict]:
+    """
+    Выполнение задач в пуле процессов.
+
+    В пул одновременно отправляется ограниченное число задач, поэтому
+    память не растет с размером пакета.
+
+    Если процесс пула аварийно завершился (например, из-за нехватки
+    памяти), пул создается заново. Задачи, которые выполнялись в нем,
+    выполняются повторно по одной, поэтому ошибкой отмечается только
+    задача, из-за которой падает процесс, а остальной пакет выполняется.
+
+    :param tasks: Задачи из load_tasks.
+    :param output: Корневой каталог для файлов.
+    :param processes: Количество процессов. По умолчанию - количество
+        ядер процессора.
+    :param progress: Функция (выполнено, всего, результат), которая
+        вызывается после каждой задачи.
+    :return: Итератор по результатам в порядке завершения задач.
+    """
+
+    processes = processes or os.cpu_count() or 1
+    total = len(tasks)
+    done = 0
+    pending = iter(tasks)
+    # Задачи, которые выполнялись в упавшем пуле.
+    suspects: Deque[dict] = deque()
+    running: Dict[Future, dict] = {}
+    # Задача, выполняемая в пуле в одиночку.
+    isolated: Optional[Future] = None
+    broken = False
+    executor = ProcessPoolExecutor(processes)
+    try:
+        while True:
+            if broken and not running:
+                executor.shutdown(wait=True)
+                executor = ProcessPoolExecutor(processes)
+                broken = False
+
+            if not broken and suspects:
+                # Задачи из упавшего пула выполняются по одной, чтобы
+                # найти ту, из-за которой падает процесс.
+                if not running:
+                    try:
+                        isolated = executor.submit(run_task, suspects[0],
+                                                   output)
+                    except BrokenProcessPool:
+                        broken = True
+                    else:
+                        running[isolated] = suspects.popleft()
+            elif not broken:
+                # Держим в пуле не больше двух задач на процесс.
+                while len(running) < 2 * processes:
+                    task = next(pending, None)
+                    if task is None:
+                        break
+                    try:
+                        future = executor.submit(run_task, task, output)
+                    except BrokenProcessPool:
+                        suspects.append(task)
+                        broken = True
+                        break
+                    running[future] = task
+            if not running:
+                if broken or suspects:
+                    continue
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                task = running.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool as error:
+                    broken = True
+                    if future is not isolated:
+                        # Процесс мог уронить не эта задача.
+                        suspects.append(task)
+                        continue
+                    result = _failed_result(task, error)
+                except Exception as error:
+                    result = _failed_result(task, error)
+                done += 1
+                if progress is not None:
+                    progress(done, total, result)
+                yield result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _failed_result(task: dict, error: Exception) -> dict:
+    """
+    Запись манифеста для задачи, процесс которой не вернул результат.
+
+    :param task: Задача из load_tasks.
+    :param error: Ошибка выполнения задачи в пуле.
+    :return: Запись для манифеста.
+    """
+
+    return {
+        'name': task['name'],
+        'index': task['index'],
+        'seed': task['seed'],
+        'height': task['height'],
+        'width': task['width'],
+        'generator': task['generator'],
+        'resolver': task['resolver'],
+        'files': [],
+        'timings': {},
+        'path_length': None,
+        'error': f'{type(error).__name__}: {error}',
+    }
+
+
+def _print_progress(done: int, total: int, result: dict) -> None:
+    """
+    Вывод хода выполнения в stderr.
+
+    :param done: Количество выполненных задач.
+    :param total: Всего задач.
+    :param result: Результат последней задачи.
+    """
+
+    label = f'{result["name"]}#{result["index"]}'
+    if result['error']:
+        status = f'ОШИБКА {result["error"]}'
+    else:
+        status = ' '.join(f'{stage}={seconds:.3f}s'
+                          for stage, seconds in result['timings'].items())
+    print(f'[{done}/{total}] {label} {status}', file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Главная функция"""
+
+    parser = argparse.ArgumentParser(
+        description='Пакетная генерация, решение и выгрузка лабиринтов',
+    )
+    parser.add_argument('spec', type=Path, help='JSON-файл спецификации')
+    parser.add_argument('--output', type=Path, default=Path('mazes/batch'),
+                        help='каталог для файлов')
+    parser.add_argument('--processes', type=int,
+                        help='количество процессов')
+    parser.add_argument('--shard-size', type=int, default=1000,
+                        help='количество лабиринтов в одном каталоге')
+    parser.add_argument('--quiet', action='store_true',
+                        help='не выводить ход выполнения')
+    args = parser.parse_args(argv)
+
+    spec = json.loads(args.spec.read_text(encoding='utf-8'))
+    try:
+        tasks = load_tasks(spec, args.shard_size)
+    except (KeyError, ValueError) as error:
+        parser.error(f'ошибка в спецификации: {error}')
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    progress = None if args.quiet else _print_progress
+    started = time.perf_counter()
+    failed = 0
+    with open(args.output / 'manifest.jsonl', mode='a',
+              encoding='utf-8') as manifest:
+        for result in run_batch(tasks, args.output, args.processes,
+                                progress):
+            failed += result['error'] is not None
+            manifest.write(json.dumps(result) + '\n')
+            manifest.flush()
+
+    elapsed = time.perf_counter() - started
+    print(f'Выполнено {len(tasks) - failed} из {len(tasks)} лабиринтов '
+          f'за {elapsed:.1f} с', file=sys.stderr)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
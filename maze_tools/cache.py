@@ -0,0 +1,475 @@
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from .maze import Maze
+from .batch import (
+    GENERATORS,
+    RESOLVERS,
+)
+from .converter.binary_converter import BinaryConverter
+from .generators.base_generator import BaseGenerator
+from .resolvers.base_resolver import BaseResolver
+from .resolvers.junction_graph import JunctionGraph
+from .resolvers.junction_resolver import JunctionResolver
+
+
+class LRUByteCache:
+    """
+    Кэш байтовых значений, ограниченный суммарным размером значений.
+
+    Вытесняются давно не использованные значения. Если задан каталог,
+    каждое значение также записывается на диск, и при промахе в памяти
+    значение ищется там. Дисковый уровень можно использовать из нескольких
+    процессов и между запусками: ключ файла - хэш repr ключа, файлы
+    записываются атомарно.
+    """
+
+    def __init__(self, max_bytes: int, directory: Optional[Path] = None,
+                 max_disk_bytes: Optional[int] = None) -> None:
+        """
+        Инициализатор кэша.
+
+        :param max_bytes: Наибольший суммарный размер значений в памяти.
+        :param directory: Каталог дискового уровня. Если не задан, кэш
+            хранится только в памяти.
+        :param max_disk_bytes: Наибольший суммарный размер файлов
+            на диске. Если не задан, не ограничен.
+        """
+
+        if max_bytes < 0:
+            raise ValueError('Размер кэша не может быть отрицательным')
+
+        self.__max_bytes = max_bytes
+        self.__directory = Path(directory) if directory is not None \
+            else None
+        self.__max_disk_bytes = max_disk_bytes
+        self.__entries: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.Lock()
+
+        self.__hits = 0
+        self.__disk_hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+        self.__disk_size = 0
+        if self.__directory is not None:
+            self.__directory.mkdir(parents=True, exist_ok=True)
+            self.__disk_size = sum(size for _, size, _ in self._disk_files())
+
+    @property
+    def max_bytes(self) -> int:
+        return self.__max_bytes
+
+    @property
+    def directory(self) -> Optional[Path]:
+        return self.__directory
+
+    @property
+    def size(self) -> int:
+        """Суммарный размер значений в памяти."""
+
+        return self.__size
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Счетчики попаданий, промахов и вытеснений."""
+
+        with self.__lock:
+            return {
+                'hits': self.__hits,
+                'disk_hits': self.__disk_hits,
+                'misses': self.__misses,
+                'evictions': self.__evictions,
+                'entries': len(self.__entries),
+                'bytes': self.__size,
+            }
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__entries
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """
+        Получение значения.
+
+        :param key: Ключ. Для дискового уровня repr ключа должен
+            однозначно определять значение.
+        :return: Значение или None, если его нет в кэше.
+        """
+
+        with self.__lock:
+            value = self.__entries.get(key)
+            if value is not None:
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return value
+
+        if self.__directory is not None:
+            path = self._key_path(key)
+            try:
+                value = path.read_bytes()
+            except OSError:
+                value = None
+            if value is not None:
+                # Обновляем время изменения: по нему вытесняются файлы.
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                with self.__lock:
+                    self.__disk_hits += 1
+                    self._store(key, value)
+                return value
+
+        with self.__lock:
+            self.__misses += 1
+        return None
+
+    def put(self, key: Hashable, value: bytes) -> None:
+        """
+        Сохранение значения.
+
+        :param key: Ключ.
+        :param value: Значение.
+        """
+
+        value = bytes(value)
+        with self.__lock:
+            self._store(key, value)
+        if self.__directory is not None:
+            self._write_file(key, value)
+
+    def get_or_create(self, key: Hashable,
+                      factory: Callable[[], bytes]) -> bytes:
+        """
+        Получение значения, а при промахе - создание и сохранение.
+
+        :param key: Ключ.
+        :param factory: Функция, создающая значение.
+        :return: Значение.
+        """
+
+        value = self.get(key)
+        if value is None:
+            value = bytes(factory())
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """
+        Очистка уровня в памяти. Файлы на диске не удаляются.
+        """
+
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+
+    def _store(self, key: Hashable, value: bytes) -> None:
+        """
+        Сохранение значения в памяти с вытеснением. Вызывается под
+        блокировкой.
+
+        :param key: Ключ.
+        :param value: Значение.
+        """
+
+        old = self.__entries.pop(key, None)
+        if old is not None:
+            self.__size -= len(old)
+        # Значение больше всего кэша в памяти хранится только на диске.
+        if len(value) > self.__max_bytes:
+            return
+
+        self.__entries[key] = value
+        self.__size += len(value)
+        while self.__size > self.__max_bytes:
+            _, evicted = self.__entries.popitem(last=False)
+            self.__size -= len(evicted)
+            self.__evictions += 1
+
+    def _key_path(self, key: Hashable) -> Path:
+        """
+        Путь до файла значения на диске.
+
+        :param key: Ключ.
+        :return: Путь. Файлы раскладываются по 256 подкаталогам.
+        """
+
+        digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        return self.__directory / digest[:2] / digest
+
+    def _write_file(self, key: Hashable, value: bytes) -> None:
+        """
+        Атомарная запись значения на диск и ограничение размера диска.
+
+        :param key: Ключ.
+        :param value: Значение.
+        """
+
+        path = self._key_path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Значение по этому ключу могло уже быть на диске. Его размер
+        # вычитается, чтобы перезапись не увеличивала размер диска.
+        try:
+            old_size = path.stat().st_size
+        except OSError:
+            old_size = 0
+        # Пишем во временный файл и переименовываем, чтобы другой процесс
+        # не прочитал недописанное значение.
+        handle, temporary = tempfile.mkstemp(dir=path.parent)
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                file.write(value)
+            os.replace(temporary, path)
+        except OSError:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+            return
+
+        with self.__lock:
+            self.__disk_size += len(value) - old_size
+            over_budget = self.__max_disk_bytes is not None \
+                and self.__disk_size > self.__max_disk_bytes
+        if over_budget:
+            self._trim_disk()
+
+    def _disk_files(self) -> List[Tuple[float, int, Path]]:
+        """
+        Файлы дискового уровня.
+
+        :return: Список (время изменения, размер, путь).
+        """
+
+        files = []
+        for path in self.__directory.glob('??/*'):
+            try:
+                info = path.stat()
+            except OSError:
+                continue
+            files.append((info.st_mtime, info.st_size, path))
+        return files
+
+    def _trim_disk(self) -> None:
+        """
+        Удаление давно не использованных файлов, пока размер диска не
+        станет меньше 90% ограничения.
+
+        Файлы могли записать и другие процессы, поэтому размер
+        пересчитывается по каталогу.
+        """
+
+        files = sorted(self._disk_files())
+        total = sum(size for _, size, _ in files)
+        target = int(self.__max_disk_bytes * 0.9)
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+        with self.__lock:
+            self.__disk_size = total
+
+
+class MazeCache:
+    """
+    Кэш лабиринтов, их графов развилок, решений и отрисовок.
+
+    Лабиринт определяется генератором, размерами и зерном. Лабиринт,
+    граф развилок, решения разными резолверами и отрисовки хранятся
+    отдельными значениями, поэтому, например, отрисовка в другом формате
+    не решает лабиринт заново, а решение не генерирует его заново.
+
+    Ключи значений начинаются с версии VERSION, а ключи лабиринтов
+    и графов развилок содержат и версии их форматов. Поэтому после
+    изменения генераторов или форматов дисковый кэш прошлых запусков
+    не отдает устаревшие значения.
+    """
+
+    # Версия содержимого кэша. Увеличивается, когда при тех же параметрах
+    # меняется результат генератора, резолвера или отрисовки.
+    VERSION = 1
+
+    def __init__(self, storage: LRUByteCache,
+                 generators: Optional[
+                     Dict[str, Callable[[int], BaseGenerator]]] = None,
+                 resolvers: Optional[
+                     Dict[str, Callable[[], BaseResolver]]] = None) -> None:
+        """
+        Инициализатор кэша.
+
+        :param storage: Хранилище значений.
+        :param generators: Генераторы по имени: имя -> фабрика генератора
+            по зерну. По умолчанию - генераторы пакетной генерации.
+        :param resolvers: Резолверы по имени. По умолчанию - резолверы
+            пакетной генерации.
+        """
+
+        self.__storage = storage
+        self.__generators = generators if generators is not None \
+            else GENERATORS
+        self.__resolvers = resolvers if resolvers is not None \
+            else RESOLVERS
+
+    @property
+    def storage(self) -> LRUByteCache:
+        return self.__storage
+
+    def get_maze(self, generator: str, height: int, width: int,
+                 seed: int) -> Maze:
+        """
+        Получение лабиринта.
+
+        :param generator: Имя генератора.
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :param seed: Зерно генератора.
+        :return: Новый объект лабиринта без начала, конца и решения.
+            Его можно изменять - кэш от этого не изменится.
+        """
+
+        def create() -> bytes:
+            maze = self.__generators[generator](seed).generate(height, width)
+            return BinaryConverter.dumps(maze)
+
+        key = (self.VERSION, 'maze', BinaryConverter.VERSION, generator,
+               height, width, seed)
+        return BinaryConverter.loads(self.__storage.get_or_create(key, create))
+
+    def get_junction_graph(self, generator: str, height: int, width: int,
+                           seed: int) -> JunctionGraph:
+        """
+        Получение графа развилок лабиринта.
+
+        :param generator: Имя генератора.
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :param seed: Зерно генератора.
+        :return: Граф развилок.
+        """
+
+        def create() -> bytes:
+            maze = self.get_maze(generator, height, width, seed)
+            return JunctionGraph(maze).dumps()
+
+        key = (self.VERSION, 'junction_graph', JunctionGraph.VERSION,
+               generator, height, width, seed)
+        return JunctionGraph.loads(self.__storage.get_or_create(key, create))
+
+    def get_solution(self, generator: str, height: int, width: int,
+                     seed: int, resolver: str,
+                     start: Optional[Tuple[int, int]] = None,
+                     end: Optional[Tuple[int, int]] = None
+                     ) -> List[Tuple[int, int]]:
+        """
+        Получение решения лабиринта.
+
+        :param generator: Имя генератора.
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :param seed: Зерно генератора.
+        :param resolver: Имя резолвера.
+        :param start: Начало. По умолчанию - левая верхняя ячейка.
+        :param end: Конец. По умолчанию - правая нижняя ячейка.
+        :return: Координаты ячеек решения от конца к началу, как
+            у BaseResolver.create_path.
+        """
+
+        start = start if start is not None else (0, 0)
+        end = end if end is not None else (height - 1, width - 1)
+
+        def create() -> bytes:
+            maze = self.get_maze(generator, height, width, seed)
+            maze.start, maze.end = start, end
+            solver = self.__resolvers[resolver]()
+            if isinstance(solver, JunctionResolver):
+                # Граф развилок тоже берется из кэша.
+                solver.set_graph(maze, self.get_junction_graph(
+                    generator, height, width, seed))
+            path = solver.create_path(maze)
+            return self._pack_path(path)
+
+        key = (self.VERSION, 'solution', generator, height, width, seed,
+               resolver, tuple(start), tuple(end))
+        return self._unpack_path(self.__storage.get_or_create(key, create))
+
+    def get_render(self, generator: str, height: int, width: int, seed: int,
+                   resolver: Optional[str], variant: Hashable,
+                   render: Callable[[Maze], bytes]) -> bytes:
+        """
+        Получение отрисовки лабиринта.
+
+        :param generator: Имя генератора.
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :param seed: Зерно генератора.
+        :param resolver: Имя резолвера, решение которого отрисовывается,
+            или None - без решения.
+        :param variant: Все, от чего еще зависит отрисовка (формат,
+            размер изображения, цвета), - часть ключа.
+        :param render: Функция отрисовки лабиринта в байты. Получает
+            лабиринт с началом и концом в углах и решением.
+        :return: Байты отрисовки.
+        """
+
+        def create() -> bytes:
+            maze = self.get_maze(generator, height, width, seed)
+            maze.start, maze.end = (0, 0), (height - 1, width - 1)
+            if resolver is not None:
+                maze.resolve = self.get_solution(generator, height, width,
+                                                 seed, resolver)
+            return render(maze)
+
+        key = (self.VERSION, 'render', generator, height, width, seed,
+               resolver, variant)
+        return self.__storage.get_or_create(key, create)
+
+    @staticmethod
+    def _pack_path(path: List[Tuple[int, int]]) -> bytes:
+        """
+        Упаковка решения в байты: пары (строка, столбец) по 4 байта.
+
+        :param path: Координаты ячеек решения.
+        :return: Байты решения.
+        """
+
+        packed = array('I', [part for cords in path for part in cords])
+        if sys.byteorder == 'big':
+            packed.byteswap()
+        return packed.tobytes()
+
+    @staticmethod
+    def _unpack_path(data: bytes) -> List[Tuple[int, int]]:
+        """
+        Распаковка решения из байтов.
+
+        :param data: Байты решения.
+        :return: Координаты ячеек решения.
+        """
+
+        packed = array('I')
+        packed.frombytes(data)
+        if sys.byteorder == 'big':
+            packed.byteswap()
+        return list(zip(packed[0::2], packed[1::2]))
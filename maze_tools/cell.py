@@ -1,38 +1,86 @@
 from typing import (
-    Optional,
     Tuple,
+    TYPE_CHECKING,
 )
 
+if TYPE_CHECKING:
+    from .maze import Maze
+
+
+# Битовые флаги границ ячейки. Каждая ячейка лабиринта хранится
+# одним байтом, в котором заняты младшие 4 бита.
+L_BORDER = 0b0001
+T_BORDER = 0b0010
+R_BORDER = 0b0100
+B_BORDER = 0b1000
+ALL_BORDERS = L_BORDER | T_BORDER | R_BORDER | B_BORDER
+
 
 class Cell:
     """
     Класс ячейки лабиринта.
 
-    Содержит в себе границы ячейки.
+    Является тонким представлением байта в сетке стен лабиринта.
     Границы нужны для проверки, можно ли пройти через
     текущую ячейку через определенную границу.
     """
 
-    def __init__(self,
-                 l_border: bool = True, t_border: bool = True,
-                 r_border: bool = True, b_border: bool = True) -> None:
+    __slots__ = ('__maze', '__cords')
+
+    def __init__(self, maze: 'Maze', cords: Tuple[int, int]) -> None:
         """
-        Инициализация ячейка лабиринта.
+        Инициализация представления ячейки лабиринта.
 
-        :param l_border: Левая граница.
-        :param t_border: Верхняя граница.
-        :param r_border: Правая граница.
-        :param b_border: Нижняя граница.
+        :param maze: Лабиринт, которому принадлежит ячейка.
+        :param cords: Координаты ячейки.
         """
 
-        self.l_border = l_border
-        self.t_border = t_border
-        self.r_border = r_border
-        self.b_border = b_border
-        self.marker: Optional[int] = None
-        self.heuristic = -1
-        self.range = -1
-        self.best_cords: Optional[Tuple] = None
-
-    def get_weight(self) -> int:
-        return self.heuristic + self.range
+        self.__maze = maze
+        self.__cords = cords
+
+    @property
+    def cords(self) -> Tuple[int, int]:
+        return self.__cords
+
+    @property
+    def l_border(self) -> bool:
+        return self.__maze.has_border(self.__cords, L_BORDER)
+
+    @l_border.setter
+    def l_border(self, value: bool) -> None:
+        self.__maze.set_border(self.__cords, L_BORDER, value)
+
+    @property
+    def t_border(self) -> bool:
+        return self.__maze.has_border(self.__cords, T_BORDER)
+
+    @t_border.setter
+    def t_border(self, value: bool) -> None:
+        self.__maze.set_border(self.__cords, T_BORDER, value)
+
+    @property
+    def r_border(self) -> bool:
+        return self.__maze.has_border(self.__cords, R_BORDER)
+
+    @r_border.setter
+    def r_border(self, value: bool) -> None:
+        self.__maze.set_border(self.__cords, R_BORDER, value)
+
+    @property
+    def b_border(self) -> bool:
+        return self.__maze.has_border(self.__cords, B_BORDER)
+
+    @b_border.setter
+    def b_border(self, value: bool) -> None:
+        self.__maze.set_border(self.__cords, B_BORDER, value)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Cell):
+            return NotImplemented
+        return self.__maze is other.__maze and self.__cords == other.__cords
+
+    def __hash__(self) -> int:
+        return hash((id(self.__maze), self.__cords))
+
+    def __repr__(self) -> str:
+        return f'Cell(cords={self.__cords})'
@@ -0,0 +1,356 @@
+import struct
+import sys
+import zlib
+from array import array
+from pathlib import Path
+from typing import (
+    Optional,
+    Tuple,
+)
+
+from .base_converter import BaseConverter
+from .. import instrumentation
+from ..maze import Maze
+from ..cell import (
+    L_BORDER,
+    T_BORDER,
+    R_BORDER,
+    B_BORDER,
+)
+
+
+class BinaryConverter(BaseConverter):
+    """
+    Класс для загрузки/выгрузки лабиринта в компактном бинарном формате.
+
+    Формат файла (все числа little-endian):
+        заголовок - сигнатура b'MAZE', версия, флаги, высота, ширина,
+            старт и финиш (-1, если не заданы), длина решения;
+        данные (при флаге FLAG_ZLIB сжаты zlib):
+            левая граница лабиринта - по байту на строку,
+            верхняя граница лабиринта - по байту на столбец,
+            стены - по 2 бита на ячейку (правая и нижняя граница,
+                4 ячейки в байте, младшие биты - первая ячейка),
+            решение - пары (строка, столбец) по 4 байта.
+
+    Левая и верхняя границы ячейки - это правая и нижняя границы соседней
+    ячейки, поэтому хранятся только один раз.
+    """
+
+    MAGIC = b'MAZE'
+    VERSION = 1
+    # Флаг сжатия данных.
+    FLAG_ZLIB = 0b0001
+
+    _HEADER = struct.Struct('<4sBBHIIiiiiI')
+
+    # Таблицы для bytes.translate.
+    # Байт ячейки -> 1, если у нее есть левая (верхняя) граница.
+    _LEFT_FLAGS = bytes(int(bool(b & L_BORDER)) for b in range(256))
+    _TOP_FLAGS = bytes(int(bool(b & T_BORDER)) for b in range(256))
+    # Байт ячейки -> 2-битный код правой и нижней границ.
+    _CODES = bytes(int(bool(b & R_BORDER)) | int(bool(b & B_BORDER)) << 1
+                   for b in range(256))
+    # Код -> правая и нижняя границы ячейки.
+    _RIGHT_BOTTOM = bytes((R_BORDER if code & 1 else 0)
+                          | (B_BORDER if code & 2 else 0)
+                          for code in range(256))
+    # Код ячейки слева -> левая граница, код ячейки сверху -> верхняя.
+    _LEFT_FROM_CODE = bytes(L_BORDER if code & 1 else 0 for code in range(256))
+    _TOP_FROM_CODE = bytes(T_BORDER if code & 2 else 0 for code in range(256))
+    # Флаг внешней границы -> левая (верхняя) граница.
+    _LEFT_FROM_FLAG = bytes(L_BORDER if flag else 0 for flag in range(256))
+    _TOP_FROM_FLAG = bytes(T_BORDER if flag else 0 for flag in range(256))
+
+    def __init__(self, maze: Optional[Maze], path_to_file: Path,
+                 compress: bool = False) -> None:
+        """
+        Инициализатор класса.
+
+        :param maze: Объект лабиринта. Может быть None, если лабиринт
+            только загружается.
+        :param path_to_file: Путь до файла.
+        :param compress: Сжимать ли данные при выгрузке.
+        """
+
+        self.__path_to_file = path_to_file
+        self.__maze = maze
+        self.__compress = compress
+
+    @property
+    def path_to_file(self) -> Path:
+        return self.__path_to_file
+
+    @path_to_file.setter
+    def path_to_file(self, new_path: Path) -> None:
+        self.__path_to_file = new_path
+
+    @property
+    def maze(self) -> Optional[Maze]:
+        return self.__maze
+
+    @maze.setter
+    def maze(self, new_maze: Maze) -> None:
+        self.__maze = new_maze
+
+    @property
+    def compress(self) -> bool:
+        return self.__compress
+
+    @compress.setter
+    def compress(self, value: bool) -> None:
+        self.__compress = value
+
+    def unload(self) -> None:
+        """
+        Метод сохранения лабиринта в бинарный файл.
+        """
+
+        if self.__maze is None:
+            raise ValueError('Лабиринт для выгрузки не задан')
+
+        height, width = self.__maze.shape
+        with instrumentation.StageTimer('BinaryConverter', 'unload',
+                                        height=height, width=width):
+            data = self.dumps(self.__maze, self.__compress)
+            with open(self.__path_to_file, mode='wb') as file:
+                file.write(data)
+        instrumentation.emit('BinaryConverter', 'bytes_written', len(data))
+
+    def load(self) -> Maze:
+        """
+        Метод загрузки лабиринта из бинарного файла.
+
+        :return: Загруженный лабиринт. Он же становится self.maze.
+        """
+
+        with open(self.__path_to_file, mode='rb') as file:
+            self.__maze = self.loads(file.read())
+
+        return self.__maze
+
+    @classmethod
+    def dumps(cls, maze: Maze, compress: bool = False) -> bytes:
+        """
+        Сериализация лабиринта.
+
+        :param maze: Объект лабиринта.
+        :param compress: Сжимать ли данные.
+        :return: Байты в бинарном формате.
+        """
+
+        height, width = maze.shape
+        walls = maze.walls
+        if not isinstance(walls, (bytes, bytearray)):
+            # Отображенная в память сетка стен читается целиком.
+            walls = bytes(walls)
+        start = maze.start if maze.start is not None else (-1, -1)
+        end = maze.end if maze.end is not None else (-1, -1)
+
+        # Внешние левая и верхняя границы лабиринта.
+        left = walls[0::width].translate(cls._LEFT_FLAGS)
+        top = walls[:width].translate(cls._TOP_FLAGS)
+
+        path = array('I', [part for cords in maze.resolve for part in cords])
+        if sys.byteorder == 'big':
+            path.byteswap()
+
+        payload = b''.join([left, top, cls._pack_walls(walls),
+                            path.tobytes()])
+        flags = 0
+        if compress:
+            payload = zlib.compress(payload)
+            flags |= cls.FLAG_ZLIB
+
+        header = cls._HEADER.pack(cls.MAGIC, cls.VERSION, flags, 0,
+                                  height, width, *start, *end,
+                                  len(maze.resolve))
+
+        return header + payload
+
+    @classmethod
+    def read_shape(cls, data: bytes) -> Tuple[int, int]:
+        """
+        Чтение размеров лабиринта из заголовка без распаковки данных.
+
+        :param data: Байты в бинарном формате.
+        :return: Высота и ширина лабиринта.
+        """
+
+        return cls._read_header(data)[2:4]
+
+    @classmethod
+    def loads(cls, data: bytes, max_cells: Optional[int] = None) -> Maze:
+        """
+        Десериализация лабиринта.
+
+        Заголовок проверяется до распаковки, и сжатые данные
+        распаковываются не больше, чем ожидается по заголовку, поэтому
+        маленький файл не может развернуться в неограниченный объем
+        памяти. Старт, финиш и решение проверяются по размерам лабиринта.
+
+        :param data: Байты в бинарном формате.
+        :param max_cells: Наибольший допустимый размер лабиринта в ячейках.
+            None - без ограничения.
+        :return: Объект лабиринта.
+        """
+
+        (flags, _, height, width,
+         start_row, start_column, end_row, end_column,
+         path_length) = cls._read_header(data)
+
+        if height <= 0 or width <= 0:
+            raise ValueError('Размеры лабиринта должны быть положительными')
+        start = cls._read_cords(start_row, start_column, height, width)
+        end = cls._read_cords(end_row, end_column, height, width)
+        size = height * width
+        if max_cells is not None and size > max_cells:
+            raise ValueError(f'Размер лабиринта больше {max_cells} ячеек')
+        if path_length > size:
+            raise ValueError('Решение длиннее, чем ячеек в лабиринте')
+        packed_size = (size + 3) // 4
+        expected = height + width + packed_size + 8 * path_length
+
+        payload = data[cls._HEADER.size:]
+        if flags & cls.FLAG_ZLIB:
+            decompressor = zlib.decompressobj()
+            try:
+                payload = decompressor.decompress(payload, expected)
+            except zlib.error as error:
+                raise ValueError(
+                    f'Поврежденные сжатые данные: {error}') from error
+            if (decompressor.unconsumed_tail or decompressor.unused_data
+                    or not decompressor.eof):
+                raise ValueError('Размер данных не совпадает с заголовком')
+
+        if len(payload) != expected:
+            raise ValueError('Размер данных не совпадает с заголовком')
+
+        left = payload[:height]
+        top = payload[height:height + width]
+        offset = height + width
+        walls = cls._unpack_walls(payload[offset:offset + packed_size],
+                                  height, width, left, top)
+        offset += packed_size
+
+        path = array('I')
+        path.frombytes(payload[offset:])
+        if sys.byteorder == 'big':
+            path.byteswap()
+        if path and (max(path[0::2]) >= height or max(path[1::2]) >= width):
+            raise ValueError('Решение выходит за пределы лабиринта')
+
+        maze = Maze(height, width, walls, start=start, end=end)
+        maze.resolve = list(zip(path[0::2], path[1::2]))
+
+        return maze
+
+    @staticmethod
+    def _read_cords(row: int, column: int, height: int,
+                    width: int) -> Optional[Tuple[int, int]]:
+        """
+        Проверка координат старта или финиша из заголовка.
+
+        :param row: Строка ячейки (-1, если ячейка не задана).
+        :param column: Столбец ячейки (-1, если ячейка не задана).
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :return: Координаты ячейки или None, если она не задана.
+        """
+
+        if (row, column) == (-1, -1):
+            return None
+        if not (0 <= row < height and 0 <= column < width):
+            raise ValueError(f'Ячейка {(row, column)} вне лабиринта')
+
+        return row, column
+
+    @classmethod
+    def _read_header(cls, data: bytes) -> tuple:
+        """
+        Чтение и проверка заголовка.
+
+        :param data: Байты в бинарном формате.
+        :return: Поля заголовка без сигнатуры и версии: флаги, резерв,
+            высота, ширина, старт, финиш и длина решения.
+        """
+
+        if len(data) < cls._HEADER.size:
+            raise ValueError('Файл слишком короткий для лабиринта')
+        magic, version, *fields = cls._HEADER.unpack_from(data)
+        if magic != cls.MAGIC:
+            raise ValueError('Файл не является лабиринтом')
+        if version != cls.VERSION:
+            raise ValueError(f'Неподдерживаемая версия формата: {version}')
+
+        return tuple(fields)
+
+    @classmethod
+    def _pack_walls(cls, walls: bytes) -> bytes:
+        """
+        Упаковка правых и нижних границ по 2 бита на ячейку.
+
+        Байты ячеек переводятся в коды 0..3 и раскладываются на 4 плоскости
+        (ячейки 0, 1, 2, 3 каждой четверки). Сдвиг большого числа, собранного
+        из плоскости, на 2, 4 или 6 бит не переносит биты между байтами,
+        т.к. коды занимают только 2 младших бита. Поэтому упаковка
+        выполняется несколькими операциями над целыми числами.
+
+        :param walls: Сетка стен лабиринта.
+        :return: Упакованные стены.
+        """
+
+        codes = walls.translate(cls._CODES)
+        codes += bytes(-len(codes) % 4)
+        length = len(codes) // 4
+        packed = 0
+        for plane in range(4):
+            packed |= int.from_bytes(codes[plane::4], 'little') << (2 * plane)
+
+        return packed.to_bytes(length, 'little')
+
+    @classmethod
+    def _unpack_walls(cls, packed: bytes, height: int, width: int,
+                      left: bytes, top: bytes) -> bytearray:
+        """
+        Распаковка стен, упакованных _pack_walls.
+
+        :param packed: Упакованные стены.
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :param left: Левая граница лабиринта - по байту на строку.
+        :param top: Верхняя граница лабиринта - по байту на столбец.
+        :return: Сетка стен лабиринта.
+        """
+
+        size = height * width
+        length = len(packed)
+        number = int.from_bytes(packed, 'little')
+        low_bits = int.from_bytes(b'\x03' * length, 'little')
+
+        # Раскладываем 4 плоскости обратно по ячейкам.
+        codes = bytearray(4 * length)
+        for plane in range(4):
+            codes[plane::4] = ((number >> (2 * plane)) & low_bits) \
+                .to_bytes(length, 'little')
+        del codes[size:]
+
+        # Правые и нижние границы ячеек.
+        right_bottom = codes.translate(cls._RIGHT_BOTTOM)
+
+        # Левая граница ячейки - правая граница ячейки слева от нее.
+        # В первом столбце - внешняя граница.
+        left_plane = bytearray(1) + codes[:-1].translate(cls._LEFT_FROM_CODE)
+        left_plane[0::width] = bytes(left).translate(cls._LEFT_FROM_FLAG)
+
+        # Верхняя граница ячейки - нижняя граница ячейки над ней.
+        # В первой строке - внешняя граница.
+        top_plane = bytes(top).translate(cls._TOP_FROM_FLAG) \
+            + codes[:-width].translate(cls._TOP_FROM_CODE)
+
+        # Побитовое ИЛИ плоскостей не дает переносов между байтами.
+        walls = int.from_bytes(right_bottom, 'little') \
+            | int.from_bytes(left_plane, 'little') \
+            | int.from_bytes(top_plane, 'little')
+
+        return bytearray(walls.to_bytes(size, 'little'))
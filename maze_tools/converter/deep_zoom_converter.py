@@ -0,0 +1,581 @@
+import hashlib
+import math
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+from PIL import (
+    Image,
+    ImageColor,
+)
+
+from .base_converter import BaseConverter
+from .raster_image_converter import (
+    BACKGROUND,
+    WALL,
+    PATH,
+)
+from .. import instrumentation
+from ..maze import Maze
+from ..mapped_maze import MappedMaze
+from ..cell import (
+    L_BORDER,
+    T_BORDER,
+    R_BORDER,
+    B_BORDER,
+)
+
+
+class DeepZoomConverter(BaseConverter):
+    """
+    Класс для выгрузки лабиринта в виде пирамиды тайлов Deep Zoom (DZI).
+
+    На самом подробном уровне ячейка занимает cell_pixels пикселей, на
+    каждом следующем уровне вниз изображение уменьшается вдвое, пока
+    не станет размером в один пиксель. Уровень n пирамиды хранится
+    в каталоге <имя>_files/n/ тайлами <столбец>_<строка>.png размером
+    tile_size x tile_size.
+
+    Тайлы рисуются лениво - только по запросу (get_tile, render_region)
+    и только те, которых еще нет на диске. Пока ячейка занимает хотя бы
+    2 пикселя, тайл рисуется прямо по стенам лабиринта из участка,
+    который он покрывает. Тайлы более мелких уровней собираются из
+    четырех тайлов уровня выше. Поэтому одно изображение целого
+    лабиринта никогда не создается.
+
+    Тайлы на диске соответствуют лабиринту, решению и параметрам
+    отрисовки, хэш которых хранится в файле STATE_FILE каталога тайлов.
+    Перед отрисовкой хэш сверяется с текущим состоянием, и если лабиринт
+    изменился (через Maze.set_border или присваивание Maze.resolve),
+    старые тайлы удаляются. После записи стен напрямую в буфер нужно
+    вызвать Maze.invalidate_adjacency, чтобы изменение было замечено.
+    """
+
+    # Файл с хэшем состояния, по которому нарисованы тайлы.
+    STATE_FILE = 'state.sha256'
+
+    def __init__(self, maze: Maze, path_to_file: Path,
+                 background_color: str, cell_border_color: str,
+                 cell_result_color: str, cell_pixels: int = 8,
+                 tile_size: int = 256,
+                 processes: Optional[int] = None) -> None:
+        """
+        Инициализатор класса.
+
+        :param maze: Лабиринт.
+        :param path_to_file: Путь до файла описания пирамиды (.dzi).
+            Тайлы сохраняются рядом, в каталог <имя>_files.
+        :param background_color: Цвет фона.
+        :param cell_border_color: Цвет стенки.
+        :param cell_result_color: Цвет ячеек решения.
+        :param cell_pixels: Размер ячейки в пикселях на самом подробном
+            уровне. Степень двойки, не меньше 2.
+        :param tile_size: Размер стороны тайла в пикселях.
+        :param processes: Количество процессов для render_region.
+            По умолчанию - количество ядер процессора.
+        """
+
+        if cell_pixels < 2 or cell_pixels & (cell_pixels - 1):
+            raise ValueError('Размер ячейки должен быть степенью двойки, '
+                             'не меньшей 2')
+        if tile_size <= 0:
+            raise ValueError('Размер тайла должен быть положительным')
+
+        self.__maze = maze
+        self.__path_to_file = Path(path_to_file)
+        self.__background_color = background_color
+        self.__cell_border_color = cell_border_color
+        self.__cell_result_color = cell_result_color
+        self.__cell_pixels = cell_pixels
+        self.__tile_size = tile_size
+        self.__processes = processes or os.cpu_count() or 1
+
+        height, width = maze.shape
+        full_size = max(height, width) * cell_pixels + 1
+        self.__max_level = math.ceil(math.log2(full_size))
+        # Ячейки решения по строкам: {строка: столбцы}. Строятся при
+        # отрисовке первого тайла. Вместе с ними запоминаются версия стен
+        # и решение, по которым сверены тайлы на диске.
+        self.__path_rows: Optional[Dict[int, Set[int]]] = None
+        self.__walls_version = -1
+        self.__resolve: List[Tuple[int, int]] = []
+
+    @property
+    def maze(self) -> Maze:
+        return self.__maze
+
+    @property
+    def path_to_file(self) -> Path:
+        return self.__path_to_file
+
+    @property
+    def tiles_directory(self) -> Path:
+        """Каталог с уровнями пирамиды."""
+
+        path = self.__path_to_file
+        return path.with_name(f'{path.stem}_files')
+
+    @property
+    def background_color(self) -> str:
+        return self.__background_color
+
+    @property
+    def cell_border_color(self) -> str:
+        return self.__cell_border_color
+
+    @property
+    def cell_result_color(self) -> str:
+        return self.__cell_result_color
+
+    @property
+    def cell_pixels(self) -> int:
+        return self.__cell_pixels
+
+    @property
+    def tile_size(self) -> int:
+        return self.__tile_size
+
+    @property
+    def processes(self) -> int:
+        return self.__processes
+
+    @property
+    def levels(self) -> int:
+        """Количество уровней пирамиды. Уровень 0 - один пиксель."""
+
+        return self.__max_level + 1
+
+    def level_size(self, level: int) -> Tuple[int, int]:
+        """
+        Размер изображения уровня.
+
+        :param level: Уровень.
+        :return: Ширина и высота в пикселях.
+        """
+
+        height, width = self.__maze.shape
+        scale = 2 ** (self.__max_level - level)
+        return (-(-(width * self.__cell_pixels + 1) // scale),
+                -(-(height * self.__cell_pixels + 1) // scale))
+
+    def tile_count(self, level: int) -> Tuple[int, int]:
+        """
+        Количество тайлов уровня.
+
+        :param level: Уровень.
+        :return: Количество столбцов и строк тайлов.
+        """
+
+        width, height = self.level_size(level)
+        return (-(-width // self.__tile_size),
+                -(-height // self.__tile_size))
+
+    def tile_path(self, level: int, column: int, row: int) -> Path:
+        """
+        Путь до файла тайла.
+
+        :param level: Уровень.
+        :param column: Столбец тайла.
+        :param row: Строка тайла.
+        :return: Путь до файла.
+        """
+
+        return self.tiles_directory / str(level) / f'{column}_{row}.png'
+
+    def load(self) -> Maze:
+        ...
+
+    def unload(self) -> None:
+        """
+        Сохранение описания пирамиды (.dzi).
+
+        Сами тайлы не рисуются: они появляются по запросу через get_tile
+        и render_region.
+        """
+
+        width, height = self.level_size(self.__max_level)
+        self.__path_to_file.parent.mkdir(parents=True, exist_ok=True)
+        self.__path_to_file.write_text(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008"\n'
+            f'       TileSize="{self.__tile_size}" Overlap="0" '
+            'Format="png">\n'
+            f'    <Size Width="{width}" Height="{height}"/>\n'
+            '</Image>\n',
+            encoding='utf-8',
+        )
+
+    def get_tile(self, level: int, column: int, row: int) -> Path:
+        """
+        Получение тайла. Если тайла еще нет на диске, он рисуется.
+
+        :param level: Уровень.
+        :param column: Столбец тайла.
+        :param row: Строка тайла.
+        :return: Путь до файла тайла.
+        """
+
+        self._sync()
+        return self._get_tile(level, column, row)
+
+    def _get_tile(self, level: int, column: int, row: int) -> Path:
+        """
+        Получение тайла без сверки тайлов на диске с лабиринтом.
+
+        :param level: Уровень.
+        :param column: Столбец тайла.
+        :param row: Строка тайла.
+        :return: Путь до файла тайла.
+        """
+
+        columns, rows = self.tile_count(level)
+        if not (0 <= level <= self.__max_level
+                and 0 <= column < columns and 0 <= row < rows):
+            raise IndexError('Тайла с такими координатами нет')
+
+        path = self.tile_path(level, column, row)
+        if path.exists():
+            return path
+
+        with instrumentation.StageTimer('DeepZoomConverter', 'render_tile',
+                                        level=level):
+            if self._cell_size(level) >= 2:
+                image = self._render_tile(level, column, row)
+            else:
+                image = self._reduce_tile(level, column, row)
+
+            # Пишем во временный файл и переименовываем, чтобы другой
+            # процесс не прочитал недописанный тайл.
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handle, temporary = tempfile.mkstemp(dir=path.parent,
+                                                 suffix='.png')
+            with os.fdopen(handle, 'wb') as file:
+                image.save(file, format='PNG')
+            os.replace(temporary, path)
+
+        return path
+
+    def render_region(self, level: int,
+                      region: Optional[Tuple[int, int, int, int]] = None
+                      ) -> List[Path]:
+        """
+        Отрисовка тайлов, покрывающих область уровня, в пуле процессов.
+
+        :param level: Уровень.
+        :param region: Область (left, top, right, bottom) в пикселях
+            уровня, правая и нижняя границы не включаются. По умолчанию -
+            весь уровень.
+        :return: Пути до файлов тайлов.
+        """
+
+        width, height = self.level_size(level)
+        left, top, right, bottom = region or (0, 0, width, height)
+        left, top = max(left, 0), max(top, 0)
+        right, bottom = min(right, width), min(bottom, height)
+        if left >= right or top >= bottom:
+            return []
+
+        self._sync()
+        size = self.__tile_size
+        tiles = [
+            (level, column, row)
+            for row in range(top // size, (bottom - 1) // size + 1)
+            for column in range(left // size, (right - 1) // size + 1)
+        ]
+        missing = [tile for tile in tiles
+                   if not self.tile_path(*tile).exists()]
+
+        if self.__processes > 1 and len(missing) > 1:
+            maze = self.__maze
+            height, width = maze.shape
+            # Стены не передаются процессам пула. Отображенный лабиринт
+            # процессы открывают из его файла сами, остальные лабиринты
+            # один раз копируются в общую память.
+            memory = None
+            if isinstance(maze, MappedMaze):
+                source = maze.path_to_file
+            else:
+                memory = SharedMemory(create=True, size=height * width)
+                memory.buf[:height * width] = maze.walls
+                source = memory.name
+            state = (maze.shape, source, maze.resolve,
+                     self.__path_to_file, self.__background_color,
+                     self.__cell_border_color, self.__cell_result_color,
+                     self.__cell_pixels, self.__tile_size)
+            try:
+                with ProcessPoolExecutor(
+                        min(self.__processes, len(missing)),
+                        initializer=_init_worker, initargs=(state,),
+                ) as executor:
+                    list(executor.map(_render_tile, missing))
+            finally:
+                if memory is not None:
+                    memory.close()
+                    memory.unlink()
+        else:
+            for tile in missing:
+                self._get_tile(*tile)
+
+        return [self.tile_path(*tile) for tile in tiles]
+
+    def _sync(self) -> None:
+        """
+        Сверка тайлов на диске с лабиринтом.
+
+        Если с прошлой сверки изменились стены или решение лабиринта,
+        считается хэш его состояния. Если он не совпадает с хэшем в файле
+        STATE_FILE, каталог тайлов очищается, и хэш записывается заново.
+        """
+
+        maze = self.__maze
+        if self.__path_rows is not None \
+                and self.__walls_version == maze.walls_version \
+                and self.__resolve == maze.resolve:
+            return
+
+        self.__walls_version = maze.walls_version
+        self.__resolve = list(maze.resolve)
+        self.__path_rows = self._collect_path_rows()
+
+        state = hashlib.sha256(repr((
+            maze.shape, self.__background_color, self.__cell_border_color,
+            self.__cell_result_color, self.__cell_pixels, self.__tile_size,
+        )).encode('utf-8'))
+        state.update(maze.walls)
+        state.update(maze.resolve_view())
+        digest = state.hexdigest()
+
+        directory = self.tiles_directory
+        state_path = directory / self.STATE_FILE
+        try:
+            stored = state_path.read_text(encoding='utf-8')
+        except OSError:
+            stored = None
+        if stored != digest:
+            shutil.rmtree(directory, ignore_errors=True)
+            directory.mkdir(parents=True, exist_ok=True)
+            state_path.write_text(digest, encoding='utf-8')
+
+    def _collect_path_rows(self) -> Dict[int, Set[int]]:
+        """
+        Ячейки решения по строкам лабиринта.
+
+        :return: Словарь {строка: множество столбцов ячеек решения}.
+        """
+
+        path_rows: Dict[int, Set[int]] = {}
+        for row, column in self.__maze.resolve:
+            path_rows.setdefault(row, set()).add(column)
+        return path_rows
+
+    def _cell_size(self, level: int) -> float:
+        """
+        Размер ячейки на уровне.
+
+        :param level: Уровень.
+        :return: Размер ячейки в пикселях (меньше 1 на мелких уровнях).
+        """
+
+        return self.__cell_pixels / 2 ** (self.__max_level - level)
+
+    def _palette(self) -> List[int]:
+        """
+        Палитра тайла: цвета по индексам BACKGROUND, WALL, PATH и
+        WALL | PATH.
+
+        :return: Палитра для Image.putpalette.
+        """
+
+        palette = []
+        for color in (self.__background_color, self.__cell_border_color,
+                      self.__cell_result_color, self.__cell_border_color):
+            palette.extend(ImageColor.getrgb(color)[:3])
+        return palette
+
+    def _render_tile(self, level: int, column: int, row: int) -> Image.Image:
+        """
+        Отрисовка тайла по стенам лабиринта.
+
+        Линия сетки лабиринта занимает один пиксель, в каждом узле
+        сетки рисуется столбик стены (как '+' в TextConverter).
+
+        :param level: Уровень, на котором ячейка не меньше 2 пикселей.
+        :param column: Столбец тайла.
+        :param row: Строка тайла.
+        :return: RGB-изображение тайла.
+        """
+
+        maze = self.__maze
+        height, width = maze.shape
+        walls = maze.walls
+        size = int(self._cell_size(level))
+        level_width, level_height = self.level_size(level)
+        left = column * self.__tile_size
+        top = row * self.__tile_size
+        right = min(left + self.__tile_size, level_width)
+        bottom = min(top + self.__tile_size, level_height)
+
+        if self.__path_rows is None:
+            self.__path_rows = self._collect_path_rows()
+        path_rows = self.__path_rows
+
+        # Путь рисуется квадратом с отступом inset от линий сетки.
+        inset = max(1, size // 4)
+
+        # Отрезки строк пикселей для одной ячейки по значению ее байта.
+        background = bytes([BACKGROUND])
+        wall = bytes([WALL])
+        band = bytes([PATH if inset <= offset <= size - inset else BACKGROUND
+                      for offset in range(1, size)])
+        top_segments = [wall + (wall if borders & T_BORDER else background)
+                        * (size - 1) for borders in range(16)]
+        bottom_segments = [wall + (wall if borders & B_BORDER else background)
+                           * (size - 1) for borders in range(16)]
+        inner_segments = [(wall if borders & L_BORDER else background)
+                          + background * (size - 1) for borders in range(16)]
+        path_segments = [(wall if borders & L_BORDER else background) + band
+                         for borders in range(16)]
+
+        # Ячейки, которые покрывает тайл. Последний пиксель строки - это
+        # правая линия сетки за последней ячейкой.
+        first_cell = left // size
+        last_cell = min((right - 1) // size, width - 1)
+        closing = last_cell == width - 1
+        shift = left - first_cell * size
+
+        def crop(pixels: bytes) -> bytes:
+            return pixels[shift:shift + right - left]
+
+        lines: Dict[Tuple[int, int], bytes] = {}
+        data: List[bytes] = []
+        for y in range(top, bottom):
+            i, dy = divmod(y, size)
+            if dy == 0:
+                kind = 0
+            elif inset <= dy <= size - inset:
+                kind = 2
+            else:
+                kind = 1
+            line = lines.get((i, kind))
+            if line is None:
+                if i == height:
+                    # Нижняя линия лабиринта - нижние границы последней
+                    # строки.
+                    cells = walls[(height - 1) * width + first_cell:
+                                  (height - 1) * width + last_cell + 1]
+                    line = b''.join([bottom_segments[b] for b in cells])
+                    line += wall if closing else b''
+                else:
+                    start = i * width
+                    cells = walls[start + first_cell:start + last_cell + 1]
+                    if kind == 0:
+                        line = b''.join([top_segments[b] for b in cells])
+                        line += wall if closing else b''
+                    else:
+                        path_columns = path_rows.get(i)
+                        if kind == 1 or not path_columns:
+                            line = b''.join([inner_segments[b]
+                                             for b in cells])
+                        else:
+                            line = b''.join([
+                                path_segments[b]
+                                if cell_column in path_columns
+                                else inner_segments[b]
+                                for cell_column, b in enumerate(
+                                    cells, first_cell)
+                            ])
+                        if closing:
+                            line += wall if cells[-1] & R_BORDER \
+                                else background
+                line = crop(line)
+                lines[(i, kind)] = line
+            data.append(line)
+
+        image = Image.frombytes('P', (right - left, bottom - top),
+                                b''.join(data))
+        image.putpalette(self._palette())
+        return image.convert('RGB')
+
+    def _reduce_tile(self, level: int, column: int, row: int) -> Image.Image:
+        """
+        Сборка тайла из четырех тайлов уровня выше с уменьшением вдвое.
+
+        :param level: Уровень.
+        :param column: Столбец тайла.
+        :param row: Строка тайла.
+        :return: RGB-изображение тайла.
+        """
+
+        size = self.__tile_size
+        columns, rows = self.tile_count(level + 1)
+        canvas = Image.new('RGB', (2 * size, 2 * size))
+        canvas_width = canvas_height = 0
+        for dy in range(2):
+            for dx in range(2):
+                child_column, child_row = 2 * column + dx, 2 * row + dy
+                if child_column >= columns or child_row >= rows:
+                    continue
+                with Image.open(self._get_tile(level + 1, child_column,
+                                               child_row)) as child:
+                    canvas.paste(child, (dx * size, dy * size))
+                    canvas_width = max(canvas_width, dx * size + child.width)
+                    canvas_height = max(canvas_height,
+                                        dy * size + child.height)
+
+        canvas = canvas.crop((0, 0, canvas_width, canvas_height))
+        return canvas.resize(((canvas_width + 1) // 2,
+                              (canvas_height + 1) // 2), Image.BOX)
+
+
+# Конвертер процесса пула render_region и источник стен его лабиринта
+# (блок общей памяти или отображенный лабиринт). Создаются в _init_worker.
+_converter: Optional[DeepZoomConverter] = None
+_walls_source = None
+
+
+def _init_worker(state: tuple) -> None:
+    """
+    Инициализация процесса пула: восстановление конвертера.
+
+    Лабиринт процесса создается поверх стен без копирования: из файла
+    отображенного лабиринта или из блока общей памяти.
+
+    :param state: Размеры лабиринта, путь до файла MappedMaze или имя
+        блока общей памяти со стенами, решение и параметры конвертера.
+    """
+
+    global _converter, _walls_source
+    ((height, width), source, resolve, path_to_file, background_color,
+     cell_border_color, cell_result_color, cell_pixels, tile_size) = state
+    if isinstance(source, Path):
+        maze = _walls_source = MappedMaze(source)
+    else:
+        _walls_source = SharedMemory(name=source)
+        maze = Maze.from_buffer(_walls_source.buf[:height * width],
+                                height, width)
+    maze.resolve = resolve
+    _converter = DeepZoomConverter(
+        maze, path_to_file, background_color, cell_border_color,
+        cell_result_color, cell_pixels, tile_size, processes=1,
+    )
+
+
+def _render_tile(tile: Tuple[int, int, int]) -> Path:
+    """
+    Отрисовка тайла в процессе пула.
+
+    :param tile: Уровень, столбец и строка тайла.
+    :return: Путь до файла тайла.
+    """
+
+    # Тайлы на диске уже сверены с лабиринтом в render_region.
+    return _converter._get_tile(*tile)
@@ -1,5 +1,7 @@
 from pathlib import Path
 from typing import (
+    Optional,
+    Set,
     Tuple,
 )
 from PIL import (
@@ -8,8 +10,14 @@ from PIL import (
 )
 
 from .base_converter import BaseConverter
+from .. import instrumentation
 from ..maze import Maze
-from ..cell import Cell
+from ..cell import (
+    L_BORDER,
+    T_BORDER,
+    R_BORDER,
+    B_BORDER,
+)
 
 
 class ImageConverter(BaseConverter):
@@ -34,22 +42,28 @@ class ImageConverter(BaseConverter):
         self.__path_to_file = path_to_file
         self.__maze = maze
 
-        # Объект изображения и объекта для рисования.
-        self.__img = Image.new('RGB', (max_size, max_size), color=background_color)
-        self.__id_raw = ImageDraw.Draw(self.__img)
-
         self.__max_size = max_size
         self.__background_color = background_color
         self.__cell_border_color = cell_border_color
         self.__cell_result_color = cell_result_color
 
-        # Выбираем наибольшее значение из высоты и ширины карты.
-        max_count_nodes = max(len(maze.map), len(maze.map[0]))
-        # Расчитываем размер одной ячейки.
-        self.__size_node = (max_size - 1) // max_count_nodes
+        # Размер одной ячейки и толщина стенки. Расчитываются при отрисовке
+        # слоя стен.
+        self.__size_node = 0
+        self.__border_width = 0
 
-        # Толщина стенки.
-        self.__border_width = self.__size_node // 30
+        # Слой стен без решения и параметры, с которыми он нарисован. Слой
+        # перерисовывается, только если изменились стены, размеры или цвета.
+        self.__base_img: Optional[Image.Image] = None
+        self.__base_key: Optional[tuple] = None
+        self.__base_walls = b''
+
+        # Изображение с решением: копия слоя стен, на которой нарисованы
+        # ячейки решения из __drawn_cells цветом __drawn_color.
+        self.__img: Optional[Image.Image] = None
+        self.__id_raw: Optional[ImageDraw.ImageDraw] = None
+        self.__drawn_cells: Set[Tuple[int, int]] = set()
+        self.__drawn_color: Optional[str] = None
 
     @property
     def max_size(self) -> int:
@@ -91,21 +105,122 @@ class ImageConverter(BaseConverter):
     def cell_border_color(self, new_color) -> None:
         self.__cell_border_color = new_color
 
+    @property
+    def cell_result_color(self) -> str:
+        return self.__cell_result_color
+
+    @cell_result_color.setter
+    def cell_result_color(self, new_color) -> None:
+        self.__cell_result_color = new_color
+
     def load(self) -> Maze:
         ...
 
     def unload(self) -> None:
         """
         Метод сохранения лабиринта в изображение.
+
+        Стены рисуются один раз и хранятся отдельным слоем. При следующих
+        выгрузках того же лабиринта перерисовываются только ячейки,
+        которые появились в решении или пропали из него.
+        """
+
+        height, width = self.__maze.shape
+        timer = instrumentation.StageTimer('ImageConverter', 'unload',
+                                           height=height, width=width)
+        with timer:
+            draw_calls = self._update_image()
+            # Сохраняем готовое изображение.
+            self.__img.save(self.__path_to_file)
+
+        instrumentation.emit('ImageConverter', 'draw_calls', draw_calls)
+
+    def render(self) -> Image.Image:
+        """
+        Отрисовка лабиринта с решением.
+
+        :return: Копия изображения лабиринта.
+        """
+
+        self._update_image()
+        return self.__img.copy()
+
+    def _update_image(self) -> int:
+        """
+        Обновление изображения под текущие стены и решение лабиринта.
+
+        :return: Количество вызовов рисования.
+        """
+
+        maze = self.__maze
+        draw_calls = 0
+        base_key = (maze.shape, self.__max_size, self.__background_color,
+                    self.__cell_border_color)
+        if self.__base_img is None or self.__base_key != base_key \
+                or self.__base_walls != memoryview(maze.walls):
+            draw_calls += self._draw_base()
+            self.__base_key = base_key
+            self.__base_walls = bytes(maze.walls)
+            self.__img = None
+
+        if self.__img is None \
+                or self.__drawn_color != self.__cell_result_color:
+            self.__img = self.__base_img.copy()
+            self.__id_raw = ImageDraw.Draw(self.__img)
+            self.__drawn_cells = set()
+            self.__drawn_color = self.__cell_result_color
+
+        # Множество для проверки принадлежности ячейки решению за O(1).
+        resolve_cells = set(maze.resolve)
+        removed = self.__drawn_cells - resolve_cells
+        redraw = resolve_cells - self.__drawn_cells
+
+        # Возвращаем ячейки, которых больше нет в решении, из слоя стен.
+        # Квадрат решения соседней ячейки мог заходить в эту область,
+        # поэтому соседние ячейки решения рисуются заново.
+        for i, k in removed:
+            pos_x, pos_y = k * self.__size_node, i * self.__size_node
+            box = (pos_x, pos_y, pos_x + self.__size_node + 1,
+                   pos_y + self.__size_node + 1)
+            self.__img.paste(self.__base_img.crop(box), box[:2])
+            for cords in maze.get_adjacent_cells((i, k)):
+                if cords in resolve_cells:
+                    redraw.add(cords)
+
+        # Ячейки рисуются в том же порядке, что и при полной отрисовке.
+        for i, k in sorted(redraw):
+            draw_calls += self._draw_node((i, k), k * self.__size_node,
+                                          i * self.__size_node, True)
+        self.__drawn_cells = resolve_cells
+
+        return draw_calls
+
+    def _draw_base(self) -> int:
+        """
+        Отрисовка слоя стен лабиринта.
+
+        :return: Количество вызовов рисования.
         """
 
-        map = self.__maze.map
+        height, width = self.__maze.shape
+        # Выбираем наибольшее значение из высоты и ширины карты.
+        max_count_nodes = max(height, width)
+        # Расчитываем размер одной ячейки.
+        self.__size_node = (self.__max_size - 1) // max_count_nodes
+        # Толщина стенки.
+        self.__border_width = self.__size_node // 30
+
+        # Объект изображения и объекта для рисования.
+        self.__base_img = Image.new('RGB', (self.__max_size, self.__max_size),
+                                    color=self.__background_color)
+        self.__id_raw = ImageDraw.Draw(self.__base_img)
 
         # Координаты для отрисовки ячейки.
         pos_x, pos_y = 0, 0
-        for i in range(len(map)):
-            for k in range(len(map[0])):
-                self._draw_node((i, k), pos_x, pos_y)
+        draw_calls = 0
+        for i in range(height):
+            for k in range(width):
+                draw_calls += self._draw_node((i, k), pos_x, pos_y, False)
                 # Изменяем координаты для следующей ноды после отрисовки
                 # текущей.
                 pos_x += self.__size_node
@@ -113,59 +228,68 @@ class ImageConverter(BaseConverter):
             pos_x = 0
             pos_y += self.__size_node
 
-        # Сохраняем готовое изображение.
-        self.__img.save(self.__path_to_file)
+        return draw_calls
 
     def _draw_node(self, cords: Tuple[int, int],
-                          pos_x: int, pos_y: int) -> None:
+                   pos_x: int, pos_y: int, on_path: bool) -> int:
         """
         Отрисовка границ узла.
 
         :param node: Узел лабиринта.
         :param pos_x: Позиция верхнего левого угла по оси X.
         :param pos_y: Позиция верхнего левого угла по оси Y.
+        :param on_path: Принадлежит ли ячейка решению.
+        :return: Количество вызовов рисования.
         """
 
+        draw_calls = 0
         part_size_node = self.__size_node // 1.25
-        if cords in self.__maze.resolve:
+        if on_path:
             self.__id_raw.rectangle(
                 xy=(pos_x + part_size_node, pos_y + part_size_node,
                     pos_x + self.__size_node - part_size_node,
                     pos_y + self.__size_node - part_size_node),
                 fill=self.__cell_result_color,
             )
+            draw_calls += 1
 
-        cell: Cell = self.__maze.cords_to_cell(cords)
+        borders = self.__maze.walls[self.__maze.cords_to_index(cords)]
 
         # Если есть левая стенка, отрисовываем ее тогда, когда у предыдущей
         # ячейки нет правой стенки или ячейки вообще нет.
-        if cell.l_border:
+        if borders & L_BORDER:
             self.__id_raw.line(
                 xy=(pos_x, pos_y, pos_x, pos_y + self.__size_node),
                 fill=self.__cell_border_color,
                 width=self.__border_width,
             )
+            draw_calls += 1
         # Если есть правая стенка, отрисовываем ее тогда, когда у следующей
         # ячейки нет левой стенки или ячейки вообще нет.
-        if cell.r_border:
+        if borders & R_BORDER:
             self.__id_raw.line(
                 xy=(pos_x + self.__size_node, pos_y,
                     pos_x + self.__size_node, pos_y + self.__size_node),
                 fill=self.__cell_border_color,
                 width=self.__border_width,
             )
+            draw_calls += 1
         # Для верхней и нижней стенок поступаем аналогично левым и правым.
-        if cell.t_border:
+        if borders & T_BORDER:
             self.__id_raw.line(
                 xy=(pos_x, pos_y,
                     pos_x + self.__size_node, pos_y),
                 fill=self.__cell_border_color,
                 width=self.__border_width,
             )
-        if cell.b_border:
+            draw_calls += 1
+        if borders & B_BORDER:
             self.__id_raw.line(
                 xy=(pos_x, pos_y + self.__size_node,
                     pos_x + self.__size_node, pos_y + self.__size_node),
                 fill=self.__cell_border_color,
                 width=self.__border_width,
             )
+            draw_calls += 1
+
+        return draw_calls
@@ -0,0 +1,285 @@
+from pathlib import Path
+from typing import (
+    List,
+    Optional,
+)
+from PIL import (
+    Image,
+    ImageColor,
+)
+
+from .base_converter import BaseConverter
+from .. import instrumentation
+from ..maze import Maze
+from ..cell import (
+    L_BORDER,
+    T_BORDER,
+    R_BORDER,
+    B_BORDER,
+)
+
+
+# Индексы палитры. Стена рисуется поверх пути, поэтому пересечение
+# стены и пути (WALL | PATH) тоже окрашивается в цвет стены.
+BACKGROUND = 0
+WALL = 1
+PATH = 2
+
+# Таблица для bytes.translate: добавление пути к индексу палитры.
+_ADD_PATH = bytes(index | PATH for index in range(256))
+
+
+class RasterImageConverter(BaseConverter):
+    """
+    Класс для выгрузки лабиринта в виде изображения целыми строками
+    пикселей.
+
+    Рисует то же изображение, что и ImageConverter, но не вызывает
+    ImageDraw для каждой ячейки. Каждая строка пикселей собирается из
+    заранее подготовленных отрезков для ячеек и хранится как целое число
+    (один байт на пиксель - индекс палитры), поэтому наложение стен и пути
+    выполняется побитовым ИЛИ сразу для всей строки. Готовое изображение
+    создается одним вызовом Image.frombytes.
+
+    Строки со стенами сохраняются и используются, пока не изменились
+    стены или размер изображения, поэтому отрисовка того же лабиринта
+    с другим решением стоит пропорционально длине решения.
+    """
+
+    def __init__(self, maze: Maze, path_to_file: Path, max_size: int,
+                 background_color: str, cell_border_color: str,
+                 cell_result_color: str) -> None:
+        """
+        Инициализатор класса.
+
+        :param maze: Лабиринт.
+        :param path_to_file: Путь до файла, куда нужно сохранить.
+        :param max_size: Максимальный размер изображения.
+        :param background_color: Цвет фона.
+        :param cell_border_color: Цвет стенки.
+        :param cell_result_color: Цвет ячеек решения.
+        """
+
+        self.__path_to_file = path_to_file
+        self.__maze = maze
+        self.__max_size = max_size
+        self.__background_color = background_color
+        self.__cell_border_color = cell_border_color
+        self.__cell_result_color = cell_result_color
+
+        # Индексы палитры слоя стен, размер изображения и стены, для
+        # которых он нарисован.
+        self.__wall_indexes: Optional[bytes] = None
+        self.__wall_size = 0
+        self.__walls = b''
+
+    @property
+    def max_size(self) -> int:
+        return self.__max_size
+
+    @max_size.setter
+    def max_size(self, new_max_size: int) -> None:
+        self.__max_size = new_max_size
+
+    @property
+    def path_to_file(self) -> Path:
+        return self.__path_to_file
+
+    @path_to_file.setter
+    def path_to_file(self, new_path: Path) -> None:
+        self.__path_to_file = new_path
+
+    @property
+    def maze(self) -> Maze:
+        return self.__maze
+
+    @maze.setter
+    def maze(self, new_maze: Maze) -> None:
+        self.__maze = new_maze
+
+    @property
+    def background_color(self) -> str:
+        return self.__background_color
+
+    @background_color.setter
+    def background_color(self, new_color) -> None:
+        self.__background_color = new_color
+
+    @property
+    def cell_border_color(self) -> str:
+        return self.__cell_border_color
+
+    @cell_border_color.setter
+    def cell_border_color(self, new_color) -> None:
+        self.__cell_border_color = new_color
+
+    @property
+    def cell_result_color(self) -> str:
+        return self.__cell_result_color
+
+    @cell_result_color.setter
+    def cell_result_color(self, new_color) -> None:
+        self.__cell_result_color = new_color
+
+    @property
+    def size_node(self) -> int:
+        """Размер одной ячейки в пикселях."""
+
+        return (self.__max_size - 1) // max(self.__maze.shape)
+
+    def load(self) -> Maze:
+        ...
+
+    def unload(self) -> None:
+        """
+        Метод сохранения лабиринта в изображение.
+        """
+
+        height, width = self.__maze.shape
+        with instrumentation.StageTimer('RasterImageConverter', 'unload',
+                                        height=height, width=width):
+            self.render().save(self.__path_to_file)
+
+    def render(self) -> Image.Image:
+        """
+        Отрисовка лабиринта.
+
+        :return: RGB-изображение размером max_size x max_size.
+        """
+
+        size = self.__max_size
+        image = Image.frombytes('P', (size, size), self._render_indexes())
+        palette = []
+        for color in (self.__background_color, self.__cell_border_color,
+                      self.__cell_result_color, self.__cell_border_color):
+            palette.extend(ImageColor.getrgb(color)[:3])
+        image.putpalette(palette)
+
+        return image.convert('RGB')
+
+    def _render_indexes(self) -> bytes:
+        """
+        Отрисовка лабиринта в индексы палитры.
+
+        :return: Байты изображения, по одному байту на пиксель.
+        """
+
+        maze = self.__maze
+        size = self.__max_size
+        size_node = self.size_node
+        if size_node <= 0:
+            raise ValueError('Размер изображения слишком мал для лабиринта')
+
+        if self.__wall_indexes is None or self.__wall_size != size \
+                or self.__walls != memoryview(maze.walls):
+            self.__wall_indexes = self._render_walls()
+            self.__wall_size = size
+            self.__walls = bytes(maze.walls)
+        if not maze.resolve:
+            return self.__wall_indexes
+
+        # Границы квадрата пути внутри ячейки (как в ImageConverter).
+        part_size_node = size_node // 1.25
+        path_low = max(1, int(min(part_size_node, size_node - part_size_node)))
+        path_high = min(size_node - 1,
+                        int(max(part_size_node, size_node - part_size_node)))
+
+        # Накладываем путь на копию слоя стен: стена остается поверх пути.
+        pixels = bytearray(self.__wall_indexes)
+        path_rows = range(path_low * size, (path_high + 1) * size, size)
+        for i, k in set(maze.resolve):
+            corner = i * size_node * size + k * size_node
+            for offset in path_rows:
+                span = slice(corner + offset + path_low,
+                             corner + offset + path_high + 1)
+                pixels[span] = pixels[span].translate(_ADD_PATH)
+
+        return bytes(pixels)
+
+    def _render_walls(self) -> bytes:
+        """
+        Отрисовка стен лабиринта в индексы палитры.
+
+        :return: Байты изображения, по одному байту на пиксель.
+        """
+
+        maze = self.__maze
+        height, width = maze.shape
+        walls = maze.walls
+        size = self.__max_size
+        size_node = self.size_node
+
+        # Толщина стенки и ее смещения относительно линии стены - так же,
+        # как их рисует ImageDraw.line.
+        thickness = max(1, size_node // 30)
+        offsets = range(-((thickness - 1) // 2), thickness // 2 + 1)
+
+        # Отрезки строк пикселей для одной ячейки по значению ее байта.
+        background = bytes([BACKGROUND])
+        wall = bytes([WALL])
+        vertical_segments = [
+            (wall if borders & L_BORDER else background)
+            + background * (size_node - 1)
+            for borders in range(16)
+        ]
+        top_segments = [
+            (wall if borders & T_BORDER else background) * size_node
+            for borders in range(16)
+        ]
+        bottom_segments = [
+            (wall if borders & B_BORDER else background) * size_node
+            for borders in range(16)
+        ]
+        mask = (1 << (8 * size)) - 1
+
+        def to_int(pixels: bytes) -> int:
+            # Дополняем строку фоном до ширины изображения.
+            return int.from_bytes(
+                pixels + background * (size - len(pixels)), 'big')
+
+        def widen(line: int) -> int:
+            # Утолщение вертикальных линий по горизонтали. Сдвиг на байт
+            # вправо - смещение на один пиксель вправо.
+            result = 0
+            for offset in offsets:
+                result |= line >> (8 * offset) if offset >= 0 \
+                    else line << (-8 * offset)
+            return result & mask
+
+        # Вертикальные стены и горизонтальные линии для строк ячеек.
+        verticals: List[int] = []
+        horizontals: List[int] = []
+        for i in range(height):
+            row = walls[i * width:(i + 1) * width]
+            last_wall = wall if row[-1] & R_BORDER else background
+            verticals.append(widen(to_int(
+                b''.join([vertical_segments[borders] for borders in row])
+                + last_wall)))
+            line = to_int(b''.join([top_segments[borders] for borders in row]))
+            horizontals.append(line | (line >> 8))
+        # Нижняя линия лабиринта - нижние границы последней строки.
+        last_row = walls[(height - 1) * width:]
+        line = to_int(
+            b''.join([bottom_segments[borders] for borders in last_row]))
+        horizontals.append(line | (line >> 8))
+
+        # Собираем строки пикселей.
+        rows: List[bytes] = []
+        empty_row = background * size
+        for y in range(size):
+            i, dy = divmod(y, size_node)
+            pixels = 0
+            if i < height:
+                pixels |= verticals[i]
+            # Вертикальные стены предыдущей строки заканчиваются на ее
+            # нижней линии включительно.
+            if dy == 0 and 0 < i <= height:
+                pixels |= verticals[i - 1]
+            # Горизонтальные линии, чья толщина захватывает текущую строку.
+            for offset in offsets:
+                line_index, rest = divmod(y - offset, size_node)
+                if rest == 0 and 0 <= line_index <= height:
+                    pixels |= horizontals[line_index]
+            rows.append(pixels.to_bytes(size, 'big') if pixels else empty_row)
+
+        return b''.join(rows)
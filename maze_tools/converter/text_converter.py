@@ -1,21 +1,46 @@
 from pathlib import Path
+from collections import defaultdict
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from .base_converter import BaseConverter
+from .. import instrumentation
 from ..maze import Maze
+from ..cell import (
+    R_BORDER,
+    B_BORDER,
+)
 
 
 class TextConverter(BaseConverter):
     """
     Класс для загрузки/выгрузки лабиринта в текстовом виде.
+
+    Каждая строка лабиринта собирается целиком из заранее подготовленных
+    фрагментов для ячеек и записывается в файл одним вызовом write.
     """
 
-    def __init__(self, maze: Maze, path_to_file: Path,
+    # Размер буфера файла при выгрузке.
+    BUFFER_SIZE = 1024 * 1024
+
+    # Флаг пути, добавляемый к байту ячейки при выборе фрагмента строки.
+    _PATH_FLAG = 16
+
+    def __init__(self, maze: Optional[Maze], path_to_file: Path,
                  result_symbol: str) -> None:
         """
         Инициализатор класса.
 
-        :param maze: Объект лабиринта.
+        :param maze: Объект лабиринта. Может быть None, если лабиринт
+            выгружается только из потока строк (unload_rows).
         :param path_to_file: Путь до файла.
+        :param result_symbol: Символ, которым отмечаются ячейки решения.
         """
 
         self.__path_to_file = path_to_file
@@ -31,13 +56,21 @@ class TextConverter(BaseConverter):
         self.__path_to_file = new_path
 
     @property
-    def maze(self) -> Maze:
+    def maze(self) -> Optional[Maze]:
         return self.__maze
 
     @maze.setter
     def maze(self, new_maze: Maze) -> None:
         self.__maze = new_maze
 
+    @property
+    def result_symbol(self) -> str:
+        return self.__result_symbol
+
+    @result_symbol.setter
+    def result_symbol(self, new_symbol: str) -> None:
+        self.__result_symbol = new_symbol
+
     def load(self) -> Maze:
         ...
 
@@ -46,23 +79,61 @@ class TextConverter(BaseConverter):
         Метод сохранения лабиринта в текстовом виде.
         """
 
-        map = self.__maze.map
-        with open(self.__path_to_file, mode='w') as file:
-            for _ in range(self.__maze.shape[1]):
-                file.write('+----')
-            file.write('+\n')
-            for i, row in enumerate(map):
-                file.write('|')
-                for k, cell in enumerate(row):
-                    if cell.r_border:
-                        file.write(f' {self.__result_symbol if (i, k) in self.__maze.resolve else " "}  |')
-                    else:
-                        file.write(f'  {self.__result_symbol if (i, k) in self.__maze.resolve else " "}  ')
-                file.write('\n+')
-                for cell in row:
-                    if cell.b_border:
-                        file.write('----')
-                    else:
-                        file.write('    ')
-                    file.write('+')
-                file.write('\n')
+        if self.__maze is None:
+            raise ValueError('Лабиринт для выгрузки не задан')
+
+        height, width = self.__maze.shape
+        walls = self.__maze.walls
+        rows = (walls[i * width:(i + 1) * width] for i in range(height))
+        self.unload_rows(rows, self.__maze.resolve)
+
+    def unload_rows(self, rows: Iterable[bytes],
+                    resolve: Iterable[Tuple[int, int]] = ()) -> None:
+        """
+        Сохранение лабиринта в текстовом виде из потока строк.
+
+        Строки читаются и записываются по одной, поэтому лабиринт не нужно
+        держать в памяти целиком - например, можно передать сюда
+        EulerGenerator.iter_rows.
+
+        :param rows: Строки лабиринта в формате Maze.walls.
+        :param resolve: Координаты ячеек решения.
+        """
+
+        # Столбцы ячеек решения по строкам.
+        path_columns: Dict[int, Set[int]] = defaultdict(set)
+        for row_index, column in resolve:
+            path_columns[row_index].add(column)
+
+        # Фрагменты строк для ячейки по ее байту (и флагу пути).
+        symbol = self.__result_symbol
+        cell_parts: List[str] = []
+        for flags in range(2 * self._PATH_FLAG):
+            mark = symbol if flags & self._PATH_FLAG else ' '
+            cell_parts.append(f' {mark}  |' if flags & R_BORDER
+                              else f'  {mark}  ')
+        bottom_parts = ['----+' if borders & B_BORDER else '    +'
+                        for borders in range(self._PATH_FLAG)]
+
+        timer = instrumentation.StageTimer('TextConverter', 'unload')
+        with timer, open(self.__path_to_file, mode='w',
+                         buffering=self.BUFFER_SIZE) as file:
+            for i, row in enumerate(rows):
+                if i == 0:
+                    file.write('+----' * len(row) + '+\n')
+                columns = path_columns.get(i)
+                if columns:
+                    path_flags = bytearray(len(row))
+                    for column in columns:
+                        path_flags[column] = self._PATH_FLAG
+                    cells = ''.join([
+                        cell_parts[borders | flag]
+                        for borders, flag in zip(row, path_flags)
+                    ])
+                else:
+                    cells = ''.join([cell_parts[borders] for borders in row])
+                bottoms = ''.join([bottom_parts[borders] for borders in row])
+                file.write(f'|{cells}\n+{bottoms}\n')
+            if instrumentation.enabled():
+                instrumentation.emit('TextConverter', 'bytes_written',
+                                     file.tell())
@@ -0,0 +1,73 @@
+from typing import List
+
+
+class DisjointSet:
+    """
+    Система непересекающихся множеств (union-find).
+
+    Элементы - целые числа от 0 до size - 1. Поиск корня выполняется
+    со сжатием пути (path halving), поэтому объединение и поиск работают
+    почти за константу.
+    """
+
+    __slots__ = ('__parent',)
+
+    def __init__(self, size: int) -> None:
+        """
+        Инициализатор класса.
+
+        :param size: Количество элементов. Каждый элемент изначально
+            находится в своем собственном множестве.
+        """
+
+        self.__parent: List[int] = list(range(size))
+
+    def __len__(self) -> int:
+        return len(self.__parent)
+
+    def find(self, item: int) -> int:
+        """
+        Поиск представителя множества, в котором находится элемент.
+
+        :param item: Элемент.
+        :return: Представитель множества.
+        """
+
+        parent = self.__parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+
+        return item
+
+    def union(self, first: int, second: int) -> bool:
+        """
+        Объединение множеств двух элементов.
+
+        Представителем объединенного множества становится представитель
+        множества первого элемента.
+
+        :param first: Первый элемент.
+        :param second: Второй элемент.
+        :return: False, если элементы уже были в одном множестве.
+        """
+
+        first_root = self.find(first)
+        second_root = self.find(second)
+        if first_root == second_root:
+            return False
+        self.__parent[second_root] = first_root
+
+        return True
+
+    def reset(self, item: int) -> None:
+        """
+        Перемещение элемента в новое множество из одного элемента.
+
+        Элемент не должен быть представителем множества, в котором есть
+        другие элементы.
+
+        :param item: Элемент.
+        """
+
+        self.__parent[item] = item
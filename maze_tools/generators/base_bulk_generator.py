@@ -0,0 +1,194 @@
+import random
+from abc import abstractmethod
+from typing import (
+    Optional,
+    Tuple,
+)
+
+from .base_generator import BaseGenerator
+from .. import instrumentation
+from ..cell import (
+    L_BORDER,
+    T_BORDER,
+    R_BORDER,
+    B_BORDER,
+    ALL_BORDERS,
+)
+from ..maze import Maze
+
+
+class BaseBulkGenerator(BaseGenerator):
+    """
+    Абстрактный класс генератора, решения которого для ячеек не зависят
+    друг от друга или зависят только от ячеек той же строки.
+
+    Лабиринт строится блоками из нескольких строк. Для блока наследник
+    возвращает два битовых поля - ячейки с проходом вверх и ячейки
+    с проходом вправо, а границы всех ячеек блока получаются из них
+    несколькими операциями над целыми числами и bytes.translate.
+
+    В битовом поле блока старший бит соответствует первой ячейке блока,
+    младший - последней, поэтому ячейке i блока из count ячеек
+    соответствует бит count - 1 - i.
+    """
+
+    # Сколько ячеек обрабатывается за один блок. Ограничивает память,
+    # нужную для промежуточных чисел и строк.
+    BLOCK_CELLS = 1 << 22
+
+    # Таблицы для bytes.translate: бит поля (b'0' или b'1') -> граница,
+    # которую нужно убрать.
+    _OPEN_TABLES = {
+        border: bytes.maketrans(b'01', bytes([0, border]))
+        for border in (L_BORDER, T_BORDER, R_BORDER, B_BORDER)
+    }
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        """
+        Инициализация генератора.
+
+        :param seed: Зерно генератора случайных чисел. Если не задано,
+            каждый лабиринт будет случайным.
+        """
+
+        self.__MIN_WIDTH = 1
+        self.__MIN_HEIGHT = 1
+        self.__seed = seed
+
+    @property
+    def min_width(self) -> int:
+        return self.__MIN_WIDTH
+
+    @min_width.setter
+    def min_width(self, new_width: int) -> None:
+        self.__MIN_WIDTH = new_width
+
+    @property
+    def min_height(self) -> int:
+        return self.__MIN_HEIGHT
+
+    @min_height.setter
+    def min_height(self, new_height: int) -> None:
+        self.__MIN_HEIGHT = new_height
+
+    @property
+    def seed(self) -> Optional[int]:
+        return self.__seed
+
+    @seed.setter
+    def seed(self, new_seed: Optional[int]) -> None:
+        self.__seed = new_seed
+
+    def generate(self, height: int, width: int) -> Maze:
+        """
+        Генерация лабиринта.
+
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :return: Объект лабиринта.
+        """
+
+        # Проверка параметров лабиринта.
+        if width < self.__MIN_WIDTH:
+            raise ValueError(f'Ширина лабиринта не может быть меньше '
+                             f'{self.__MIN_WIDTH}')
+        if height < self.__MIN_HEIGHT:
+            raise ValueError(f'Высота лабиринта не может быть меньше '
+                             f'{self.__MIN_HEIGHT}')
+
+        component = type(self).__name__
+        with instrumentation.StageTimer(component, 'generate',
+                                        height=height, width=width):
+            maze = Maze(height, width)
+            self._fill(maze.walls, height, width)
+        instrumentation.emit(component, 'cells_generated', height * width)
+
+        return maze
+
+    def _fill(self, walls: bytearray, height: int, width: int) -> None:
+        """
+        Заполнение сетки стен лабиринта блоками строк.
+
+        :param walls: Сетка стен, в которой у всех ячеек есть все границы.
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        """
+
+        rng = random.Random(self.__seed)
+        rows_per_block = max(1, self.BLOCK_CELLS // width)
+
+        for first_row in range(0, height, rows_per_block):
+            rows = min(rows_per_block, height - first_row)
+            count = rows * width
+            start = first_row * width
+            north, east = self._carve_block(rng, first_row, rows, width)
+
+            # Свои границы ячеек блока. Проход вправо у ячейки - это
+            # проход влево у следующей ячейки, то есть бит правее.
+            opened = self._spread(north, count, T_BORDER) \
+                | self._spread(east, count, R_BORDER) \
+                | self._spread(east >> 1, count, L_BORDER)
+            full = int.from_bytes(bytes([ALL_BORDERS]) * count, 'big')
+            walls[start:start + count] = (full ^ opened).to_bytes(count, 'big')
+
+            # Проход вверх у ячейки - это проход вниз у ячейки строкой
+            # выше. Эти ячейки сдвинуты на строку назад относительно блока,
+            # поэтому у первой строки лабиринта их нет.
+            above = max(start - width, 0)
+            above_count = count - (above - (start - width))
+            if not above_count:
+                continue
+            north &= (1 << above_count) - 1
+            opened = self._spread(north, above_count, B_BORDER)
+            stored = int.from_bytes(walls[above:above + above_count], 'big')
+            walls[above:above + above_count] = \
+                ((stored | opened) ^ opened).to_bytes(above_count, 'big')
+
+    @abstractmethod
+    def _carve_block(self, rng: random.Random, first_row: int, rows: int,
+                     width: int) -> Tuple[int, int]:
+        """
+        Случайные проходы ячеек блока строк.
+
+        Проходы должны оставаться внутри лабиринта: у ячеек первой строки
+        лабиринта нет прохода вверх, у ячеек последнего столбца - вправо.
+
+        :param rng: Генератор случайных чисел.
+        :param first_row: Индекс первой строки блока.
+        :param rows: Количество строк в блоке.
+        :param width: Ширина лабиринта.
+        :return: Битовые поля ячеек с проходом вверх и с проходом вправо.
+        """
+
+        pass
+
+    @staticmethod
+    def _column_mask(rows: int, width: int, column: int) -> int:
+        """
+        Битовое поле, в котором отмечены ячейки одного столбца блока.
+
+        :param rows: Количество строк в блоке.
+        :param width: Ширина лабиринта.
+        :param column: Индекс столбца.
+        :return: Битовое поле.
+        """
+
+        row = bytearray(b'0') * width
+        row[column] = ord('1')
+        return int(bytes(row) * rows, 2)
+
+    @classmethod
+    def _spread(cls, bits: int, count: int, border: int) -> int:
+        """
+        Перевод битового поля блока в байты ячеек.
+
+        :param bits: Битовое поле блока.
+        :param count: Количество ячеек в блоке.
+        :param border: Граница, которая соответствует отмеченным ячейкам.
+        :return: Байты ячеек в виде числа: border у отмеченных ячеек
+            и 0 у остальных.
+        """
+
+        digits = format(bits, f'0{count}b').encode('ascii')
+        return int.from_bytes(digits.translate(cls._OPEN_TABLES[border]),
+                              'big')
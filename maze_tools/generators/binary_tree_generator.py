@@ -0,0 +1,45 @@
+import random
+from typing import Tuple
+
+from .base_bulk_generator import BaseBulkGenerator
+
+
+class BinaryTreeGenerator(BaseBulkGenerator):
+    """
+    Генератор лабиринта с помощью алгоритма двоичного дерева.
+
+    Каждая ячейка независимо от остальных случайно делает проход вверх
+    или вправо. Ячейки первой строки всегда идут вправо, ячейки последнего
+    столбца - вверх. Решения для целого блока строк берутся одним вызовом
+    getrandbits, поэтому это самый быстрый генератор, но в лабиринте
+    заметен перекос: вдоль верхней строки и правого столбца тянутся
+    сплошные коридоры.
+    """
+
+    def _carve_block(self, rng: random.Random, first_row: int, rows: int,
+                     width: int) -> Tuple[int, int]:
+        """
+        Случайные проходы ячеек блока строк.
+
+        :param rng: Генератор случайных чисел.
+        :param first_row: Индекс первой строки блока.
+        :param rows: Количество строк в блоке.
+        :param width: Ширина лабиринта.
+        :return: Битовые поля ячеек с проходом вверх и с проходом вправо.
+        """
+
+        count = rows * width
+        full = (1 << count) - 1
+        last_column = self._column_mask(rows, width, width - 1)
+
+        # Каждая ячейка идет вверх или вправо, последний столбец - вверх.
+        north = rng.getrandbits(count) | last_column
+        east = full ^ north
+
+        # Первая строка лабиринта идет только вправо.
+        if first_row == 0:
+            top_row = ((1 << width) - 1) << (count - width)
+            north &= ~top_row
+            east |= top_row & ~last_column
+
+        return north, east
@@ -1,24 +1,65 @@
 import random
-from typing import List
-from itertools import groupby
+from collections import defaultdict
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Optional,
+)
 
 from .base_generator import BaseGenerator
-from ..cell import Cell
+from .. import instrumentation
+from ..cell import (
+    L_BORDER,
+    T_BORDER,
+    R_BORDER,
+    B_BORDER,
+    ALL_BORDERS,
+)
 from ..maze import Maze
+from ..disjoint_set import DisjointSet
 
 
 class EulerGenerator(BaseGenerator):
     """
     Генератор лабиринта с помощью алгоритма Эйлера.
+
+    Алгоритму нужна только текущая строка лабиринта, поэтому генератор
+    умеет выдавать лабиринт построчно (iter_rows), не храня его целиком.
+    Множества ячеек строки хранятся в системе непересекающихся множеств,
+    поэтому каждая строка обрабатывается почти за линейное время.
+
+    Случайные решения для всей строки берутся одним вызовом getrandbits
+    у собственного генератора случайных чисел, поэтому при заданном seed
+    одни и те же размеры всегда дают один и тот же лабиринт.
     """
 
-    def __init__(self) -> None:
+    # Таблицы для bytes.translate.
+    # Случайное решение (b'0' или b'1') -> маска, убирающая нижнюю границу.
+    _HOLE_MASKS = bytes(
+        0xFF & ~B_BORDER if char == ord('1') else 0xFF for char in range(256)
+    )
+    # Байт ячейки -> 1, если у ячейки нет правой границы, иначе 0.
+    _RIGHT_PASSAGES = bytes(
+        0 if borders & R_BORDER else 1 for borders in range(256)
+    )
+    # Байт ячейки -> байт ячейки под ней в следующей строке.
+    _NEXT_ROW = bytes(
+        ALL_BORDERS if borders & B_BORDER else ALL_BORDERS & ~T_BORDER
+        for borders in range(256)
+    )
+
+    def __init__(self, seed: Optional[int] = None) -> None:
         """
         Инициализация генератора параметрами для лабиринта.
+
+        :param seed: Зерно генератора случайных чисел. Если не задано,
+            каждый лабиринт будет случайным.
         """
 
         self.__MIN_WIDTH = 2
         self.__MIN_HEIGHT = 2
+        self.__seed = seed
 
     @property
     def min_width(self) -> int:
@@ -36,6 +77,14 @@ class EulerGenerator(BaseGenerator):
     def min_height(self, new_height: int) -> None:
         self.__MIN_HEIGHT = new_height
 
+    @property
+    def seed(self) -> Optional[int]:
+        return self.__seed
+
+    @seed.setter
+    def seed(self, new_seed: Optional[int]) -> None:
+        self.__seed = new_seed
+
     def generate(self, height: int, width: int) -> Maze:
         """
         Генерация лабиринта.
@@ -45,6 +94,36 @@ class EulerGenerator(BaseGenerator):
         :return: Объект лабиринта.
         """
 
+        with instrumentation.StageTimer('EulerGenerator', 'generate',
+                                        height=height, width=width):
+            maze = Maze(height, width)
+            walls = maze.walls
+            for i, row in enumerate(self.iter_rows(height, width)):
+                walls[i * width:(i + 1) * width] = row
+
+        if instrumentation.enabled():
+            instrumentation.emit('EulerGenerator', 'cells_generated',
+                                 height * width)
+            # Каждое объединение множеств убирает одну стену между
+            # соседними ячейками строки.
+            merges = walls.translate(self._RIGHT_PASSAGES).count(1)
+            instrumentation.emit('EulerGenerator', 'set_merges', merges)
+
+        return maze
+
+    def iter_rows(self, height: int, width: int) -> Iterator[bytearray]:
+        """
+        Построчная генерация лабиринта.
+
+        Каждая выданная строка уже окончательно сформирована - это байты
+        ячеек в том же виде, что и в Maze.walls. В памяти хранится только
+        текущая строка и маркеры ее множеств.
+
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :return: Итератор по строкам лабиринта сверху вниз.
+        """
+
         # Проверка параметров лабиринта.
         if width < self.__MIN_WIDTH:
             raise ValueError(f'Ширина лабиринта не может быть меньше '
@@ -53,155 +132,278 @@ class EulerGenerator(BaseGenerator):
             raise ValueError(f'Высота лабиринта не может быть меньше '
                              f'{self.__MIN_HEIGHT}')
 
-        # Заранее заполняем карту лабиринта ячейками.
-        map = [[Cell() for _ in range(width)] for _ in range(height)]
-        # Создаем объект лабиринта.
-        maze = Maze(map)
+        return self._iter_rows(height, width)
+
+    def iter_band_rows(self, height: int,
+                       width: int) -> Iterator[bytearray]:
+        """
+        Построчная генерация горизонтальной полосы лабиринта с открытым
+        низом.
+
+        Полоса строится так же, как лабиринт, но последняя строка не
+        объединяется целиком: в ней случайно соединяются соседние ячейки,
+        а затем у каждого множества ровно одна ячейка получает проход вниз.
+        Каждая компонента связности полосы выходит в последнюю строку,
+        поэтому, если под полосой уже лежит связный лабиринт, полоса
+        присоединяется к нему без циклов.
+
+        :param height: Высота полосы (не меньше 1).
+        :param width: Ширина лабиринта.
+        :return: Итератор по строкам полосы сверху вниз.
+        """
+
+        if width < self.__MIN_WIDTH:
+            raise ValueError(f'Ширина лабиринта не может быть меньше '
+                             f'{self.__MIN_WIDTH}')
+        if height < 1:
+            raise ValueError('Высота полосы не может быть меньше 1')
+
+        return self._iter_rows(height, width, open_bottom=True)
+
+    def _iter_rows(self, height: int, width: int,
+                   open_bottom: bool = False) -> Iterator[bytearray]:
+        """
+        Генератор строк лабиринта. Параметры уже проверены в iter_rows.
+
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :param open_bottom: Оставить ли в последней строке по одному проходу
+            вниз на каждое множество вместо объединения всех множеств.
+        :return: Итератор по строкам лабиринта сверху вниз.
+        """
 
         # Присваиваем начальные множества ячейкам в первой строке.
         # Все множества здесь будут уникальными, и каждая ячейка будет
         # единственной в своем множестве.
-        first_marks = range(width)
-        for i, cell in enumerate(map[0]):
-            cell.marker = first_marks[i]
-        # Соединяем случайным образом ячейки из разных множеств.
-        self._horizontal_connection_cells(map[0])
-        self._vertical_connections_cells(map[0])
-
-        # Заполняем все строки между первой и последней.
-        prev_row = map[0]
-        for i in range(1, height - 1):
-            current_row = map[i]
-            # В последующих ячейка нам не нужны верхние границы, поэтому
-            # удаляем их.
-            for cell in current_row:
-                cell.t_border = False
-            # Ячейки в ряду maze[i] скопируют маркеры из ячеек в ряду
-            # maze[i - 1], если у тех есть проход вниз.
-            # Остальные ячейки в maze[i] нужно промарикровать новыми
-            # уникальными маркерами.
-            self._unique_marked_cells(current_row, prev_row)
-            # Также соединяем ячейки случайным образом.
-            self._horizontal_connection_cells(current_row)
-            self._vertical_connections_cells(current_row)
-            prev_row = current_row
+        rng = random.Random(self.__seed)
+        markers: List[int] = list(range(width))
+        sets = DisjointSet(width)
+        row = bytearray([ALL_BORDERS]) * width
+
+        # Заполняем все строки, кроме последней.
+        for i in range(height - 1):
+            if i > 0:
+                prev_row, row = row, self._next_row(row)
+                yield prev_row
+                # Ячейки в текущем ряду скопируют маркеры из ячеек
+                # в предыдущем ряду, если у тех есть проход вниз.
+                # Остальные ячейки нужно промарикровать новыми
+                # уникальными маркерами.
+                self._unique_marked_cells(row, markers, sets)
+            # Соединяем случайным образом ячейки из разных множеств.
+            self._horizontal_connection_cells(row, markers, sets, rng)
+            self._vertical_connections_cells(row, markers, rng)
 
         # Обрабатываем последнюю строку лабиринта.
         # Обработка этой строки от строк между начальной и последней
         # отличает методом соединения горизонтальных ячеек, а также
         # здесь не нужно убирает нижнии границы ячеек.
-        last_row = map[len(map) - 1]
-        prev_last_row = map[len(map) - 2]
-        self._unique_marked_cells(last_row, prev_last_row)
-        self._horizontal_connection_last_cells(last_row)
-        for cell in last_row:
-            cell.t_border = False
+        if height > 1:
+            prev_row, row = row, self._next_row(row)
+            yield prev_row
+            self._unique_marked_cells(row, markers, sets)
+        if open_bottom:
+            self._horizontal_connection_cells(row, markers, sets, rng)
+            self._seam_connections_cells(row, markers, rng)
+        else:
+            self._horizontal_connection_last_cells(row, markers, sets)
+        yield row
+
+    @classmethod
+    def _next_row(cls, row: bytearray) -> bytearray:
+        """
+        Создание следующей строки лабиринта.
 
-        return maze
+        У ячеек новой строки есть все границы, кроме верхних под теми
+        ячейками строки row, у которых нет нижней границы.
+
+        :param row: Текущая строка.
+        :return: Новая строка.
+        """
+
+        return row.translate(cls._NEXT_ROW)
 
     @staticmethod
-    def _unique_marked_cells(row: List[Cell], prev_row: List[Cell]) -> None:
+    def _random_decisions(rng: random.Random, count: int) -> bytes:
+        """
+        Случайные решения "да/нет" для count ячеек одним вызовом
+        генератора случайных чисел.
+
+        :param rng: Генератор случайных чисел.
+        :param count: Количество решений.
+        :return: Строка из count байтов b'0' и b'1'.
+        """
+
+        return format(rng.getrandbits(count), f'0{count}b').encode('ascii')
+
+    @staticmethod
+    def _unique_marked_cells(row: bytearray, markers: List[int],
+                             sets: DisjointSet) -> None:
         """
         Маркировка строки row уникальными метками с учетом меток
         предыдущего ряда.
 
         :param row: Маркируемая строка.
-        :param prev_row: Предыдущая строка.
+        :param markers: Маркеры предыдущей строки. Заменяются на маркеры
+            текущей.
+        :param sets: Множества маркеров.
         """
 
-        # Копируем марки из ячеек предыдущей строки, где нет нижней границы.
-        for i in range(len(row)):
-            if not prev_row[i].b_border:
-                row[i].marker = prev_row[i].marker
+        # Отмечаем марки, которые переходят из предыдущего ряда - у ячеек,
+        # над которыми есть проход вниз.
+        width = len(row)
+        used = bytearray(width)
+        for i, borders in enumerate(row):
+            if not borders & T_BORDER:
+                used[markers[i]] = 1
+
+        # Остальным ячейкам присваиваем свободные марки, каждая из которых
+        # становится отдельным множеством.
+        unique_markers = [marker for marker in range(width)
+                          if not used[marker]]
+        for i, borders in enumerate(row):
+            if borders & T_BORDER:
+                marker = unique_markers.pop()
+                sets.reset(marker)
+                markers[i] = marker
+
+    @staticmethod
+    def _merge_cells(row: bytearray, markers: List[int],
+                     sets: DisjointSet, i: int) -> None:
+        """
+        Соединение ячейки i строки с ячейкой справа от нее.
 
-        # Генерируем уникальные марки с учетом тех, что уже есть.
-        unique_markers = list(
-            set(range(len(row)))
-                .difference(set([cell.marker for cell in prev_row
-                                 if cell.marker is not None]))
-        )
+        :param row: Обрабатываемая строка.
+        :param markers: Маркеры строки.
+        :param sets: Множества маркеров.
+        :param i: Индекс ячейки в строке.
+        """
 
-        # Присваиваем уникальные марки оставшимся пустым ячейкам (без марок).
-        for cell in row:
-            if cell.marker is None:
-                cell.marker = unique_markers.pop()
+        row[i] &= ~R_BORDER
+        row[i + 1] &= ~L_BORDER
+        # Объединяем множество ячейки справа с множеством текущей ячейки.
+        # Таким образом мы говорим, что эта ячейка соединена с множеством
+        # ячеек множества текущей ячейки.
+        sets.union(markers[i], markers[i + 1])
 
     @staticmethod
-    def _horizontal_connection_last_cells(row: List[Cell]) -> None:
+    def _normalize_markers(markers: List[int], sets: DisjointSet) -> None:
+        """
+        Замена маркеров строки на представителей их множеств.
+
+        :param markers: Маркеры строки.
+        :param sets: Множества маркеров.
+        """
+
+        find = sets.find
+        for i, marker in enumerate(markers):
+            markers[i] = find(marker)
+
+    @classmethod
+    def _horizontal_connection_last_cells(cls, row: bytearray,
+                                          markers: List[int],
+                                          sets: DisjointSet) -> None:
         """
         Горизонтальное соединение ячеек последнего ряда.
 
         Соединяем все ячейки из разных множеств.
 
         :param row: Обрабатываемая строка.
+        :param markers: Маркеры строки.
+        :param sets: Множества маркеров.
         """
 
+        find = sets.find
         for i in range(len(row) - 1):
             # Соединяем все ячейки из разных множеств.
-            current_cell = row[i]
-            next_cell = row[i + 1]
-            if current_cell.marker != next_cell.marker:
-                current_cell.r_border = False
-                next_cell.l_border = False
-                changed_marker = next_cell.marker
-                for cell in row:
-                    if cell.marker == changed_marker:
-                        cell.marker = current_cell.marker
-
-    @staticmethod
-    def _horizontal_connection_cells(row: List[Cell]) -> None:
+            if find(markers[i]) != find(markers[i + 1]):
+                cls._merge_cells(row, markers, sets, i)
+
+    @classmethod
+    def _horizontal_connection_cells(cls, row: bytearray,
+                                     markers: List[int],
+                                     sets: DisjointSet,
+                                     rng: random.Random) -> None:
         """
         Горизонтальное соединение ячеек n-ой строки случайным образом.
 
+        После соединения маркеры строки заменяются на представителей
+        их множеств.
+
         :param row: Обрабатываемая строка.
+        :param markers: Маркеры строки.
+        :param sets: Множества маркеров.
+        :param rng: Генератор случайных чисел.
         """
 
-        for i in range(len(row) - 1):
-            current_cell = row[i]
-            next_cell = row[i + 1]
+        # Решаем случайным образом сразу для всех пар соседних ячеек,
+        # соединять их или нет, и обходим только пары с решением "да".
+        decisions = cls._random_decisions(rng, len(row) - 1)
+        find = sets.find
+        i = decisions.find(b'1')
+        while i >= 0:
             # Соединяем ячейки только из разных множеств.
-            if current_cell.marker != next_cell.marker:
-                # Решаем случайным образом, соединять или нет.
-                connect_cells = bool(random.randint(0, 1))
-                if connect_cells:
-                    current_cell.r_border = False
-                    next_cell.l_border = False
-                    changed_marker = next_cell.marker
-                    # Если соединяем, то меняем марку у всех элементов строки
-                    # с маркой, которую заменяем, на марку текущего элемента.
-                    # Таким образом мы говорим, что эта ячейка (у которой за
-                    # меняем марку) соединена с множеством ячеек множества
-                    # текущей ячейки.
-                    for cell in row:
-                        if cell.marker == changed_marker:
-                            cell.marker = current_cell.marker
-
-    @staticmethod
-    def _vertical_connections_cells(row: List[Cell]) -> None:
+            if find(markers[i]) != find(markers[i + 1]):
+                cls._merge_cells(row, markers, sets, i)
+            i = decisions.find(b'1', i + 1)
+        cls._normalize_markers(markers, sets)
+
+    @classmethod
+    def _vertical_connections_cells(cls, row: bytearray, markers: List[int],
+                                    rng: random.Random) -> None:
         """
         Вертикальное соединение ячеек строки.
 
         Для каждого множества делаем хотя бы один проход виз, убирая
-        нижнюю границу.
+        нижнюю границу. Маркеры должны быть уже заменены на представителей
+        множеств.
+
+        :param row: Обрабатываемая строка.
+        :param markers: Маркеры строки.
+        :param rng: Генератор случайных чисел.
+        """
+
+        # Случайным образом решаем сразу для всех ячеек, делать "дыру" или
+        # нет, и убираем нижние границы одной операцией над всей строкой.
+        width = len(row)
+        decisions = cls._random_decisions(rng, width)
+        holes = int.from_bytes(decisions.translate(cls._HOLE_MASKS), 'big')
+        row[:] = (int.from_bytes(row, 'big') & holes).to_bytes(width, 'big')
+
+        # Отмечаем множества, у которых уже есть "дыра".
+        has_hole = bytearray(width)
+        i = decisions.find(b'1')
+        while i >= 0:
+            has_hole[markers[i]] = 1
+            i = decisions.find(b'1', i + 1)
+
+        # Если дыра вдруг не была сделана для множества, делаем
+        # сами одну дырочку.
+        cells: Dict[int, List[int]] = defaultdict(list)
+        for i, marker in enumerate(markers):
+            if not has_hole[marker]:
+                cells[marker].append(i)
+        for marker_cells in cells.values():
+            row[rng.choice(marker_cells)] &= ~B_BORDER
+
+    @staticmethod
+    def _seam_connections_cells(row: bytearray, markers: List[int],
+                                rng: random.Random) -> None:
+        """
+        Вертикальное соединение последней строки полосы с лабиринтом под
+        ней.
+
+        Каждое множество получает ровно один проход вниз, даже если его
+        ячейки в строке идут не подряд. Маркеры должны быть уже заменены
+        на представителей множеств.
 
         :param row: Обрабатываемая строка.
+        :param markers: Маркеры строки.
+        :param rng: Генератор случайных чисел.
         """
 
-        # Группировка ячеек по маркерам. Получаем итератор вида (mark: cells).
-        # Создаем для каждого множества ХОТЯ БЫ одну "дырку" снизу.
-        for _, grouper in groupby(row, key=lambda cell: cell.marker):
-            # Получаем ячейки.
-            cells: List[Cell] = list(grouper)
-            # Флаг нажен на случай, если случайным образом не была разрушена
-            # ни одна стенка снизу.
-            has_hole = False
-            for cell in cells:
-                # Случайным образом решаем, делать "дыру" или нет.
-                destroy_bottom_border = bool(random.randint(0, 1))
-                if destroy_bottom_border:
-                    cell.b_border = False
-                    has_hole = True
-            # Если дыра вдруг не была сделана для текущего множества, делаем
-            # сами одну дырочку.
-            if not has_hole:
-                random.choice(cells).b_border = False
+        cells: Dict[int, List[int]] = defaultdict(list)
+        for i, marker in enumerate(markers):
+            cells[marker].append(i)
+        for marker_cells in cells.values():
+            row[rng.choice(marker_cells)] &= ~B_BORDER
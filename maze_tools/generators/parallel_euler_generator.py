@@ -0,0 +1,206 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import (
+    List,
+    Optional,
+    Tuple,
+)
+
+from .base_generator import BaseGenerator
+from .euler_generator import EulerGenerator
+from .. import instrumentation
+from ..maze import Maze
+from ..cell import (
+    T_BORDER,
+    B_BORDER,
+)
+
+
+def _generate_band(memory_name: str, first_row: int, height: int,
+                   width: int, open_bottom: bool, seed: int) -> None:
+    """
+    Генерация полосы лабиринта в отдельном процессе.
+
+    Строки полосы записываются прямо в общую память.
+
+    :param memory_name: Имя блока общей памяти со стенами лабиринта.
+    :param first_row: Номер первой строки полосы в лабиринте.
+    :param height: Высота полосы.
+    :param width: Ширина лабиринта.
+    :param open_bottom: Полоса с открытым низом (все, кроме последней).
+    :param seed: Зерно генератора случайных чисел полосы.
+    """
+
+    generator = EulerGenerator(seed)
+    rows = generator.iter_band_rows(height, width) if open_bottom \
+        else generator.iter_rows(height, width)
+
+    memory = SharedMemory(name=memory_name)
+    try:
+        offset = first_row * width
+        for row in rows:
+            memory.buf[offset:offset + width] = row
+            offset += width
+    finally:
+        memory.close()
+
+
+class ParallelEulerGenerator(BaseGenerator):
+    """
+    Генератор лабиринта алгоритмом Эйлера на нескольких процессах.
+
+    Лабиринт делится на горизонтальные полосы, каждая генерируется
+    в отдельном процессе в общую память. Все полосы, кроме последней,
+    строятся с открытым низом (EulerGenerator.iter_band_rows): каждая их
+    компонента связности получает ровно один проход в полосу ниже. Последняя
+    полоса - обычный идеальный лабиринт, поэтому при сшивке снизу вверх
+    каждая компонента присоединяется к уже связному лабиринту одним
+    проходом, и результат остается идеальным лабиринтом.
+    """
+
+    def __init__(self, processes: Optional[int] = None,
+                 band_height: Optional[int] = None,
+                 seed: Optional[int] = None) -> None:
+        """
+        Инициализация генератора.
+
+        :param processes: Количество процессов. По умолчанию - количество
+            ядер процессора.
+        :param band_height: Высота полосы. По умолчанию лабиринт делится
+            поровну между процессами.
+        :param seed: Зерно генератора случайных чисел. При одинаковых seed,
+            размерах и разбиении на полосы лабиринт всегда одинаковый.
+        """
+
+        self.__MIN_WIDTH = 2
+        self.__MIN_HEIGHT = 2
+        self.__processes = processes or os.cpu_count() or 1
+        self.__band_height = band_height
+        self.__seed = seed
+
+    @property
+    def min_width(self) -> int:
+        return self.__MIN_WIDTH
+
+    @min_width.setter
+    def min_width(self, new_width: int) -> None:
+        self.__MIN_WIDTH = new_width
+
+    @property
+    def min_height(self) -> int:
+        return self.__MIN_HEIGHT
+
+    @min_height.setter
+    def min_height(self, new_height: int) -> None:
+        self.__MIN_HEIGHT = new_height
+
+    @property
+    def processes(self) -> int:
+        return self.__processes
+
+    @property
+    def seed(self) -> Optional[int]:
+        return self.__seed
+
+    @seed.setter
+    def seed(self, new_seed: Optional[int]) -> None:
+        self.__seed = new_seed
+
+    def generate(self, height: int, width: int) -> Maze:
+        """
+        Генерация лабиринта.
+
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :return: Объект лабиринта.
+        """
+
+        # Проверка параметров лабиринта.
+        if width < self.__MIN_WIDTH:
+            raise ValueError(f'Ширина лабиринта не может быть меньше '
+                             f'{self.__MIN_WIDTH}')
+        if height < self.__MIN_HEIGHT:
+            raise ValueError(f'Высота лабиринта не может быть меньше '
+                             f'{self.__MIN_HEIGHT}')
+
+        with instrumentation.StageTimer('ParallelEulerGenerator', 'generate',
+                                        height=height, width=width):
+            maze = self._generate(height, width)
+        instrumentation.emit('ParallelEulerGenerator', 'cells_generated',
+                             height * width)
+
+        return maze
+
+    def _generate(self, height: int, width: int) -> Maze:
+        """
+        Генерация лабиринта по полосам. Параметры уже проверены в generate.
+
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :return: Объект лабиринта.
+        """
+
+        bands = self._split_bands(height)
+        if len(bands) == 1:
+            return EulerGenerator(self.__seed).generate(height, width)
+
+        # Зерна полос берутся из генератора с общим зерном.
+        rng = random.Random(self.__seed)
+        seeds = [rng.getrandbits(64) for _ in bands]
+
+        memory = SharedMemory(create=True, size=height * width)
+        try:
+            with ProcessPoolExecutor(self.__processes) as executor:
+                futures = [
+                    executor.submit(
+                        _generate_band, memory.name, first_row, band_height,
+                        width, number < len(bands) - 1, seeds[number],
+                    )
+                    for number, (first_row, band_height) in enumerate(bands)
+                ]
+                for future in futures:
+                    future.result()
+            walls = bytearray(memory.buf[:height * width])
+        finally:
+            memory.close()
+            memory.unlink()
+
+        # Сшиваем полосы: проходы вниз из последней строки полосы
+        # открывают верхние границы первой строки следующей полосы.
+        for first_row, _ in bands[1:]:
+            offset = first_row * width
+            for i in range(offset - width, offset):
+                if not walls[i] & B_BORDER:
+                    walls[i + width] &= ~T_BORDER
+
+        return Maze(height, width, walls)
+
+    def _split_bands(self, height: int) -> List[Tuple[int, int]]:
+        """
+        Разбиение лабиринта на полосы.
+
+        :param height: Высота лабиринта.
+        :return: Список пар (первая строка, высота полосы). Последняя полоса
+            не ниже min_height, т.к. генерируется как обычный лабиринт.
+        """
+
+        band_height = self.__band_height
+        if band_height is None:
+            band_height = -(-height // self.__processes)
+        band_height = max(band_height, self.__MIN_HEIGHT)
+
+        bands = []
+        first_row = 0
+        while height - first_row > band_height:
+            bands.append((first_row, band_height))
+            first_row += band_height
+        last_height = height - first_row
+        if last_height < self.__MIN_HEIGHT and bands:
+            # Слишком низкая последняя полоса присоединяется к предыдущей.
+            first_row, previous_height = bands.pop()
+            last_height += previous_height
+        bands.append((first_row, last_height))
+
+        return bands
@@ -0,0 +1,59 @@
+import random
+from typing import Tuple
+
+from .base_bulk_generator import BaseBulkGenerator
+
+
+class SidewinderGenerator(BaseBulkGenerator):
+    """
+    Генератор лабиринта с помощью алгоритма Sidewinder.
+
+    Строка делится на случайные отрезки, соединенные проходами вправо,
+    и из каждого отрезка делается ровно один проход вверх. Первая строка
+    лабиринта - один сплошной коридор.
+
+    Отрезки и проходы вверх для целого блока строк находятся несколькими
+    операциями над битовыми полями, без цикла по ячейкам. Поэтому
+    проход вверх делает не случайная ячейка отрезка с равной
+    вероятностью, а последняя ячейка отрезка, для которой выпал
+    случайный бит, или первая ячейка, если бит не выпал ни разу.
+    """
+
+    def _carve_block(self, rng: random.Random, first_row: int, rows: int,
+                     width: int) -> Tuple[int, int]:
+        """
+        Случайные проходы ячеек блока строк.
+
+        :param rng: Генератор случайных чисел.
+        :param first_row: Индекс первой строки блока.
+        :param rows: Количество строк в блоке.
+        :param width: Ширина лабиринта.
+        :return: Битовые поля ячеек с проходом вверх и с проходом вправо.
+        """
+
+        count = rows * width
+        full = (1 << count) - 1
+        first_column = self._column_mask(rows, width, 0)
+        last_column = self._column_mask(rows, width, width - 1)
+
+        # Отмечаем последние ячейки отрезков. Последний столбец всегда
+        # заканчивает отрезок, остальные ячейки идут вправо.
+        ends = rng.getrandbits(count) | last_column
+        east = full ^ ends
+        # Отрезок начинается в первом столбце или после конца предыдущего.
+        starts = (ends >> 1) | first_column
+
+        # В каждом отрезке выбираем последнюю ячейку со случайным битом.
+        # Вычитание конца отрезка занимает единицу у ближайшего
+        # отмеченного бита не дальше начала отрезка, поэтому
+        # y & ~(y - ends) оставляет в каждом отрезке ровно этот бит.
+        marks = rng.getrandbits(count) | starts
+        north = marks & ~(marks - ends)
+
+        # Первая строка лабиринта - один коридор без проходов вверх.
+        if first_row == 0:
+            top_row = ((1 << width) - 1) << (count - width)
+            north &= ~top_row
+            east |= top_row & ~last_column
+
+        return north, east
@@ -0,0 +1,261 @@
+import json
+import threading
+import time
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+
+# Виды записей.
+TIMER = 'timer'
+COUNTER = 'counter'
+
+# Запись статистики. Для таймера value - время в секундах, для счетчика -
+# значение счетчика. labels - словарь с дополнительными метками
+# (например, размеры лабиринта).
+StatRecord = namedtuple(
+    'StatRecord',
+    ['component', 'name', 'kind', 'value', 'labels', 'timestamp'],
+)
+
+
+class BaseObserver(ABC):
+    """
+    Абстрактный класс наблюдателя за статистикой.
+
+    Методы наблюдателя вызываются в том потоке, где произошло событие.
+    """
+
+    @abstractmethod
+    def on_record(self, record: StatRecord) -> None:
+        pass
+
+
+class CallbackObserver(BaseObserver):
+    """
+    Наблюдатель, передающий каждую запись в функцию.
+    """
+
+    def __init__(self, callback: Callable[[StatRecord], Any]) -> None:
+        """
+        Инициализатор класса.
+
+        :param callback: Функция, которая получает каждую запись.
+        """
+
+        self.__callback = callback
+
+    @property
+    def callback(self) -> Callable[[StatRecord], Any]:
+        return self.__callback
+
+    def on_record(self, record: StatRecord) -> None:
+        self.__callback(record)
+
+
+class StatsCollector(BaseObserver):
+    """
+    Наблюдатель, собирающий записи в память для выгрузки.
+
+    Пример:
+        collector = StatsCollector()
+        with observing(collector):
+            EulerGenerator().generate(100, 100)
+        collector.dump(Path('stats.jsonl'))
+    """
+
+    def __init__(self) -> None:
+        self.__records: List[StatRecord] = []
+        self.__lock = threading.Lock()
+
+    @property
+    def records(self) -> List[StatRecord]:
+        with self.__lock:
+            return list(self.__records)
+
+    def on_record(self, record: StatRecord) -> None:
+        with self.__lock:
+            self.__records.append(record)
+
+    def clear(self) -> None:
+        """
+        Удаление собранных записей.
+        """
+
+        with self.__lock:
+            self.__records.clear()
+
+    def export(self) -> List[Dict[str, Any]]:
+        """
+        Выгрузка записей в виде словарей, готовых для JSON.
+
+        :return: Список словарей с полями StatRecord.
+        """
+
+        return [record._asdict() for record in self.records]
+
+    def summary(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """
+        Сводка по записям с одинаковыми компонентом и именем.
+
+        :return: Словарь (компонент, имя) -> количество записей, сумма,
+            минимум и максимум значений.
+        """
+
+        summary: Dict[Tuple[str, str], Dict[str, float]] = {}
+        for record in self.records:
+            key = (record.component, record.name)
+            item = summary.get(key)
+            if item is None:
+                summary[key] = {
+                    'count': 1,
+                    'total': record.value,
+                    'min': record.value,
+                    'max': record.value,
+                }
+            else:
+                item['count'] += 1
+                item['total'] += record.value
+                item['min'] = min(item['min'], record.value)
+                item['max'] = max(item['max'], record.value)
+
+        return summary
+
+    def dump(self, path_to_file: Path) -> None:
+        """
+        Дозапись записей в файл в формате JSON Lines - по объекту на строку.
+
+        :param path_to_file: Путь до файла.
+        """
+
+        with open(path_to_file, mode='a') as file:
+            for record in self.export():
+                file.write(json.dumps(record) + '\n')
+
+
+# Подписанные наблюдатели. Пока их нет, emit и StageTimer сразу возвращаются,
+# а компоненты не считают счетчики, для которых нужна отдельная работа, -
+# они проверяют enabled(). Кортеж заменяется целиком при подписке и
+# отписке, поэтому emit читает его без блокировки.
+_observers: Tuple[BaseObserver, ...] = ()
+_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    """
+    Проверка, есть ли подписанные наблюдатели.
+
+    :return: True, если статистику нужно собирать.
+    """
+
+    return bool(_observers)
+
+
+def subscribe(observer: BaseObserver) -> None:
+    """
+    Подписка наблюдателя на статистику.
+
+    :param observer: Наблюдатель.
+    """
+
+    global _observers
+    with _lock:
+        _observers = _observers + (observer,)
+
+
+def unsubscribe(observer: BaseObserver) -> None:
+    """
+    Отписка наблюдателя.
+
+    :param observer: Наблюдатель.
+    """
+
+    global _observers
+    with _lock:
+        _observers = tuple(item for item in _observers
+                           if item is not observer)
+
+
+@contextmanager
+def observing(observer: BaseObserver) -> Iterator[BaseObserver]:
+    """
+    Подписка наблюдателя на время блока with.
+
+    :param observer: Наблюдатель.
+    :return: Тот же наблюдатель.
+    """
+
+    subscribe(observer)
+    try:
+        yield observer
+    finally:
+        unsubscribe(observer)
+
+
+def emit(component: str, name: str, value: float, kind: str = COUNTER,
+         **labels: Any) -> None:
+    """
+    Отправка записи всем наблюдателям.
+
+    :param component: Компонент, например имя класса генератора.
+    :param name: Имя таймера или счетчика.
+    :param value: Значение.
+    :param kind: Вид записи: TIMER или COUNTER.
+    :param labels: Дополнительные метки записи.
+    """
+
+    observers = _observers
+    if not observers:
+        return
+    record = StatRecord(component, name, kind, value, labels, time.time())
+    for observer in observers:
+        observer.on_record(record)
+
+
+class StageTimer:
+    """
+    Таймер этапа для блока with.
+
+    Если при входе в блок нет наблюдателей, время не замеряется.
+    """
+
+    __slots__ = ('__component', '__name', '__labels', '__started')
+
+    def __init__(self, component: str, name: str, **labels: Any) -> None:
+        """
+        Инициализатор таймера.
+
+        :param component: Компонент, например имя класса генератора.
+        :param name: Имя этапа.
+        :param labels: Дополнительные метки записи.
+        """
+
+        self.__component = component
+        self.__name = name
+        self.__labels = labels
+        self.__started: Optional[float] = None
+
+    def __enter__(self) -> 'StageTimer':
+        if _observers:
+            self.__started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self.__started is not None:
+            emit(self.__component, self.__name,
+                 time.perf_counter() - self.__started, TIMER,
+                 **self.__labels)
+            self.__started = None
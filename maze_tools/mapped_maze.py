@@ -0,0 +1,168 @@
+import mmap
+import struct
+from pathlib import Path
+from typing import (
+    Iterable,
+    Optional,
+    Tuple,
+)
+
+from .maze import Maze
+from .cell import ALL_BORDERS
+
+
+class MappedMaze(Maze):
+    """
+    Лабиринт, сетка стен которого отображена в память из файла.
+
+    Стены хранятся в файле в том же виде, что и в Maze.walls (байт на
+    ячейку, строка за строкой), поэтому любая строка - это непрерывный
+    блок файла. Операционная система подгружает только те страницы,
+    к которым идет обращение, так что лабиринт может быть больше
+    оперативной памяти. Все резолверы и конвертеры работают с таким
+    лабиринтом так же, как с обычным, но вне памяти хранятся только
+    стены. Резолверы строят в памяти индекс смежности (Maze.adjacency)
+    и рабочие массивы поиска - по несколько байт на ячейку, поэтому для
+    решения лабиринта нужна память порядка его размера.
+
+    Формат файла: заголовок (сигнатура b'MZMM', версия, высота, ширина,
+    старт и финиш) в начале файла, стены - со смещения DATA_OFFSET.
+    """
+
+    MAGIC = b'MZMM'
+    VERSION = 1
+    # Смещение стен в файле. Кратно гранулярности mmap на всех платформах.
+    DATA_OFFSET = 65536
+
+    _HEADER = struct.Struct('<4sB3xQQqqqq')
+    # Размер блока при заполнении файла.
+    _CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, path_to_file: Path, writable: bool = False) -> None:
+        """
+        Открытие лабиринта из файла.
+
+        :param path_to_file: Путь до файла лабиринта.
+        :param writable: Открыть ли лабиринт для изменения. Изменения стен
+            сразу попадают в файл, старт и финиш - при flush или close.
+        """
+
+        self.__path_to_file = Path(path_to_file)
+        self.__writable = writable
+        self.__file = open(self.__path_to_file, 'r+b' if writable else 'rb')
+        try:
+            header = self.__file.read(self._HEADER.size)
+            if len(header) < self._HEADER.size:
+                raise ValueError('Файл слишком короткий для лабиринта')
+            (magic, version, height, width, start_row, start_column,
+             end_row, end_column) = self._HEADER.unpack(header)
+            if magic != self.MAGIC:
+                raise ValueError('Файл не является лабиринтом')
+            if version != self.VERSION:
+                raise ValueError(
+                    f'Неподдерживаемая версия формата: {version}')
+
+            self.__walls = mmap.mmap(
+                self.__file.fileno(),
+                height * width,
+                access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ,
+                offset=self.DATA_OFFSET,
+            )
+        except Exception:
+            self.__file.close()
+            raise
+
+        super().__init__(
+            height, width, self.__walls,
+            start=(start_row, start_column) if start_row >= 0 else None,
+            end=(end_row, end_column) if end_row >= 0 else None,
+        )
+
+    @classmethod
+    def create(cls, path_to_file: Path, height: int, width: int,
+               rows: Optional[Iterable[bytes]] = None) -> 'MappedMaze':
+        """
+        Создание файла лабиринта.
+
+        Строки пишутся в файл по одной, поэтому сюда можно передать
+        EulerGenerator.iter_rows и сгенерировать лабиринт, не держа его
+        в памяти.
+
+        :param path_to_file: Путь до файла лабиринта.
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :param rows: Строки лабиринта в формате Maze.walls. Если не переданы,
+            у всех ячеек будут все границы.
+        :return: Лабиринт, открытый для изменения.
+        """
+
+        if height <= 0 or width <= 0:
+            raise ValueError('Размеры лабиринта должны быть положительными')
+
+        with open(path_to_file, 'wb') as file:
+            header = cls._HEADER.pack(cls.MAGIC, cls.VERSION, height, width,
+                                      -1, -1, -1, -1)
+            file.write(header + bytes(cls.DATA_OFFSET - len(header)))
+            if rows is None:
+                rest = height * width
+                chunk = bytes([ALL_BORDERS]) * min(rest, cls._CHUNK_SIZE)
+                while rest > 0:
+                    file.write(chunk[:rest])
+                    rest -= len(chunk)
+            else:
+                count = 0
+                for row in rows:
+                    if len(row) != width:
+                        raise ValueError('Длина строки не совпадает '
+                                         'с шириной лабиринта')
+                    count += 1
+                    if count > height:
+                        raise ValueError('Строк больше, чем высота '
+                                         'лабиринта')
+                    file.write(row)
+                if count != height:
+                    raise ValueError('Строк меньше, чем высота лабиринта')
+
+        return cls(path_to_file, writable=True)
+
+    @property
+    def path_to_file(self) -> Path:
+        return self.__path_to_file
+
+    @property
+    def writable(self) -> bool:
+        return self.__writable
+
+    def flush(self) -> None:
+        """
+        Запись изменений стен, старта и финиша в файл.
+        """
+
+        if not self.__writable:
+            return
+        self.__walls.flush()
+        start: Tuple[int, int] = self.start if self.start is not None \
+            else (-1, -1)
+        end: Tuple[int, int] = self.end if self.end is not None else (-1, -1)
+        height, width = self.shape
+        self.__file.seek(0)
+        self.__file.write(self._HEADER.pack(self.MAGIC, self.VERSION,
+                                            height, width, *start, *end))
+        self.__file.flush()
+
+    def close(self) -> None:
+        """
+        Сохранение изменений и закрытие файла.
+        """
+
+        if self.__file.closed:
+            return
+        self.flush()
+        self.__walls.close()
+        self.__file.close()
+
+    def __enter__(self) -> 'MappedMaze':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,16 +1,97 @@
+import threading
+from array import array
+from mmap import mmap
 from typing import (
+    Any,
     Tuple,
     Optional,
     List,
+    Iterator,
+    Union,
 )
 from collections import namedtuple
 
-from .cell import Cell
+from .adjacency import AdjacencyIndex
+from .cell import (
+    Cell,
+    L_BORDER,
+    T_BORDER,
+    R_BORDER,
+    B_BORDER,
+    ALL_BORDERS,
+)
+
+
+# Буфер сетки стен: в памяти, отображенный из файла (см. MappedMaze) или
+# представление чужого буфера (см. Maze.from_buffer).
+WallsBuffer = Union[bytearray, mmap, memoryview]
+
+
+class _RowView:
+    """
+    Представление строки лабиринта в виде последовательности ячеек.
+    """
+
+    __slots__ = ('__maze', '__row')
+
+    def __init__(self, maze: 'Maze', row: int) -> None:
+        self.__maze = maze
+        self.__row = row
+
+    def __len__(self) -> int:
+        return self.__maze.shape[1]
+
+    def __getitem__(self, column: int) -> Cell:
+        width = self.__maze.shape[1]
+        if column < 0:
+            column += width
+        if not 0 <= column < width:
+            raise IndexError('Индекс столбца вне лабиринта')
+        return Cell(self.__maze, (self.__row, column))
+
+    def __iter__(self) -> Iterator[Cell]:
+        for column in range(self.__maze.shape[1]):
+            yield Cell(self.__maze, (self.__row, column))
+
+
+class _MapView:
+    """
+    Представление карты лабиринта в виде списка строк ячеек.
+
+    Нужен для совместимости с кодом, который работал с картой
+    как с List[List[Cell]].
+    """
+
+    __slots__ = ('__maze',)
+
+    def __init__(self, maze: 'Maze') -> None:
+        self.__maze = maze
+
+    def __len__(self) -> int:
+        return self.__maze.shape[0]
+
+    def __getitem__(self, row: int) -> _RowView:
+        height = self.__maze.shape[0]
+        if row < 0:
+            row += height
+        if not 0 <= row < height:
+            raise IndexError('Индекс строки вне лабиринта')
+        return _RowView(self.__maze, row)
+
+    def __iter__(self) -> Iterator[_RowView]:
+        for row in range(self.__maze.shape[0]):
+            yield _RowView(self.__maze, row)
 
 
 class Maze:
     """
     Класс лабиринта.
+
+    Стены лабиринта хранятся в плоском буфере (bytearray или отображенный
+    в память файл, см. MappedMaze): один байт на ячейку,
+    в котором битами L_BORDER, T_BORDER, R_BORDER и B_BORDER отмечены
+    границы. Общая стена двух соседних ячеек всегда изменяется
+    одновременно у обеих ячеек.
     """
 
     # Именованный кортеж для хранения координат соседних ячеек.
@@ -19,22 +100,73 @@ class Maze:
         ['left_cords', 'right_cords', 'top_cords', 'bottom_cords'],
     )
 
-    def __init__(self, map: List[List[Cell]],
+    def __init__(self, height: int, width: int,
+                 walls: Optional[WallsBuffer] = None,
                  start: Optional[Tuple[int, int]] = None,
                  end: Optional[Tuple[int, int]] = None) -> None:
         """
         Инициализатор лабиринта.
 
-        :param map: Карта лабиринта.
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :param walls: Сетка стен лабиринта. Если не передана, создается
+            лабиринт, в котором у всех ячеек есть все границы.
         :param start: Начало лабиринта - кортеж с индексами ячейки.
         :param end: Конец лабиринта - кортеж с индексами ячейки.
         """
 
-        self.__map = map
+        if height <= 0 or width <= 0:
+            raise ValueError('Размеры лабиринта должны быть положительными')
+        if walls is None:
+            walls = bytearray([ALL_BORDERS]) * (height * width)
+        elif len(walls) != height * width:
+            raise ValueError('Размер сетки стен не совпадает '
+                             'с размерами лабиринта')
+
+        self.__height = height
+        self.__width = width
+        self.__walls = walls
         self.__start = start
         self.__end = end
         self.__resolve: List[Tuple[int, int]] = []
 
+        # Версия стен увеличивается при каждом их изменении. Индекс
+        # смежности хранится вместе с версией стен, по которой он построен,
+        # одним кортежем, чтобы читатели не видели индекс от другой версии.
+        self.__walls_version = 0
+        self.__adjacency: Tuple[int, Optional[AdjacencyIndex]] = (-1, None)
+        self.__adjacency_lock = threading.Lock()
+
+    @classmethod
+    def from_buffer(cls, buffer: Any, height: int, width: int,
+                    start: Optional[Tuple[int, int]] = None,
+                    end: Optional[Tuple[int, int]] = None) -> 'Maze':
+        """
+        Создание лабиринта поверх существующего буфера без копирования.
+
+        Подходит любой непрерывный объект с протоколом буфера и элементами
+        по одному байту (bytes, bytearray, memoryview, array('B'), массив
+        NumPy с dtype uint8 и т.д.) в формате Maze.walls. Изменения стен
+        лабиринта сразу видны в буфере и наоборот (после записи в буфер
+        нужно вызвать invalidate_adjacency). Если буфер только для чтения,
+        изменить стены лабиринта нельзя.
+
+        :param buffer: Буфер сетки стен.
+        :param height: Высота лабиринта.
+        :param width: Ширина лабиринта.
+        :param start: Начало лабиринта - кортеж с индексами ячейки.
+        :param end: Конец лабиринта - кортеж с индексами ячейки.
+        :return: Объект лабиринта.
+        """
+
+        view = memoryview(buffer)
+        if view.itemsize != 1:
+            raise ValueError('Элемент буфера стен должен занимать один байт')
+        if not view.c_contiguous:
+            raise ValueError('Буфер стен должен быть непрерывным')
+
+        return cls(height, width, view.cast('B'), start=start, end=end)
+
     @property
     def resolve(self) -> List[Tuple[int, int]]:
         return self.__resolve
@@ -44,8 +176,122 @@ class Maze:
         self.__resolve = new_resolve
 
     @property
-    def map(self) -> List[List[Cell]]:
-        return self.__map
+    def walls(self) -> WallsBuffer:
+        """
+        Сетка стен лабиринта.
+
+        Байт ячейки (i, k) находится по индексу i * width + k.
+        """
+
+        return self.__walls
+
+    def walls_view(self) -> memoryview:
+        """
+        Представление сетки стен без копирования.
+
+        :return: Двумерный memoryview байтов размером (высота, ширина).
+            Для MappedMaze файл нельзя закрыть, пока есть представления.
+        """
+
+        return memoryview(self.__walls).cast('B', self.shape)
+
+    def resolve_view(self) -> memoryview:
+        """
+        Решение лабиринта в виде буфера.
+
+        Решение хранится списком координат, поэтому буфер создается за
+        один проход по решению, а не по всему лабиринту.
+
+        :return: memoryview целых чисел: пары (строка, столбец) подряд,
+            в порядке Maze.resolve.
+        """
+
+        size = self.__height * self.__width
+        cords = array('i' if size < 2 ** 31 else 'q')
+        for row, column in self.__resolve:
+            cords.append(row)
+            cords.append(column)
+
+        return memoryview(cords)
+
+    def __buffer__(self, flags: int) -> memoryview:
+        """
+        Протокол буфера (Python 3.12+): memoryview(maze) - это walls_view.
+        """
+
+        return self.walls_view()
+
+    def __array__(self, dtype: Any = None, copy: Optional[bool] = None) -> Any:
+        """
+        Преобразование в массив NumPy: numpy.asarray(maze) возвращает сетку
+        стен размером (высота, ширина) с dtype uint8 без копирования.
+
+        :param dtype: Тип элементов. Если отличается от uint8, данные
+            копируются.
+        :param copy: Копировать ли данные.
+        :return: Массив NumPy.
+        """
+
+        # NumPy вызывает этот метод сам, поэтому он уже установлен.
+        import numpy
+
+        result = numpy.asarray(self.walls_view())
+        if dtype is not None and numpy.dtype(dtype) != result.dtype:
+            return result.astype(dtype)
+        if copy:
+            return result.copy()
+
+        return result
+
+    @property
+    def walls_version(self) -> int:
+        """
+        Версия стен. Увеличивается при изменении стен через set_border
+        или вызове invalidate_adjacency.
+        """
+
+        return self.__walls_version
+
+    @property
+    def adjacency(self) -> AdjacencyIndex:
+        """
+        Индекс смежности ячеек.
+
+        Строится при первом обращении и перестраивается, если с момента
+        построения изменилась версия стен (walls_version). После записи
+        напрямую в буфер walls нужно вызвать invalidate_adjacency.
+        """
+
+        version, index = self.__adjacency
+        if index is not None and version == self.__walls_version:
+            return index
+
+        with self.__adjacency_lock:
+            # Пока ждали блокировку, индекс мог построить другой поток.
+            version = self.__walls_version
+            built_version, index = self.__adjacency
+            if index is None or built_version != version:
+                index = AdjacencyIndex(self.__height, self.__width,
+                                       self.__walls)
+                # Если стены изменились во время построения, версия уже
+                # другая, и индекс перестроится при следующем обращении.
+                self.__adjacency = (version, index)
+
+        return index
+
+    def invalidate_adjacency(self) -> None:
+        """
+        Сброс индекса смежности после изменения стен напрямую через буфер
+        walls (или буфер, переданный в from_buffer).
+        """
+
+        with self.__adjacency_lock:
+            self.__walls_version += 1
+            self.__adjacency = (-1, None)
+
+    @property
+    def map(self) -> _MapView:
+        return _MapView(self)
 
     @property
     def start(self) -> Optional[Tuple[int, int]]:
@@ -70,7 +316,75 @@ class Maze:
         :return: Возвращает размерность в виде Tuple[HEIGHT, WIDTH].
         """
 
-        return len(self.__map), len(self.__map[0])
+        return self.__height, self.__width
+
+    def cords_to_index(self, cords: Tuple[int, int]) -> int:
+        """
+        Перевод координат ячейки в индекс в сетке стен.
+
+        :param cords: Координаты ячейки.
+        :return: Индекс байта ячейки.
+        """
+
+        return cords[0] * self.__width + cords[1]
+
+    def index_to_cords(self, index: int) -> Tuple[int, int]:
+        """
+        Перевод индекса в сетке стен в координаты ячейки.
+
+        :param index: Индекс байта ячейки.
+        :return: Координаты ячейки.
+        """
+
+        return divmod(index, self.__width)
+
+    def has_border(self, cords: Tuple[int, int], border: int) -> bool:
+        """
+        Проверка наличия границы у ячейки.
+
+        :param cords: Координаты ячейки.
+        :param border: Флаг границы (L_BORDER, T_BORDER, R_BORDER, B_BORDER).
+        :return: True, если граница есть.
+        """
+
+        return bool(self.__walls[cords[0] * self.__width + cords[1]] & border)
+
+    def set_border(self, cords: Tuple[int, int], border: int,
+                   value: bool) -> None:
+        """
+        Установка или удаление границы ячейки.
+
+        Граница изменяется также и у соседней ячейки, с которой у текущей
+        эта граница общая.
+
+        :param cords: Координаты ячейки.
+        :param border: Флаг границы (L_BORDER, T_BORDER, R_BORDER, B_BORDER).
+        :param value: True - поставить границу, False - убрать.
+        """
+
+        walls = self.__walls
+        index = cords[0] * self.__width + cords[1]
+
+        # Находим соседнюю ячейку и ее границу, общую с текущей.
+        neighbour_index, neighbour_border = -1, 0
+        if border == L_BORDER and cords[1] > 0:
+            neighbour_index, neighbour_border = index - 1, R_BORDER
+        elif border == R_BORDER and cords[1] < self.__width - 1:
+            neighbour_index, neighbour_border = index + 1, L_BORDER
+        elif border == T_BORDER and cords[0] > 0:
+            neighbour_index, neighbour_border = index - self.__width, B_BORDER
+        elif border == B_BORDER and cords[0] < self.__height - 1:
+            neighbour_index, neighbour_border = index + self.__width, T_BORDER
+
+        if value:
+            walls[index] |= border
+            if neighbour_index >= 0:
+                walls[neighbour_index] |= neighbour_border
+        else:
+            walls[index] &= ~border
+            if neighbour_index >= 0:
+                walls[neighbour_index] &= ~neighbour_border
+        self.__walls_version += 1
 
     def get_adjacent_cells(self, current_cell: Tuple[int, int]) -> AdjacentCords:
         """
@@ -84,11 +398,11 @@ class Maze:
 
         if current_cell[1] > 0:
             left = (current_cell[0], current_cell[1] - 1)
-        if current_cell[1] < len(self.map[0]) - 1:
+        if current_cell[1] < self.__width - 1:
             right = (current_cell[0], current_cell[1] + 1)
         if current_cell[0] > 0:
             top = (current_cell[0] - 1, current_cell[1])
-        if current_cell[0] < len(self.map) - 1:
+        if current_cell[0] < self.__height - 1:
             bottom = (current_cell[0] + 1, current_cell[1])
 
         adjacent_cells = self.AdjacentCords(
@@ -105,7 +419,10 @@ class Maze:
         Перевод координат в объект ячейки.
 
         :param cords: Координаты ячейки.
-        :return: Объект ячейки.
+        :return: Представление ячейки.
         """
 
-        return self.map[cords[0]][cords[1]]
+        if not (0 <= cords[0] < self.__height
+                and 0 <= cords[1] < self.__width):
+            raise IndexError('Координаты вне лабиринта')
+        return Cell(self, cords)
@@ -1,185 +1,171 @@
+import heapq
+import threading
 from typing import (
     List,
+    Optional,
     Tuple,
 )
 
 from .base_resolver import BaseResolver
+from .scratch import (
+    ScratchPool,
+    SearchScratch,
+)
+from .. import instrumentation
 from ..maze import Maze
-from ..cell import Cell
 
 
 class AStarResolver(BaseResolver):
     """
     Резолвер лабиринтов с помощью алгоритма A*.
-    """
 
-    def __init__(self) -> None:
-        """Инициализатор класса"""
+    Открытый список - двоичная куча, закрытый список - массив меток
+    по индексам ячеек, расстояния от старта и лучшие предыдущие ячейки
+    хранятся в плоских массивах. Поэтому каждая ячейка обрабатывается
+    за O(log n).
 
-        # Открытый и закрытый списки.
-        # В открытом хранятся ячейки, доступные к переходу.
-        # В закрытом - пройденные ячейки, которые больше не участвуют
-        # в построении пути.
-        self.__open_list: List[Tuple[int, int]] = []
-        self.__closed_list: List[Cell] = []
+    Состояние поиска хранится не в лабиринте, а в рабочей памяти из пула,
+    поэтому один резолвер и один лабиринт можно использовать одновременно
+    из нескольких потоков.
+    """
 
-    def create_path(self, maze: Maze) -> List[Tuple[int, int]]:
+    def __init__(self, pool: Optional[ScratchPool] = None) -> None:
         """
-        Создание маршрута, который будет являться решение лабиринта.
+        Инициализатор класса.
 
-        :param maze: Объекта лабиринта.
-        :return: Список координат ячеек, которые входят в решение.
+        :param pool: Пул рабочей памяти. Если не передан, резолвер
+            создает собственный.
         """
 
-        result_path = []
-
-        # Делаем стартовую ячейку активной.
-        active_cords = maze.start
-        if active_cords is None:
-            raise ValueError('Не существуют стартовой ячейки')
-
-        # Выполняем алгоритм, пока активная ячейка не станет конечной.
-        while active_cords != maze.end:
-            current_cell = maze.cords_to_cell(active_cords)
-            self.__closed_list.append(current_cell)
-            # Составляем список доступных ячеек и считаем их вес.
-            near_cords = self._calc_near_cells(maze, active_cords)
-
-            # Если количество доступных ячеек, которых нет в закрытом списке,
-            # равно 0, значит, мы попали в тупик. В этом случае делаем
-            # акитвной ячейку предыдущую лучшую. Для нее будет то же самое,
-            # либо она выберет другую ячейку, который нет в закрытом списке.
-            if len(near_cords) == 0:
-                active_cords = current_cell.best_cords
-                continue
-
-            # Добавляем узлы в открытый список.
-            self.__open_list.extend(near_cords)
+        self.__pool = pool if pool is not None else ScratchPool()
+        # Статистика последнего поиска хранится отдельно для каждого потока.
+        self.__local = threading.local()
 
-            # Выбираем ячейку с наименьшим весом.
-            min_weight_cell_cords = min(
-                near_cords,
-                key=lambda cord: maze.cords_to_cell(cord).get_weight(),
-            )
+    @property
+    def pool(self) -> ScratchPool:
+        return self.__pool
 
-            # Делаем ячейку с наименьшим весом активным и идем дальше.
-            active_cords = min_weight_cell_cords
+    @property
+    def nodes_expanded(self) -> int:
+        """
+        Количество ячеек, раскрытых (перенесенных в закрытый список)
+        при последнем поиске в текущем потоке.
+        """
 
-        # В active_node находится финальная ячейка. Следуем обратно к первой
-        # ячейке по лучшим предыдущим нодам и добавляем их в результирующий
-        # список.
-        while active_cords != maze.start:
-            result_path.append(active_cords)
-            active_cords = maze.cords_to_cell(active_cords).best_cords
+        return getattr(self.__local, 'nodes_expanded', 0)
 
-        # Добавим сам старт в маршрут.
-        # Список будет содежрать ноды от конца до старта.
-        # Каждая нода имеет ссылку на предыдущую "лучшую" ноду, которая
-        # приближает от конца к старту (или наоборот).
-        result_path.append(maze.start)
+    def find_path(self, maze: Maze, start: Tuple[int, int],
+                  end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Создание маршрута между двумя ячейками лабиринта.
 
-        # Очистим списки.
-        self.__open_list.clear()
-        self.__closed_list.clear()
+        :param maze: Объекта лабиринта.
+        :param start: Координаты начальной ячейки.
+        :param end: Координаты конечной ячейки.
+        :return: Список координат ячеек, которые входят в решение,
+            от конечной ячейки к начальной.
+        """
 
-        return result_path
+        height, width = maze.shape
+        size = height * width
+        with self.__pool.scratch(size) as scratch:
+            return self._search(maze, start, end, scratch)
 
-    def _calc_near_cells(
-            self,
-            maze: Maze,
-            current_cords: Tuple[int, int],
-    ) -> List[Tuple[int, int]]:
+    def _search(self, maze: Maze, start: Tuple[int, int],
+                end: Tuple[int, int],
+                scratch: SearchScratch) -> List[Tuple[int, int]]:
         """
-        Вычисление координат доступных соседних ячеек.
+        Поиск пути алгоритмом A* в заданной рабочей памяти.
 
-        :param maze: Объект лабиринта.
-        :param current_cords: Координаты текущей ячейки.
-        :return: Список координат доступных сосдених ячеек.
+        :param maze: Объекта лабиринта.
+        :param start: Координаты начальной ячейки.
+        :param end: Координаты конечной ячейки.
+        :param scratch: Рабочая память поиска.
+        :return: Список координат ячеек от конечной к начальной.
         """
 
-        near_nodes = []
-
-        # Текущая и все соседние ячейки.
-        current_cell = maze.cords_to_cell(current_cords)
-        adj_cords = maze.get_adjacent_cells(current_cords)
-
-        # Берем ячейки, которые доступны из текущей.
-        left_cords = adj_cords.left_cords \
-            if not current_cell.l_border else None
-        right_cords = adj_cords.right_cords \
-            if not current_cell.r_border else None
-        top_cords = adj_cords.top_cords \
-            if not current_cell.t_border else None
-        bottom_cords = adj_cords.bottom_cords \
-            if not current_cell.b_border else None
-
-        # У соседних ячеек могут быть свои стенки, поэтому добавляем координаты
-        # только тех ячеек, у которых стенок между ней и текущей ячейкой нет.
-        # Также эта ячейка не должна быть в закрытом списке.
-        if left_cords is not None:
-            left_cell = maze.cords_to_cell(left_cords)
-            if not left_cell.r_border and left_cell not in self.__closed_list:
-                # Считаем эврестическое расстояние до финиша лабиринта.
-                new_heuristic = self._get_manhattan_range(
-                    left_cords,
-                    maze.end,
-                )
-                # Считаем расстояние от элемента, из которого мы можем
-                # попасть в текущий.
-                new_range = current_cell.range + 1
-                # Если новое расстояние ячейки не посчитано - считаем.
-                # Или если расстояние ячейки посчитано и оно больше,
-                # чем новое - обновляем значения и лучшую ячейку.
-                if left_cell.get_weight() < 0 or left_cell.range > new_range:
-                    left_cell.range = new_range
-                    left_cell.heuristic = new_heuristic
-                    left_cell.best_cords = current_cords
-                near_nodes.append(left_cords)
-
-        if right_cords is not None:
-            right_cell = maze.cords_to_cell(right_cords)
-            if not right_cell.l_border and right_cell not in self.__closed_list:
-                # Считаем эврестическое расстояние до финиша лабиринта.
-                new_heuristic = self._get_manhattan_range(
-                    right_cords,
-                    maze.end,
-                )
-                new_range = current_cell.range + 1
-                if right_cell.get_weight() < 0 or right_cell.range > new_range:
-                    right_cell.range = new_range
-                    right_cell.heuristic = new_heuristic
-                    right_cell.best_cords = current_cords
-                near_nodes.append(right_cords)
-
-        if top_cords is not None:
-            top_cell = maze.cords_to_cell(top_cords)
-            if not top_cell.b_border and top_cell not in self.__closed_list:
-                new_heuristic = self._get_manhattan_range(
-                    top_cords,
-                    maze.end,
-                )
-                new_range = current_cell.range + 1
-                if top_cell.get_weight() < 0 or top_cell.range > new_range:
-                    top_cell.range = new_range
-                    top_cell.heuristic = new_heuristic
-                    top_cell.best_cords = current_cords
-                near_nodes.append(top_cords)
-
-        if bottom_cords is not None:
-            bottom_cell = maze.cords_to_cell(bottom_cords)
-            if not bottom_cell.t_border and bottom_cell not in self.__closed_list:
-                new_heuristic = self._get_manhattan_range(
-                    bottom_cords,
-                    maze.end,
-                )
-                new_range = current_cell.range + 1
-                if bottom_cell.get_weight() < 0 or bottom_cell.range > new_range:
-                    bottom_cell.range = new_range
-                    bottom_cell.heuristic = new_heuristic
-                    bottom_cell.best_cords = current_cords
-                near_nodes.append(bottom_cords)
-
-        return near_nodes
+        width = maze.shape[1]
+        # Соседи ячеек из индекса смежности лабиринта: стены и края
+        # лабиринта в нем уже учтены.
+        adjacency = maze.adjacency
+        offsets = adjacency.offsets
+        neighbours = adjacency.neighbours
+        start_index = maze.cords_to_index(start)
+        end_index = maze.cords_to_index(end)
+        end_row, end_column = end
+
+        # Ячейка просмотрена, если в seen записана метка текущего поиска,
+        # и закрыта, если метка записана в closed.
+        stamp = scratch.begin()
+        seen = scratch.seen
+        closed = scratch.closed
+        ranges = scratch.ranges
+        best_indexes = scratch.best_indexes
+        open_list = scratch.open_list
+
+        # В открытом списке хранятся кортежи (вес, эвристика, индекс).
+        # При равном весе выбирается ячейка, которая ближе к финишу.
+        heuristic = self._get_manhattan_range(start, end)
+        open_list.append((heuristic, heuristic, start_index))
+        seen[start_index] = stamp
+        ranges[start_index] = 0
+        nodes_expanded = 0
+
+        while open_list:
+            _, _, index = heapq.heappop(open_list)
+            # В куче могут остаться устаревшие записи уже закрытых ячеек.
+            if closed[index] == stamp:
+                continue
+            if index == end_index:
+                break
+            closed[index] = stamp
+            nodes_expanded += 1
+
+            new_range = ranges[index] + 1
+
+            # Берем ячейки, которые доступны из текущей.
+            for position in range(offsets[index], offsets[index + 1]):
+                near_index = neighbours[position]
+                if closed[near_index] == stamp:
+                    continue
+                # Если расстояние ячейки не посчитано или новое расстояние
+                # меньше - обновляем его и лучшую ячейку.
+                if seen[near_index] != stamp \
+                        or new_range < ranges[near_index]:
+                    seen[near_index] = stamp
+                    ranges[near_index] = new_range
+                    best_indexes[near_index] = index
+                    near_row, near_column = divmod(near_index, width)
+                    heuristic = abs(end_row - near_row) \
+                        + abs(end_column - near_column)
+                    heapq.heappush(
+                        open_list,
+                        (new_range + heuristic, heuristic, near_index),
+                    )
+        else:
+            self.__local.nodes_expanded = nodes_expanded
+            raise ValueError('Не существует пути от старта до финиша')
+
+        self.__local.nodes_expanded = nodes_expanded
+
+        # Следуем от финальной ячейки обратно к первой по лучшим предыдущим
+        # ячейкам и добавляем их в результирующий список.
+        result_path = []
+        index = end_index
+        while index != start_index:
+            result_path.append(divmod(index, width))
+            index = best_indexes[index]
+        result_path.append(start)
+
+        if instrumentation.enabled():
+            instrumentation.emit('AStarResolver', 'nodes_expanded',
+                                 nodes_expanded)
+            # Все ячейки пути, кроме финиша, раскрыты. Остальные раскрытые
+            # ячейки лежат в тупиковых ветках, из которых поиск вернулся.
+            instrumentation.emit('AStarResolver', 'backtracks',
+                                 nodes_expanded - len(result_path) + 1)
+
+        return result_path
 
     @staticmethod
     def _get_manhattan_range(
@@ -200,5 +186,3 @@ class AStarResolver(BaseResolver):
         result_range = horizontal_range + vertical_range
 
         return result_range
-
-
@@ -7,14 +7,37 @@ from abc import (
     abstractmethod,
 )
 
+from .. import instrumentation
 from ..maze import Maze
 
 
 class BaseResolver(ABC):
     """
     Абстрактный класс резолвера лабиринтов.
+
+    Резолвер не должен изменять лабиринт при поиске пути, чтобы один
+    лабиринт можно было решать одновременно из нескольких потоков.
     """
 
-    @abstractmethod
     def create_path(self, maze: Maze) -> List[Tuple[int, int]]:
+        """
+        Создание маршрута от maze.start до maze.end.
+
+        :param maze: Объект лабиринта.
+        :return: Список координат ячеек, которые входят в решение.
+        """
+
+        if maze.start is None:
+            raise ValueError('Не существуют стартовой ячейки')
+        if maze.end is None:
+            raise ValueError('Не существуют конечной ячейки')
+
+        height, width = maze.shape
+        with instrumentation.StageTimer(type(self).__name__, 'find_path',
+                                        height=height, width=width):
+            return self.find_path(maze, maze.start, maze.end)
+
+    @abstractmethod
+    def find_path(self, maze: Maze, start: Tuple[int, int],
+                  end: Tuple[int, int]) -> List[Tuple[int, int]]:
         pass
@@ -0,0 +1,225 @@
+from collections import deque
+from typing import (
+    Iterable,
+    List,
+    Tuple,
+)
+
+from .base_resolver import BaseResolver
+from .. import instrumentation
+from ..maze import Maze
+from ..cell import (
+    L_BORDER,
+    T_BORDER,
+    R_BORDER,
+    B_BORDER,
+)
+
+
+# Граница соседней ячейки, общая с границей текущей ячейки.
+_BACK_BORDERS = {
+    L_BORDER: R_BORDER,
+    R_BORDER: L_BORDER,
+    T_BORDER: B_BORDER,
+    B_BORDER: T_BORDER,
+}
+
+
+class DeadEndResolver(BaseResolver):
+    """
+    Резолвер заполнением тупиков.
+
+    Ячейка с единственным проходом, кроме начала и конца, не может лежать
+    на маршруте, поэтому она заполняется (закрывается), а у соседней ячейки
+    пропадает проход к ней. Тупики заполняются, пока они есть. В идеальном
+    лабиринте после этого остаются только ячейки маршрута, в лабиринте
+    с циклами - маршрут и циклы, и путь по оставшимся ячейкам находится
+    обходом в ширину.
+
+    Пока тупиков много, они заполняются проходами сразу по всей сетке:
+    для каждой ячейки хранятся открытые направления (байт на ячейку,
+    начальные берутся из Maze.adjacency), тупики находятся через
+    bytes.translate, а проходы соседей закрываются побитовыми операциями
+    над всей сеткой как над одним целым числом.
+    Когда за проход заполняется меньше 1/FALLBACK_RATIO ячеек сетки,
+    оставшиеся тупики заполняются очередью, по одной ячейке.
+
+    Стоимость не зависит от эвристики и положения начала и конца. Через
+    fill_dead_ends можно получить сразу все проходы между несколькими
+    ячейками.
+    """
+
+    # Когда проход по сетке заполняет меньше size // FALLBACK_RATIO ячеек,
+    # выгоднее заполнять тупики очередью.
+    FALLBACK_RATIO = 64
+
+    # Таблицы для bytes.translate. Открытые направления -> единственное
+    # направление тупика или 0.
+    _DEAD_END_TABLE = bytes(opened if opened in _BACK_BORDERS else 0
+                            for opened in range(256))
+    # Направление тупика -> проход соседа, который нужно закрыть.
+    _NEAR_TABLES = {
+        border: bytes(back if opened == border else 0
+                      for opened in range(256))
+        for border, back in _BACK_BORDERS.items()
+    }
+    # Ненулевой байт -> 1.
+    _MARK_TABLE = bytes([0]) + bytes([1]) * 255
+
+    def find_path(self, maze: Maze, start: Tuple[int, int],
+                  end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Создание маршрута между двумя ячейками лабиринта.
+
+        :param maze: Объект лабиринта.
+        :param start: Координаты начальной ячейки.
+        :param end: Координаты конечной ячейки.
+        :return: Список координат ячеек от конечной к начальной.
+        """
+
+        width = maze.shape[1]
+        start_index = self._to_index(maze, start)
+        end_index = self._to_index(maze, end)
+        opened = self.fill_dead_ends(maze, (start, end))
+
+        # Обход в ширину по оставшимся ячейкам от начала. В идеальном
+        # лабиринте это просто проход по маршруту.
+        steps = (
+            (L_BORDER, -1),
+            (R_BORDER, 1),
+            (T_BORDER, -width),
+            (B_BORDER, width),
+        )
+        previous = {start_index: -1}
+        queue = deque([start_index])
+        while queue and end_index not in previous:
+            index = queue.popleft()
+            borders = opened[index]
+            for border, step in steps:
+                if borders & border and index + step not in previous:
+                    previous[index + step] = index
+                    queue.append(index + step)
+
+        if end_index not in previous:
+            raise ValueError('Не существует пути от старта до финиша')
+
+        result_path = []
+        index = end_index
+        while index >= 0:
+            result_path.append(divmod(index, width))
+            index = previous[index]
+
+        return result_path
+
+    def fill_dead_ends(self, maze: Maze,
+                       keep: Iterable[Tuple[int, int]]) -> bytearray:
+        """
+        Заполнение тупиков лабиринта.
+
+        :param maze: Объект лабиринта. Не изменяется.
+        :param keep: Координаты ячеек, которые не заполняются, даже если
+            они тупики (начала и концы маршрутов).
+        :return: Открытые направления ячеек (биты L_BORDER, T_BORDER,
+            R_BORDER и B_BORDER) после заполнения, по байту на ячейку.
+            У заполненных ячеек - 0. Незаполненные ячейки - это все
+            маршруты между ячейками keep и циклы.
+        """
+
+        height, width = maze.shape
+        size = height * width
+        kept = {self._to_index(maze, cords) for cords in keep}
+
+        opened = maze.adjacency.opened
+        passes = 0
+        filled = 0
+        while True:
+            dead_ends = bytearray(opened.translate(self._DEAD_END_TABLE))
+            for index in kept:
+                dead_ends[index] = 0
+            count = size - dead_ends.count(0)
+            if not count:
+                break
+            if count < size // self.FALLBACK_RATIO:
+                opened = bytearray(opened)
+                filled += self._fill_queue(opened, dead_ends, kept, width)
+                break
+
+            passes += 1
+            filled += count
+            # Тупики закрываются целиком. У соседа слева - ячейки на байт
+            # раньше, то есть старше в числе, - закрывается проход вправо,
+            # и так далее.
+            closed = int.from_bytes(dead_ends, 'big')
+            for border, shift in ((L_BORDER, 8), (R_BORDER, -8),
+                                  (T_BORDER, 8 * width),
+                                  (B_BORDER, -8 * width)):
+                near = int.from_bytes(
+                    dead_ends.translate(self._NEAR_TABLES[border]), 'big')
+                closed |= near << shift if shift > 0 else near >> -shift
+            opened = (int.from_bytes(opened, 'big') & ~closed) \
+                .to_bytes(size, 'big')
+
+        if instrumentation.enabled():
+            instrumentation.emit('DeadEndResolver', 'fill_passes', passes)
+            instrumentation.emit('DeadEndResolver', 'cells_filled', filled)
+
+        return bytearray(opened)
+
+    def _fill_queue(self, opened: bytearray, dead_ends: bytearray,
+                    kept: set, width: int) -> int:
+        """
+        Заполнение тупиков очередью.
+
+        :param opened: Открытые направления ячеек. Изменяется на месте.
+        :param dead_ends: Направления тупиков по ячейкам (0 - не тупик).
+        :param kept: Индексы ячеек, которые не заполняются.
+        :param width: Ширина лабиринта.
+        :return: Количество заполненных ячеек.
+        """
+
+        steps = {
+            L_BORDER: -1,
+            R_BORDER: 1,
+            T_BORDER: -width,
+            B_BORDER: width,
+        }
+        dead_end_table = self._DEAD_END_TABLE
+
+        queue = deque()
+        marks = dead_ends.translate(self._MARK_TABLE)
+        index = marks.find(1)
+        while index >= 0:
+            queue.append(index)
+            index = marks.find(1, index + 1)
+
+        filled = 0
+        while queue:
+            index = queue.popleft()
+            # Проход мог закрыться, если соседний тупик уже заполнен.
+            border = dead_end_table[opened[index]]
+            if not border:
+                continue
+            opened[index] = 0
+            filled += 1
+            near_index = index + steps[border]
+            opened[near_index] &= ~_BACK_BORDERS[border]
+            if dead_end_table[opened[near_index]] and near_index not in kept:
+                queue.append(near_index)
+
+        return filled
+
+    @staticmethod
+    def _to_index(maze: Maze, cords: Tuple[int, int]) -> int:
+        """
+        Перевод координат ячейки в индекс с проверкой границ.
+
+        :param maze: Объект лабиринта.
+        :param cords: Координаты ячейки.
+        :return: Индекс ячейки.
+        """
+
+        height, width = maze.shape
+        if not (0 <= cords[0] < height and 0 <= cords[1] < width):
+            raise IndexError('Координаты вне лабиринта')
+
+        return maze.cords_to_index(cords)
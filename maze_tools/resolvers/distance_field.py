@@ -0,0 +1,164 @@
+from array import array
+from collections import deque
+from typing import (
+    List,
+    Optional,
+    Tuple,
+)
+
+from ..maze import Maze
+from ..cell import (
+    L_BORDER,
+    T_BORDER,
+    R_BORDER,
+    B_BORDER,
+)
+
+
+class DistanceField:
+    """
+    Поле расстояний и направлений до выхода лабиринта.
+
+    Строится одним обходом в ширину от выхода. Для каждой ячейки хранится
+    расстояние до выхода и граница (L_BORDER, T_BORDER, R_BORDER или
+    B_BORDER), через которую нужно пройти, чтобы приблизиться к выходу.
+    После построения следующий шаг и расстояние из любой ячейки
+    вычисляются за O(1).
+
+    Поле строится по состоянию стен на момент создания.
+    """
+
+    def __init__(self, maze: Maze, end: Tuple[int, int]) -> None:
+        """
+        Построение поля.
+
+        :param maze: Объект лабиринта.
+        :param end: Координаты выхода.
+        """
+
+        height, width = maze.shape
+        size = height * width
+        # Открытые направления ячеек: стены и края лабиринта уже учтены.
+        opened = maze.adjacency.opened
+
+        self.__end = end
+        self.__width = width
+        # Расстояние до выхода (-1 - выход недостижим) и направление шага.
+        self.__distances = array('i' if size < 2 ** 31 else 'q', [-1]) * size
+        self.__directions = bytearray(size)
+
+        distances = self.__distances
+        directions = self.__directions
+        end_index = maze.cords_to_index(end)
+        distances[end_index] = 0
+        queue = deque([end_index])
+        # Для соседней ячейки шаг к выходу - это граница, обратная той,
+        # через которую мы в нее пришли.
+        steps = (
+            (L_BORDER, R_BORDER, -1),
+            (R_BORDER, L_BORDER, 1),
+            (T_BORDER, B_BORDER, -width),
+            (B_BORDER, T_BORDER, width),
+        )
+        while queue:
+            index = queue.popleft()
+            borders = opened[index]
+            near_distance = distances[index] + 1
+            for border, back_border, step in steps:
+                near_index = index + step
+                if not borders & border or distances[near_index] >= 0:
+                    continue
+                distances[near_index] = near_distance
+                directions[near_index] = back_border
+                queue.append(near_index)
+
+    @property
+    def end(self) -> Tuple[int, int]:
+        return self.__end
+
+    @property
+    def distances(self) -> array:
+        """Расстояния до выхода по индексам ячеек (-1 - недостижима)."""
+
+        return self.__distances
+
+    @property
+    def directions(self) -> bytearray:
+        """Граница, через которую ведет шаг к выходу (0 - шага нет)."""
+
+        return self.__directions
+
+    def distance(self, cords: Tuple[int, int]) -> int:
+        """
+        Расстояние от ячейки до выхода в количестве переходов.
+
+        :param cords: Координаты ячейки.
+        :return: Расстояние или -1, если выход недостижим.
+        """
+
+        return self.__distances[self._to_index(cords)]
+
+    def next_step(self, cords: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """
+        Следующая ячейка на пути к выходу.
+
+        :param cords: Координаты текущей ячейки.
+        :return: Координаты следующей ячейки или None, если текущая
+            ячейка - выход или выход из нее недостижим.
+        """
+
+        direction = self.__directions[self._to_index(cords)]
+        if direction == L_BORDER:
+            return cords[0], cords[1] - 1
+        if direction == R_BORDER:
+            return cords[0], cords[1] + 1
+        if direction == T_BORDER:
+            return cords[0] - 1, cords[1]
+        if direction == B_BORDER:
+            return cords[0] + 1, cords[1]
+
+        return None
+
+    def path(self, start: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Маршрут от ячейки до выхода.
+
+        :param start: Координаты начальной ячейки.
+        :return: Список координат ячеек от выхода к начальной ячейке.
+        """
+
+        width = self.__width
+        index = self._to_index(start)
+        if self.__distances[index] < 0:
+            raise ValueError('Не существует пути от старта до финиша')
+
+        # Шаг через границу - это смещение индекса ячейки.
+        steps = {
+            L_BORDER: -1,
+            R_BORDER: 1,
+            T_BORDER: -width,
+            B_BORDER: width,
+        }
+        directions = self.__directions
+        result_path = [start]
+        while directions[index]:
+            index += steps[directions[index]]
+            result_path.append(divmod(index, width))
+        result_path.reverse()
+
+        return result_path
+
+    def _to_index(self, cords: Tuple[int, int]) -> int:
+        """
+        Перевод координат ячейки в индекс с проверкой границ.
+
+        :param cords: Координаты ячейки.
+        :return: Индекс ячейки.
+        """
+
+        index = cords[0] * self.__width + cords[1]
+        if not (0 <= cords[1] < self.__width
+                and 0 <= index < len(self.__directions)):
+            raise IndexError('Координаты вне лабиринта')
+
+        return index
@@ -0,0 +1,146 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import (
+    List,
+    Optional,
+    Tuple,
+)
+
+from .base_resolver import BaseResolver
+from .distance_field import DistanceField
+from ..maze import Maze
+
+
+class FieldResolver(BaseResolver):
+    """
+    Резолвер через поле расстояний до выхода.
+
+    Поле строится один раз для каждой пары (лабиринт, выход), после чего
+    маршрут из любой ячейки к этому выходу восстанавливается за время,
+    пропорциональное его длине. Подходит для случая, когда многие запросы
+    идут к одному и тому же выходу. Для каждого лабиринта хранится
+    не больше max_fields последних использованных полей. После изменения
+    стен (Maze.walls_version) поле строится заново.
+    """
+
+    def __init__(self, max_fields: int = 8) -> None:
+        """
+        Инициализатор класса.
+
+        :param max_fields: Наибольшее количество полей одного лабиринта
+            в кэше. Каждое поле занимает память по размеру лабиринта,
+            поэтому при переполнении удаляется давно не использованное.
+        """
+
+        if max_fields <= 0:
+            raise ValueError('Размер кэша полей должен быть положительным')
+
+        # Поля лабиринтов по выходам в порядке использования, вместе
+        # с версией стен, по которой они построены:
+        # {лабиринт: OrderedDict{выход: (версия, поле)}}. Удаляются вместе
+        # с лабиринтом.
+        self.__fields: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.__max_fields = max_fields
+        # Увеличивается при invalidate, чтобы не сохранить поле, которое
+        # строилось до сброса.
+        self.__generation = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def max_fields(self) -> int:
+        return self.__max_fields
+
+    def get_field(self, maze: Maze,
+                  end: Optional[Tuple[int, int]] = None) -> DistanceField:
+        """
+        Получение поля лабиринта. Строится при первом обращении
+        и после изменения стен.
+
+        Поле строится без блокировки, поэтому потоки, которым нужны
+        разные поля, не ждут друг друга. Если то же поле одновременно
+        построил другой поток, возвращается уже сохраненное.
+
+        :param maze: Объект лабиринта.
+        :param end: Координаты выхода. По умолчанию - maze.end.
+        :return: Поле расстояний до выхода.
+        """
+
+        if end is None:
+            end = maze.end
+        if end is None:
+            raise ValueError('Не существуют конечной ячейки')
+
+        version = maze.walls_version
+        with self.__lock:
+            fields = self.__fields.get(maze)
+            cached = fields.get(end) if fields is not None else None
+            if cached is not None and cached[0] == version:
+                fields.move_to_end(end)
+                return cached[1]
+            generation = self.__generation
+
+        field = DistanceField(maze, end)
+
+        with self.__lock:
+            if generation != self.__generation:
+                return field
+            fields = self.__fields.setdefault(maze, OrderedDict())
+            cached = fields.get(end)
+            if cached is not None and cached[0] >= version:
+                # Поле этой или более новой версии стен уже сохранено.
+                fields.move_to_end(end)
+                return cached[1] if cached[0] == version else field
+            fields[end] = (version, field)
+            fields.move_to_end(end)
+            if len(fields) > self.__max_fields:
+                fields.popitem(last=False)
+
+        return field
+
+    def invalidate(self, maze: Maze) -> None:
+        """
+        Удаление всех полей лабиринта, например, после изменения его стен.
+
+        :param maze: Объект лабиринта.
+        """
+
+        with self.__lock:
+            self.__generation += 1
+            self.__fields.pop(maze, None)
+
+    def find_path(self, maze: Maze, start: Tuple[int, int],
+                  end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Создание маршрута между двумя ячейками лабиринта.
+
+        :param maze: Объект лабиринта.
+        :param start: Координаты начальной ячейки.
+        :param end: Координаты конечной ячейки.
+        :return: Список координат ячеек от конечной к начальной.
+        """
+
+        return self.get_field(maze, end).path(start)
+
+    def next_step(self, maze: Maze,
+                  cords: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """
+        Следующая ячейка на пути к maze.end.
+
+        :param maze: Объект лабиринта.
+        :param cords: Координаты текущей ячейки.
+        :return: Координаты следующей ячейки или None.
+        """
+
+        return self.get_field(maze).next_step(cords)
+
+    def distance_to_exit(self, maze: Maze, cords: Tuple[int, int]) -> int:
+        """
+        Расстояние от ячейки до maze.end.
+
+        :param maze: Объект лабиринта.
+        :param cords: Координаты ячейки.
+        :return: Количество переходов или -1, если выход недостижим.
+        """
+
+        return self.get_field(maze).distance(cords)
@@ -0,0 +1,476 @@
+import heapq
+import struct
+import sys
+from array import array
+from typing import (
+    Dict,
+    List,
+    Tuple,
+)
+
+from ..maze import Maze
+
+
+class JunctionGraph:
+    """
+    Граф развилок лабиринта.
+
+    Вершины графа - ячейки, из которых можно пройти не в две соседние
+    ячейки (тупики и развилки). Ребра - коридоры между ними: цепочки
+    ячеек ровно с двумя соседями. Вес ребра - количество переходов от
+    одной вершины до другой. Ячейки коридоров всех ребер хранятся подряд
+    в одном массиве, ячейки ребра e - это
+    cells[edge_offsets[e]:edge_offsets[e + 1]], в порядке от первого
+    конца ребра ко второму.
+
+    В лабиринтах генератора Эйлера большинство ячеек - коридоры, поэтому
+    граф меньше лабиринта, и поиск по нему (A* с манхэттенской оценкой)
+    раскрывает только вершины. Найденные коридоры затем разворачиваются
+    обратно в ячейки.
+
+    Граф строится по состоянию стен на момент создания и может быть
+    сериализован (dumps, loads), чтобы храниться вместе с лабиринтом.
+    """
+
+    MAGIC = b'JGRF'
+    VERSION = 1
+
+    _HEADER = struct.Struct('<4sBB2xIIQQQ')
+
+    # Открытые направления ячейки -> 1, если ячейка - вершина графа
+    # (у нее не два соседа).
+    _NODE_TABLE = bytes(int(bin(opened & 0b1111).count('1') != 2)
+                        for opened in range(256))
+
+    def __init__(self, maze: Maze) -> None:
+        """
+        Построение графа.
+
+        :param maze: Объект лабиринта.
+        """
+
+        height, width = maze.shape
+        size = height * width
+        typecode = 'i' if size < 2 ** 31 else 'q'
+        adjacency = maze.adjacency
+        offsets = adjacency.offsets
+        neighbours = adjacency.neighbours
+
+        node_ids = array(typecode, [-1]) * size
+        nodes = array(typecode)
+        marks = adjacency.opened.translate(self._NODE_TABLE)
+        index = marks.find(1)
+        while index >= 0:
+            node_ids[index] = len(nodes)
+            nodes.append(index)
+            index = marks.find(1, index + 1)
+
+        cell_edges = array(typecode, [-1]) * size
+        cell_positions = array(typecode, [0]) * size
+        edge_ends = array(typecode)
+        edge_offsets = array(typecode, [0])
+        cells = array(typecode)
+        node_edges: List[List[int]] = [[] for _ in nodes]
+
+        def walk(node_index: int, first: int) -> None:
+            # Проход по коридору от вершины до следующей вершины.
+            edge = len(edge_ends) // 2
+            previous, current = node_index, first
+            position = 0
+            while node_ids[current] < 0:
+                cell_edges[current] = edge
+                cell_positions[current] = position
+                position += 1
+                cells.append(current)
+                # У ячейки коридора два соседа, идем не в предыдущую.
+                near = neighbours[offsets[current]]
+                if near == previous:
+                    near = neighbours[offsets[current] + 1]
+                previous, current = current, near
+
+            first_node, second_node = node_ids[node_index], node_ids[current]
+            edge_ends.append(first_node)
+            edge_ends.append(second_node)
+            edge_offsets.append(len(cells))
+            node_edges[first_node].append(edge)
+            if second_node != first_node:
+                node_edges[second_node].append(edge)
+
+        for node_index in range(len(nodes)):
+            index = nodes[node_index]
+            for position in range(offsets[index], offsets[index + 1]):
+                near = neighbours[position]
+                if node_ids[near] >= 0:
+                    # Соседние вершины соединяются ребром без коридора.
+                    # Добавляем его один раз - от меньшей ячейки.
+                    if index < near:
+                        walk(index, near)
+                elif cell_edges[near] < 0:
+                    walk(index, near)
+
+        # Ячейки коридоров, не попавшие ни в одно ребро, лежат на циклах
+        # без развилок. На каждом таком цикле одна ячейка становится
+        # вершиной.
+        if len(nodes) + len(cells) < size:
+            for index in range(size):
+                if node_ids[index] < 0 and cell_edges[index] < 0:
+                    node_ids[index] = len(nodes)
+                    nodes.append(index)
+                    node_edges.append([])
+                    walk(index, neighbours[offsets[index]])
+
+        self.__height = height
+        self.__width = width
+        self.__nodes = nodes
+        self.__node_ids = node_ids
+        self.__edge_ends = edge_ends
+        self.__edge_offsets = edge_offsets
+        self.__cells = cells
+        self.__cell_edges = cell_edges
+        self.__cell_positions = cell_positions
+        self.__node_offsets = array(typecode, [0])
+        self.__node_edges = array(typecode)
+        for edges in node_edges:
+            self.__node_edges.extend(edges)
+            self.__node_offsets.append(len(self.__node_edges))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.__height, self.__width
+
+    @property
+    def node_count(self) -> int:
+        return len(self.__nodes)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.__edge_ends) // 2
+
+    @property
+    def nodes(self) -> array:
+        """Индексы ячеек вершин по номерам вершин."""
+
+        return self.__nodes
+
+    @property
+    def edge_ends(self) -> array:
+        """Номера вершин концов ребер, по два на ребро."""
+
+        return self.__edge_ends
+
+    @property
+    def edge_offsets(self) -> array:
+        """Начала коридоров ребер в cells (их edge_count + 1)."""
+
+        return self.__edge_offsets
+
+    @property
+    def cells(self) -> array:
+        """Индексы ячеек коридоров всех ребер подряд."""
+
+        return self.__cells
+
+    def edge_length(self, edge: int) -> int:
+        """
+        Вес ребра.
+
+        :param edge: Номер ребра.
+        :return: Количество переходов между концами ребра.
+        """
+
+        offsets = self.__edge_offsets
+        return offsets[edge + 1] - offsets[edge] + 1
+
+    def path(self, start: Tuple[int, int],
+             end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Кратчайший маршрут между ячейками.
+
+        :param start: Координаты начальной ячейки.
+        :param end: Координаты конечной ячейки.
+        :return: Список координат ячеек от конечной к начальной.
+        """
+
+        start_index = self._to_index(start)
+        end_index = self._to_index(end)
+        if start_index == end_index:
+            return [start]
+
+        # Вершины, с которых начинается поиск, и вершины, из которых
+        # можно дойти до финиша: вершина -> (расстояние, сторона). Если
+        # ячейка лежит в коридоре, это концы ее ребра, сторона 0 - первый
+        # конец ребра, 1 - второй.
+        sources = self._anchors(start_index)
+        targets = self._anchors(end_index)
+
+        # Начало и конец в одном коридоре - маршрут прямо по нему.
+        best = sys.maxsize
+        best_node = -1
+        start_edge = self.__cell_edges[start_index]
+        if start_edge >= 0 and start_edge == self.__cell_edges[end_index]:
+            best = abs(self.__cell_positions[start_index]
+                       - self.__cell_positions[end_index])
+
+        node_offsets = self.__node_offsets
+        node_edges = self.__node_edges
+        edge_ends = self.__edge_ends
+        edge_offsets = self.__edge_offsets
+
+        nodes = self.__nodes
+        width = self.__width
+        end_row, end_column = end
+
+        def heuristic(node: int) -> int:
+            # Манхэттенское расстояние до финиша. Вес ребра не меньше
+            # манхэттенского расстояния между его концами, поэтому оценка
+            # допустима.
+            row, column = divmod(nodes[node], width)
+            return abs(end_row - row) + abs(end_column - column)
+
+        # Алгоритм A*. В открытом списке - (оценка, расстояние, вершина).
+        # Для вершины хранится предыдущая вершина и ребро, для вершин-
+        # источников - (-1, сторона).
+        distances: Dict[int, int] = {}
+        previous: Dict[int, Tuple[int, int]] = {}
+        open_list: List[Tuple[int, int, int]] = []
+        for node, (distance, side) in sources.items():
+            distances[node] = distance
+            previous[node] = (-1, side)
+            heapq.heappush(open_list,
+                           (distance + heuristic(node), distance, node))
+
+        while open_list:
+            estimate, distance, node = heapq.heappop(open_list)
+            # Дальше маршрут не может стать короче найденного.
+            if estimate >= best:
+                break
+            if distance > distances[node]:
+                continue
+            target = targets.get(node)
+            if target is not None and distance + target[0] < best:
+                best = distance + target[0]
+                best_node = node
+
+            for position in range(node_offsets[node],
+                                  node_offsets[node + 1]):
+                edge = node_edges[position]
+                near = edge_ends[2 * edge]
+                if near == node:
+                    near = edge_ends[2 * edge + 1]
+                # Из тупика дальше идти некуда, если там не финиш.
+                if node_offsets[near + 1] - node_offsets[near] == 1 \
+                        and near not in targets:
+                    continue
+                near_distance = distance + edge_offsets[edge + 1] \
+                    - edge_offsets[edge] + 1
+                if near_distance < distances.get(near, sys.maxsize):
+                    distances[near] = near_distance
+                    previous[near] = (node, edge)
+                    heapq.heappush(open_list, (
+                        near_distance + heuristic(near), near_distance, near,
+                    ))
+
+        if best == sys.maxsize:
+            raise ValueError('Не существует пути от старта до финиша')
+
+        if best_node < 0:
+            # Прямо по общему коридору.
+            route = self._corridor(start_edge,
+                                   self.__cell_positions[start_index],
+                                   self.__cell_positions[end_index])
+        else:
+            route = self._route(start_index, end_index, best_node,
+                                previous, targets)
+
+        result_path = [divmod(index, width) for index in route]
+        result_path.reverse()
+
+        return result_path
+
+    def dumps(self) -> bytes:
+        """
+        Сериализация графа.
+
+        :return: Байты графа. Числа - little-endian.
+        """
+
+        arrays = (self.__nodes, self.__edge_ends, self.__edge_offsets,
+                  self.__cells, self.__node_offsets, self.__node_edges,
+                  self.__node_ids, self.__cell_edges, self.__cell_positions)
+        header = self._HEADER.pack(
+            self.MAGIC, self.VERSION, self.__nodes.itemsize,
+            self.__height, self.__width, len(self.__nodes),
+            len(self.__edge_ends) // 2, len(self.__cells),
+        )
+        parts = [header]
+        for values in arrays:
+            if sys.byteorder == 'big':
+                values = array(values.typecode, values)
+                values.byteswap()
+            parts.append(values.tobytes())
+
+        return b''.join(parts)
+
+    @classmethod
+    def loads(cls, data: bytes) -> 'JunctionGraph':
+        """
+        Десериализация графа.
+
+        :param data: Байты графа из dumps.
+        :return: Граф.
+        """
+
+        if len(data) < cls._HEADER.size:
+            raise ValueError('Данные слишком короткие для графа')
+        (magic, version, itemsize, height, width, node_count, edge_count,
+         cell_count) = cls._HEADER.unpack_from(data)
+        if magic != cls.MAGIC:
+            raise ValueError('Данные не являются графом развилок')
+        if version != cls.VERSION:
+            raise ValueError(f'Неподдерживаемая версия формата: {version}')
+
+        typecode = 'i' if itemsize == 4 else 'q'
+        size = height * width
+        lengths = (node_count, 2 * edge_count, edge_count + 1, cell_count,
+                   node_count + 1, None, size, size, size)
+        offset = cls._HEADER.size
+        arrays = []
+        for length in lengths:
+            values = array(typecode)
+            if length is None:
+                # Список ребер вершин - по ребру на каждый конец, кроме
+                # второго конца петли. Его длина - последнее смещение.
+                length = arrays[4][-1]
+            values.frombytes(data[offset:offset + length * itemsize])
+            if sys.byteorder == 'big':
+                values.byteswap()
+            if len(values) != length:
+                raise ValueError('Размер данных не совпадает с заголовком')
+            offset += length * itemsize
+            arrays.append(values)
+        if offset != len(data):
+            raise ValueError('Размер данных не совпадает с заголовком')
+
+        graph = cls.__new__(cls)
+        graph.__height = height
+        graph.__width = width
+        (graph.__nodes, graph.__edge_ends, graph.__edge_offsets,
+         graph.__cells, graph.__node_offsets, graph.__node_edges,
+         graph.__node_ids, graph.__cell_edges,
+         graph.__cell_positions) = arrays
+
+        return graph
+
+    def _anchors(self, index: int) -> Dict[int, Tuple[int, int]]:
+        """
+        Вершины, ближайшие к ячейке.
+
+        :param index: Индекс ячейки.
+        :return: Словарь вершина -> (расстояние до ячейки, сторона ребра).
+        """
+
+        node = self.__node_ids[index]
+        if node >= 0:
+            return {node: (0, 0)}
+
+        edge = self.__cell_edges[index]
+        position = self.__cell_positions[index]
+        first, second = self.__edge_ends[2 * edge:2 * edge + 2]
+        anchors = {second: (self.edge_length(edge) - position - 1, 1)}
+        # У петли оба конца - одна вершина, выбираем ближний.
+        if first not in anchors or position + 1 < anchors[first][0]:
+            anchors[first] = (position + 1, 0)
+
+        return anchors
+
+    def _corridor(self, edge: int, first: int, last: int) -> List[int]:
+        """
+        Ячейки коридора между двумя позициями включительно.
+
+        :param edge: Номер ребра.
+        :param first: Позиция первой ячейки в коридоре.
+        :param last: Позиция последней ячейки в коридоре.
+        :return: Индексы ячеек от first к last.
+        """
+
+        begin = self.__edge_offsets[edge]
+        if first <= last:
+            return list(self.__cells[begin + first:begin + last + 1])
+
+        return list(reversed(self.__cells[begin + last:begin + first + 1]))
+
+    def _route(self, start_index: int, end_index: int, last_node: int,
+               previous: Dict[int, Tuple[int, int]],
+               targets: Dict[int, Tuple[int, int]]) -> List[int]:
+        """
+        Разворачивание найденного маршрута по графу в ячейки.
+
+        :param start_index: Индекс начальной ячейки.
+        :param end_index: Индекс конечной ячейки.
+        :param last_node: Вершина, из которой маршрут идет к финишу.
+        :param previous: Предыдущие вершины и ребра из поиска.
+        :param targets: Вершины, из которых можно дойти до финиша.
+        :return: Индексы ячеек от начальной к конечной.
+        """
+
+        nodes = self.__nodes
+        edge_ends = self.__edge_ends
+
+        # Ребра маршрута от последней вершины к первой.
+        hops: List[Tuple[int, int, int]] = []
+        node = last_node
+        while True:
+            previous_node, edge = previous[node]
+            if previous_node < 0:
+                break
+            hops.append((previous_node, edge, node))
+            node = previous_node
+        first_node, start_side = node, edge
+
+        # От начала до первой вершины.
+        route = [start_index]
+        start_edge = self.__cell_edges[start_index]
+        if start_edge >= 0:
+            position = self.__cell_positions[start_index]
+            if start_side == 0:
+                route.extend(self._corridor(start_edge, position, 0)[1:])
+            else:
+                last = self.edge_length(start_edge) - 2
+                route.extend(self._corridor(start_edge, position, last)[1:])
+            route.append(nodes[first_node])
+
+        # По ребрам графа.
+        for from_node, edge, to_node in reversed(hops):
+            last = self.edge_length(edge) - 2
+            if last >= 0:
+                if edge_ends[2 * edge] == from_node:
+                    route.extend(self._corridor(edge, 0, last))
+                else:
+                    route.extend(self._corridor(edge, last, 0))
+            route.append(nodes[to_node])
+
+        # От последней вершины до конца.
+        end_edge = self.__cell_edges[end_index]
+        if end_edge >= 0:
+            position = self.__cell_positions[end_index]
+            if targets[last_node][1] == 0:
+                route.extend(self._corridor(end_edge, 0, position))
+            else:
+                last = self.edge_length(end_edge) - 2
+                route.extend(self._corridor(end_edge, last, position))
+
+        return route
+
+    def _to_index(self, cords: Tuple[int, int]) -> int:
+        """
+        Перевод координат ячейки в индекс с проверкой границ.
+
+        :param cords: Координаты ячейки.
+        :return: Индекс ячейки.
+        """
+
+        if not (0 <= cords[0] < self.__height
+                and 0 <= cords[1] < self.__width):
+            raise IndexError('Координаты вне лабиринта')
+
+        return cords[0] * self.__width + cords[1]
@@ -0,0 +1,103 @@
+import threading
+import weakref
+from typing import (
+    List,
+    Tuple,
+)
+
+from .base_resolver import BaseResolver
+from .junction_graph import JunctionGraph
+from ..maze import Maze
+
+
+class JunctionResolver(BaseResolver):
+    """
+    Резолвер через граф развилок лабиринта.
+
+    Граф строится один раз для каждого лабиринта, после чего поиск идет
+    только по вершинам графа, а коридоры маршрута разворачиваются
+    в ячейки из сохраненных последовательностей. Граф можно передать
+    готовым (set_graph), например, загруженным из MazeCache, чтобы
+    не строить его заново. После изменения стен (Maze.walls_version)
+    граф строится заново.
+    """
+
+    def __init__(self) -> None:
+        """Инициализатор класса"""
+
+        # Графы лабиринтов вместе с версией стен, для которой они
+        # построены: {лабиринт: (версия, граф)}. Граф удаляется вместе
+        # с лабиринтом.
+        self.__graphs: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.__lock = threading.Lock()
+
+    def get_graph(self, maze: Maze) -> JunctionGraph:
+        """
+        Получение графа лабиринта. Строится при первом обращении
+        и после изменения стен.
+
+        Граф строится без блокировки. Если граф той же версии стен
+        одновременно построил другой поток, возвращается уже сохраненный.
+
+        :param maze: Объект лабиринта.
+        :return: Граф развилок лабиринта.
+        """
+
+        version = maze.walls_version
+        with self.__lock:
+            cached = self.__graphs.get(maze)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+        graph = JunctionGraph(maze)
+
+        with self.__lock:
+            cached = self.__graphs.get(maze)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            # Граф более новой версии стен не заменяется старым.
+            if cached is None or cached[0] < version:
+                self.__graphs[maze] = (version, graph)
+
+        return graph
+
+    def set_graph(self, maze: Maze, graph: JunctionGraph) -> None:
+        """
+        Установка готового графа лабиринта.
+
+        Граф считается построенным для текущих стен лабиринта: после
+        их изменения он будет построен заново.
+
+        :param maze: Объект лабиринта.
+        :param graph: Граф, построенный по тем же стенам.
+        """
+
+        if graph.shape != maze.shape:
+            raise ValueError('Размеры графа не совпадают с размерами '
+                             'лабиринта')
+
+        with self.__lock:
+            self.__graphs[maze] = (maze.walls_version, graph)
+
+    def invalidate(self, maze: Maze) -> None:
+        """
+        Удаление графа лабиринта, например, после изменения его стен.
+
+        :param maze: Объект лабиринта.
+        """
+
+        with self.__lock:
+            self.__graphs.pop(maze, None)
+
+    def find_path(self, maze: Maze, start: Tuple[int, int],
+                  end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Создание маршрута между двумя ячейками лабиринта.
+
+        :param maze: Объект лабиринта.
+        :param start: Координаты начальной ячейки.
+        :param end: Координаты конечной ячейки.
+        :return: Список координат ячеек от конечной к начальной.
+        """
+
+        return self.get_graph(maze).path(start, end)
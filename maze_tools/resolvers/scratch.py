@@ -0,0 +1,168 @@
+import threading
+from array import array
+from contextlib import contextmanager
+from typing import (
+    Iterator,
+    List,
+    Tuple,
+)
+
+
+class SearchScratch:
+    """
+    Рабочая память одного поиска пути.
+
+    Массивы индексируются номером ячейки. Чтобы не очищать их перед каждым
+    поиском, ячейка считается просмотренной (закрытой) только если в массиве
+    seen (closed) записана метка текущего поиска. Новый поиск просто
+    увеличивает метку.
+    """
+
+    # Максимальное значение метки в массиве с кодом 'I'.
+    _MAX_STAMP = 2 ** 32 - 1
+
+    __slots__ = (
+        '__size',
+        '__stamp',
+        '__seen',
+        '__closed',
+        '__ranges',
+        '__best_indexes',
+        '__open_list',
+    )
+
+    def __init__(self, size: int) -> None:
+        """
+        Инициализатор класса.
+
+        :param size: Количество ячеек, для которых выделяется память.
+        """
+
+        index_typecode = 'i' if size < 2 ** 31 else 'q'
+        self.__size = size
+        self.__stamp = 0
+        self.__seen = array('I', [0]) * size
+        self.__closed = array('I', [0]) * size
+        self.__ranges = array(index_typecode, [0]) * size
+        self.__best_indexes = array(index_typecode, [0]) * size
+        self.__open_list: List[Tuple[int, int, int]] = []
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    @property
+    def seen(self) -> array:
+        """Метки поисков, в которых ячейка попала в открытый список."""
+
+        return self.__seen
+
+    @property
+    def closed(self) -> array:
+        """Метки поисков, в которых ячейка попала в закрытый список."""
+
+        return self.__closed
+
+    @property
+    def ranges(self) -> array:
+        """Расстояния от старта. Действительны только для seen-ячеек."""
+
+        return self.__ranges
+
+    @property
+    def best_indexes(self) -> array:
+        """Индексы лучших предыдущих ячеек."""
+
+        return self.__best_indexes
+
+    @property
+    def open_list(self) -> List[Tuple[int, int, int]]:
+        """Открытый список в виде двоичной кучи."""
+
+        return self.__open_list
+
+    def begin(self) -> int:
+        """
+        Подготовка памяти к новому поиску.
+
+        :return: Метка нового поиска.
+        """
+
+        self.__open_list.clear()
+        if self.__stamp == self._MAX_STAMP:
+            # Метки закончились - один раз очищаем массивы целиком.
+            self.__seen[:] = array('I', [0]) * self.__size
+            self.__closed[:] = array('I', [0]) * self.__size
+            self.__stamp = 0
+        self.__stamp += 1
+
+        return self.__stamp
+
+
+class ScratchPool:
+    """
+    Потокобезопасный пул рабочей памяти для поиска пути.
+
+    Позволяет нескольким потокам одновременно решать один и тот же
+    лабиринт, не выделяя память заново под каждый поиск.
+    """
+
+    def __init__(self, max_idle: int = 4) -> None:
+        """
+        Инициализатор класса.
+
+        :param max_idle: Сколько свободных объектов памяти пул хранит
+            для повторного использования. Лишние освобождаются.
+        """
+
+        self.__max_idle = max_idle
+        self.__idle: List[SearchScratch] = []
+        self.__lock = threading.Lock()
+
+    @property
+    def max_idle(self) -> int:
+        return self.__max_idle
+
+    def acquire(self, size: int) -> SearchScratch:
+        """
+        Получение рабочей памяти не меньше заданного размера.
+
+        :param size: Количество ячеек лабиринта.
+        :return: Рабочая память, которой владеет только вызывающий поток.
+        """
+
+        with self.__lock:
+            # Берем наименьший подходящий по размеру объект.
+            suitable = [scratch for scratch in self.__idle
+                        if scratch.size >= size]
+            if suitable:
+                scratch = min(suitable, key=lambda item: item.size)
+                self.__idle.remove(scratch)
+                return scratch
+
+        return SearchScratch(size)
+
+    def release(self, scratch: SearchScratch) -> None:
+        """
+        Возврат рабочей памяти в пул.
+
+        :param scratch: Рабочая память, полученная из acquire.
+        """
+
+        with self.__lock:
+            if len(self.__idle) < self.__max_idle:
+                self.__idle.append(scratch)
+
+    @contextmanager
+    def scratch(self, size: int) -> Iterator[SearchScratch]:
+        """
+        Контекстный менеджер, возвращающий память в пул после поиска.
+
+        :param size: Количество ячеек лабиринта.
+        """
+
+        scratch = self.acquire(size)
+        try:
+            yield scratch
+        finally:
+            self.release(scratch)
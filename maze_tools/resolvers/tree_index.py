@@ -0,0 +1,204 @@
+from array import array
+from collections import deque
+from typing import (
+    List,
+    Tuple,
+)
+
+from ..maze import Maze
+
+
+class TreeIndex:
+    """
+    Индекс лабиринта в виде корневого остовного дерева.
+
+    В идеальном лабиринте между двумя ячейками ровно один маршрут, и он
+    проходит через их наименьшего общего предка (LCA) в дереве. Индекс
+    хранит родителя и глубину каждой ячейки, а также таблицу двоичных
+    подъемов, поэтому LCA и длина маршрута считаются за O(log n), а сам
+    маршрут - за O(log n + длина маршрута).
+
+    Индекс строится по состоянию стен на момент создания. Если лабиринт
+    не идеальный (есть циклы), маршрут будет проходить по остовному дереву
+    и может оказаться не кратчайшим.
+    """
+
+    def __init__(self, maze: Maze, root: Tuple[int, int] = (0, 0)) -> None:
+        """
+        Построение индекса.
+
+        :param maze: Объект лабиринта.
+        :param root: Координаты корня дерева.
+        """
+
+        height, width = maze.shape
+        size = height * width
+        typecode = 'i' if size < 2 ** 31 else 'q'
+
+        self.__width = width
+        self.__parents = array(typecode, [-1]) * size
+        self.__depths = array(typecode, [0]) * size
+        self.__components = array(typecode, [-1]) * size
+
+        # Обходим в ширину каждую компоненту связности, начиная с корня.
+        root_index = maze.cords_to_index(root)
+        self._build_component(maze, root_index)
+        for index in range(size):
+            if self.__components[index] < 0:
+                self._build_component(maze, index)
+
+        # Таблица двоичных подъемов: jumps[k][i] - предок ячейки i
+        # на 2 ** k уровней выше. Корни ссылаются сами на себя.
+        level = array(typecode, (
+            parent if parent >= 0 else index
+            for index, parent in enumerate(self.__parents)
+        ))
+        self.__jumps: List[array] = [level]
+        max_depth = max(self.__depths)
+        while 1 << len(self.__jumps) <= max_depth:
+            level = array(typecode, [level[parent] for parent in level])
+            self.__jumps.append(level)
+
+    def _build_component(self, maze: Maze, root_index: int) -> None:
+        """
+        Обход в ширину компоненты связности с заданным корнем.
+
+        :param maze: Объект лабиринта.
+        :param root_index: Индекс корня компоненты.
+        """
+
+        adjacency = maze.adjacency
+        offsets = adjacency.offsets
+        neighbours = adjacency.neighbours
+        parents = self.__parents
+        depths = self.__depths
+        components = self.__components
+
+        components[root_index] = root_index
+        queue = deque([root_index])
+        while queue:
+            index = queue.popleft()
+            near_depth = depths[index] + 1
+            for position in range(offsets[index], offsets[index + 1]):
+                near_index = neighbours[position]
+                if components[near_index] >= 0:
+                    continue
+                components[near_index] = root_index
+                parents[near_index] = index
+                depths[near_index] = near_depth
+                queue.append(near_index)
+
+    def lca(self, first: Tuple[int, int],
+            second: Tuple[int, int]) -> Tuple[int, int]:
+        """
+        Поиск наименьшего общего предка двух ячеек.
+
+        :param first: Координаты первой ячейки.
+        :param second: Координаты второй ячейки.
+        :return: Координаты общего предка.
+        """
+
+        return divmod(self._lca(self._to_index(first),
+                                self._to_index(second)), self.__width)
+
+    def distance(self, first: Tuple[int, int],
+                 second: Tuple[int, int]) -> int:
+        """
+        Длина маршрута между ячейками в количестве переходов.
+
+        :param first: Координаты первой ячейки.
+        :param second: Координаты второй ячейки.
+        :return: Количество переходов между ячейками.
+        """
+
+        first_index = self._to_index(first)
+        second_index = self._to_index(second)
+        ancestor = self._lca(first_index, second_index)
+        depths = self.__depths
+
+        return depths[first_index] + depths[second_index] \
+            - 2 * depths[ancestor]
+
+    def path(self, start: Tuple[int, int],
+             end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Маршрут между ячейками.
+
+        :param start: Координаты начальной ячейки.
+        :param end: Координаты конечной ячейки.
+        :return: Список координат ячеек от конечной к начальной.
+        """
+
+        start_index = self._to_index(start)
+        end_index = self._to_index(end)
+        ancestor = self._lca(start_index, end_index)
+        parents = self.__parents
+        width = self.__width
+
+        # Поднимаемся от конца к общему предку, затем от старта к нему же.
+        result_path = []
+        index = end_index
+        while index != ancestor:
+            result_path.append(divmod(index, width))
+            index = parents[index]
+        result_path.append(divmod(ancestor, width))
+
+        start_part = []
+        index = start_index
+        while index != ancestor:
+            start_part.append(divmod(index, width))
+            index = parents[index]
+        result_path.extend(reversed(start_part))
+
+        return result_path
+
+    def _to_index(self, cords: Tuple[int, int]) -> int:
+        """
+        Перевод координат ячейки в индекс с проверкой границ.
+
+        :param cords: Координаты ячейки.
+        :return: Индекс ячейки.
+        """
+
+        index = cords[0] * self.__width + cords[1]
+        if not (0 <= cords[1] < self.__width
+                and 0 <= index < len(self.__parents)):
+            raise IndexError('Координаты вне лабиринта')
+
+        return index
+
+    def _lca(self, first: int, second: int) -> int:
+        """
+        Поиск наименьшего общего предка по индексам ячеек.
+
+        :param first: Индекс первой ячейки.
+        :param second: Индекс второй ячейки.
+        :return: Индекс общего предка.
+        """
+
+        if self.__components[first] != self.__components[second]:
+            raise ValueError('Не существует пути между ячейками')
+
+        depths = self.__depths
+        jumps = self.__jumps
+        if depths[first] < depths[second]:
+            first, second = second, first
+
+        # Поднимаем более глубокую ячейку на уровень второй.
+        difference = depths[first] - depths[second]
+        level = 0
+        while difference:
+            if difference & 1:
+                first = jumps[level][first]
+            difference >>= 1
+            level += 1
+        if first == second:
+            return first
+
+        # Поднимаем обе ячейки, пока их предки различаются.
+        for level in reversed(range(len(jumps))):
+            if jumps[level][first] != jumps[level][second]:
+                first = jumps[level][first]
+                second = jumps[level][second]
+
+        return self.__parents[first]
@@ -0,0 +1,97 @@
+import threading
+import weakref
+from typing import (
+    List,
+    Tuple,
+)
+
+from .base_resolver import BaseResolver
+from .tree_index import TreeIndex
+from ..maze import Maze
+
+
+class TreeResolver(BaseResolver):
+    """
+    Резолвер идеальных лабиринтов через индекс остовного дерева.
+
+    Индекс строится один раз для каждого лабиринта и переиспользуется
+    всеми последующими запросами, поэтому маршрут ищется за
+    O(log n + длина маршрута) без обхода лабиринта. После изменения стен
+    (Maze.walls_version) индекс строится заново.
+    """
+
+    def __init__(self) -> None:
+        """Инициализатор класса"""
+
+        # Индексы лабиринтов вместе с версией стен, по которой они
+        # построены: {лабиринт: (версия, индекс)}. Индекс удаляется вместе
+        # с лабиринтом.
+        self.__indexes: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.__lock = threading.Lock()
+
+    def get_index(self, maze: Maze) -> TreeIndex:
+        """
+        Получение индекса лабиринта. Строится при первом обращении
+        и после изменения стен.
+
+        Индекс строится без блокировки, поэтому индексы разных лабиринтов
+        строятся параллельно. Если индекс той же версии стен одновременно
+        построил другой поток, возвращается уже сохраненный.
+
+        :param maze: Объект лабиринта.
+        :return: Индекс остовного дерева лабиринта.
+        """
+
+        version = maze.walls_version
+        with self.__lock:
+            cached = self.__indexes.get(maze)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+        index = TreeIndex(maze)
+
+        with self.__lock:
+            cached = self.__indexes.get(maze)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            # Индекс более новой версии стен не заменяется старым.
+            if cached is None or cached[0] < version:
+                self.__indexes[maze] = (version, index)
+
+        return index
+
+    def invalidate(self, maze: Maze) -> None:
+        """
+        Удаление индекса лабиринта, например, после изменения его стен.
+
+        :param maze: Объект лабиринта.
+        """
+
+        with self.__lock:
+            self.__indexes.pop(maze, None)
+
+    def find_path(self, maze: Maze, start: Tuple[int, int],
+                  end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Создание маршрута между двумя ячейками лабиринта.
+
+        :param maze: Объект лабиринта.
+        :param start: Координаты начальной ячейки.
+        :param end: Координаты конечной ячейки.
+        :return: Список координат ячеек от конечной к начальной.
+        """
+
+        return self.get_index(maze).path(start, end)
+
+    def path_length(self, maze: Maze, start: Tuple[int, int],
+                    end: Tuple[int, int]) -> int:
+        """
+        Длина маршрута между двумя ячейками лабиринта за O(log n).
+
+        :param maze: Объект лабиринта.
+        :param start: Координаты начальной ячейки.
+        :param end: Координаты конечной ячейки.
+        :return: Количество переходов между ячейками.
+        """
+
+        return self.get_index(maze).distance(start, end)
@@ -0,0 +1,579 @@
+"""
+HTTP-сервис генерации, решения и отрисовки лабиринтов на asyncio.
+
+Запуск:
+    python -m maze_tools.service --port 8080 --processes 4
+
+Запросы:
+    GET /health
+    GET /generate?height=100&width=100[&seed=1][&generator=euler]
+        [&format=maze|txt|png]
+    GET /solve?height=100&width=100[&seed=1][&resolver=astar]
+    GET /render?height=100&width=100[&seed=1][&resolver=astar|none]
+        [&format=png|txt][&image_size=700]
+    POST /solve, POST /render - лабиринт передается в теле запроса
+        в формате BinaryConverter, параметры height, width и seed
+        не нужны.
+
+Ответ /solve - JSON {"length": n, "path": [[строка, столбец], ...]},
+путь от старта к финишу. Если seed не передан, он выбирается случайно
+и возвращается в заголовке X-Maze-Seed.
+
+Вся работа с лабиринтами выполняется в пуле процессов. У каждого
+процесса пула есть MazeCache, поэтому повторные запросы того же
+лабиринта (в том числе решение или отрисовка уже сгенерированного)
+не выполняются заново. С --cache-dir процессы делят дисковый уровень
+кэша. Одинаковые
+запросы, пришедшие одновременно, ждут одну и ту же задачу пула. Если
+в пуле уже max_pending задач, новый запрос сразу получает ответ 503
+с заголовком Retry-After. Ответы передаются частями (chunked), и каждая
+часть отправляется только после того, как клиент принял предыдущую.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import random
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+from urllib.parse import (
+    parse_qsl,
+    urlsplit,
+)
+
+from .maze import Maze
+from .batch import (
+    GENERATORS,
+    RESOLVERS,
+)
+from .cache import (
+    LRUByteCache,
+    MazeCache,
+)
+from .converter.binary_converter import BinaryConverter
+from .converter.raster_image_converter import RasterImageConverter
+from .converter.text_converter import TextConverter
+
+
+class HTTPError(Exception):
+    """
+    Ошибка, которая отправляется клиенту как HTTP-ответ.
+    """
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+# Тексты статусов ответов.
+_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+# Типы содержимого ответов по формату.
+_CONTENT_TYPES = {
+    'maze': 'application/octet-stream',
+    'txt': 'text/plain; charset=utf-8',
+    'png': 'image/png',
+    'json': 'application/json',
+}
+
+
+# Кэш лабиринтов процесса пула. Создается в _init_worker.
+_cache: Optional[MazeCache] = None
+
+
+def _init_worker(cache_bytes: int, cache_directory: Optional[Path]) -> None:
+    """
+    Инициализация процесса пула.
+
+    :param cache_bytes: Размер кэша лабиринтов в памяти процесса.
+    :param cache_directory: Каталог дискового уровня кэша или None.
+    """
+
+    global _cache
+    if cache_bytes > 0 or cache_directory is not None:
+        _cache = MazeCache(LRUByteCache(cache_bytes, cache_directory))
+
+
+def _solution_json(path: List[Tuple[int, int]]) -> bytes:
+    """
+    Ответ /solve.
+
+    :param path: Решение от конца к началу.
+    :return: JSON с решением от начала к концу.
+    """
+
+    path = [list(cords) for cords in reversed(path)]
+    return json.dumps({'length': len(path), 'path': path}).encode()
+
+
+def _run_job(endpoint: str, params: Dict[str, str],
+             body: bytes) -> bytes:
+    """
+    Выполнение запроса в процессе пула.
+
+    :param endpoint: Имя запроса: generate, solve или render.
+    :param params: Проверенные параметры запроса.
+    :param body: Лабиринт в формате BinaryConverter или пустые байты.
+    :return: Тело ответа.
+    """
+
+    resolver = params['resolver'] if endpoint != 'generate' \
+        and params['resolver'] != 'none' else None
+    fmt = params['format']
+    image_size = int(params['image_size'])
+
+    if not body and _cache is not None:
+        maze_params = (params['generator'], int(params['height']),
+                       int(params['width']), int(params['seed']))
+        if endpoint == 'solve':
+            return _solution_json(_cache.get_solution(*maze_params,
+                                                      resolver))
+        return _cache.get_render(
+            *maze_params, resolver, (endpoint, fmt, image_size),
+            lambda maze: _encode(maze, fmt, image_size),
+        )
+
+    if body:
+        maze = BinaryConverter.loads(body, MazeService.MAX_CELLS)
+    else:
+        generator = GENERATORS[params['generator']](int(params['seed']))
+        maze = generator.generate(int(params['height']),
+                                  int(params['width']))
+    height, width = maze.shape
+    if maze.start is None:
+        maze.start = (0, 0)
+    if maze.end is None:
+        maze.end = (height - 1, width - 1)
+    if resolver is not None:
+        maze.resolve = RESOLVERS[resolver]().create_path(maze)
+
+    if endpoint == 'solve':
+        return _solution_json(maze.resolve)
+    return _encode(maze, fmt, image_size)
+
+
+def _encode(maze: Maze, fmt: str, image_size: int) -> bytes:
+    """
+    Выгрузка лабиринта в байты ответа.
+
+    :param maze: Лабиринт.
+    :param fmt: Формат: maze, png или txt.
+    :param image_size: Размер изображения для png.
+    :return: Байты лабиринта в формате.
+    """
+
+    if fmt == 'maze':
+        return BinaryConverter.dumps(maze, compress=True)
+    if fmt == 'png':
+        image = RasterImageConverter(
+            maze, Path(), image_size, 'white', 'black', 'green',
+        ).render()
+        output = io.BytesIO()
+        image.save(output, format='PNG')
+        return output.getvalue()
+
+    # TextConverter пишет в файл, поэтому текст собирается во временном.
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'maze.txt'
+        TextConverter(maze, path, '#').unload()
+        return path.read_bytes()
+
+
+class MazeService:
+    """
+    HTTP-сервис для генерации, решения и отрисовки лабиринтов.
+
+    Сервис работает в одном цикле событий, а генерация, решение
+    и отрисовка выполняются в ограниченном пуле процессов.
+    """
+
+    # Размер части ответа при передаче.
+    CHUNK_SIZE = 64 * 1024
+    # Наибольший размер лабиринта в ячейках.
+    MAX_CELLS = 4_000_000
+    # Наибольший размер тела запроса.
+    MAX_BODY = 16 * 1024 * 1024
+    # Наибольший размер изображения.
+    MAX_IMAGE_SIZE = 8001
+
+    # Параметры запросов по умолчанию.
+    _DEFAULTS = {
+        'generator': 'euler',
+        'resolver': 'astar',
+        'image_size': '700',
+    }
+    # Форматы ответов по запросам. Первый - формат по умолчанию.
+    _FORMATS = {
+        'generate': ('maze', 'txt', 'png'),
+        'solve': ('json',),
+        'render': ('png', 'txt'),
+    }
+
+    def __init__(self, processes: Optional[int] = None,
+                 max_pending: Optional[int] = None,
+                 cache_bytes: int = 64 * 1024 * 1024,
+                 cache_directory: Optional[Path] = None) -> None:
+        """
+        Инициализатор сервиса.
+
+        :param processes: Количество процессов пула. По умолчанию -
+            количество ядер процессора.
+        :param max_pending: Наибольшее количество задач в пуле.
+            По умолчанию - два на процесс.
+        :param cache_bytes: Размер кэша лабиринтов в памяти каждого
+            процесса пула. 0 - без кэша в памяти.
+        :param cache_directory: Каталог дискового уровня кэша, общий
+            для процессов пула.
+        """
+
+        self.__processes = processes or os.cpu_count() or 1
+        self.__max_pending = max_pending or 2 * self.__processes
+        self.__cache_bytes = cache_bytes
+        self.__cache_directory = cache_directory
+        self.__executor: Optional[ProcessPoolExecutor] = None
+        self.__server: Optional[asyncio.AbstractServer] = None
+        # Выполняющиеся задачи пула по ключу запроса.
+        self.__running: Dict[tuple, asyncio.Future] = {}
+
+    @property
+    def processes(self) -> int:
+        return self.__processes
+
+    @property
+    def max_pending(self) -> int:
+        return self.__max_pending
+
+    @property
+    def pending(self) -> int:
+        """Количество задач, выполняющихся в пуле."""
+
+        return len(self.__running)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Адрес и порт, на которых слушает запущенный сервис."""
+
+        if self.__server is None:
+            raise RuntimeError('Сервис не запущен')
+        return self.__server.sockets[0].getsockname()[:2]
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> None:
+        """
+        Запуск сервиса.
+
+        :param host: Адрес.
+        :param port: Порт. 0 - выбрать свободный порт (см. address).
+        """
+
+        self.__executor = ProcessPoolExecutor(
+            self.__processes, initializer=_init_worker,
+            initargs=(self.__cache_bytes, self.__cache_directory),
+        )
+        self.__server = await asyncio.start_server(self._handle, host, port)
+
+    async def close(self) -> None:
+        """
+        Остановка сервиса и пула процессов.
+        """
+
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True, cancel_futures=True)
+            self.__executor = None
+
+    async def serve_forever(self) -> None:
+        """
+        Обработка запросов до отмены задачи.
+        """
+
+        try:
+            await self.__server.serve_forever()
+        finally:
+            await self.close()
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        """
+        Обработка одного соединения: один запрос и один ответ.
+
+        :param reader: Поток чтения соединения.
+        :param writer: Поток записи соединения.
+        """
+
+        headers: Dict[str, str] = {}
+        try:
+            try:
+                method, target, body = await self._read_request(reader)
+                status, content_type, payload, headers = \
+                    await self._dispatch(method, target, body)
+            except HTTPError as error:
+                status, content_type = error.status, _CONTENT_TYPES['json']
+                payload = json.dumps({'error': str(error)},
+                                     ensure_ascii=False).encode()
+                if status == 503:
+                    headers = {'Retry-After': '1'}
+            except Exception as error:
+                status, content_type = 500, _CONTENT_TYPES['json']
+                payload = json.dumps({
+                    'error': f'{type(error).__name__}: {error}',
+                }, ensure_ascii=False).encode()
+            await self._respond(writer, status, content_type, payload,
+                                headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader
+                            ) -> Tuple[str, str, bytes]:
+        """
+        Чтение запроса.
+
+        :param reader: Поток чтения соединения.
+        :return: Метод, путь с параметрами и тело запроса.
+        """
+
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.LimitOverrunError as error:
+            raise HTTPError(413, 'Слишком длинные заголовки') from error
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError as error:
+            raise HTTPError(400, 'Некорректная строка запроса') from error
+
+        length = 0
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-length':
+                try:
+                    length = int(value)
+                except ValueError as error:
+                    raise HTTPError(400, 'Некорректный Content-Length') \
+                        from error
+        if length > self.MAX_BODY:
+            raise HTTPError(413, 'Слишком большое тело запроса')
+        body = await reader.readexactly(length) if length > 0 else b''
+
+        return method, target, body
+
+    async def _dispatch(self, method: str, target: str, body: bytes
+                        ) -> Tuple[int, str, bytes, Dict[str, str]]:
+        """
+        Выбор обработчика по пути запроса.
+
+        :param method: Метод запроса.
+        :param target: Путь с параметрами.
+        :param body: Тело запроса.
+        :return: Статус, тип содержимого, тело и заголовки ответа.
+        """
+
+        url = urlsplit(target)
+        endpoint = url.path.strip('/')
+        if endpoint == 'health':
+            payload = json.dumps({
+                'pending': self.pending,
+                'max_pending': self.__max_pending,
+            }).encode()
+            return 200, _CONTENT_TYPES['json'], payload, {}
+        if endpoint not in self._FORMATS:
+            raise HTTPError(404, f'Неизвестный путь: {url.path}')
+        if method not in ('GET', 'POST'):
+            raise HTTPError(405, f'Метод {method} не поддерживается')
+        if method == 'GET':
+            body = b''
+        elif not body:
+            raise HTTPError(400, 'Нет лабиринта в теле запроса')
+
+        params = self._parse_params(endpoint, dict(parse_qsl(url.query)),
+                                    body)
+        payload = await self._submit(endpoint, params, body)
+        headers = {}
+        if not body:
+            headers['X-Maze-Seed'] = params['seed']
+        content_type = _CONTENT_TYPES[params['format']]
+
+        return 200, content_type, payload, headers
+
+    def _parse_params(self, endpoint: str, query: Dict[str, str],
+                      body: bytes) -> Dict[str, str]:
+        """
+        Проверка параметров запроса и подстановка значений по умолчанию.
+
+        Проверки дешевые, поэтому выполняются до отправки в пул - на
+        неверный запрос не тратится процесс.
+
+        :param endpoint: Имя запроса.
+        :param query: Параметры из строки запроса.
+        :param body: Тело запроса.
+        :return: Параметры запроса.
+        """
+
+        params = {**self._DEFAULTS, **query}
+        formats = self._FORMATS[endpoint]
+        params.setdefault('format', formats[0])
+        if params['format'] not in formats:
+            raise HTTPError(400, f'Неизвестный формат: {params["format"]}')
+        if params['generator'] not in GENERATORS:
+            raise HTTPError(400, f'Неизвестный генератор: '
+                                 f'{params["generator"]}')
+        if params['resolver'] not in RESOLVERS \
+                and not (endpoint == 'render'
+                         and params['resolver'] == 'none'):
+            raise HTTPError(400, f'Неизвестный резолвер: '
+                                 f'{params["resolver"]}')
+
+        try:
+            image_size = int(params['image_size'])
+            if body:
+                # Размер лабиринта проверяется по заголовку, до распаковки
+                # данных в процессе пула.
+                height, width = BinaryConverter.read_shape(body)
+            else:
+                height, width = int(params['height']), int(params['width'])
+                # Без seed лабиринт случайный. Зерно выбирается здесь,
+                # чтобы клиент мог повторить запрос.
+                seed = int(params.setdefault(
+                    'seed', str(random.getrandbits(32)),
+                ))
+                params['seed'] = str(seed)
+        except KeyError as error:
+            raise HTTPError(400, f'Не задан параметр {error}') from error
+        except ValueError as error:
+            raise HTTPError(400, f'Некорректный параметр: {error}') \
+                from error
+
+        if not 0 < image_size <= self.MAX_IMAGE_SIZE:
+            raise HTTPError(400, 'Некорректный размер изображения')
+        if not (0 < height and 0 < width
+                and height * width <= self.MAX_CELLS):
+            raise HTTPError(400, f'Размер лабиринта должен быть от 1 до '
+                                 f'{self.MAX_CELLS} ячеек')
+
+        return params
+
+    async def _submit(self, endpoint: str, params: Dict[str, str],
+                      body: bytes) -> bytes:
+        """
+        Выполнение запроса в пуле процессов.
+
+        Если такой же запрос уже выполняется, ждем его результат, а не
+        создаем новую задачу.
+
+        :param endpoint: Имя запроса.
+        :param params: Параметры запроса.
+        :param body: Тело запроса.
+        :return: Тело ответа.
+        """
+
+        key = (endpoint, tuple(sorted(params.items())),
+               hashlib.sha256(body).digest())
+        future = self.__running.get(key)
+        if future is None:
+            if len(self.__running) >= self.__max_pending:
+                raise HTTPError(503, 'Сервис перегружен, повторите позже')
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.__executor, _run_job,
+                                          endpoint, params, body)
+            self.__running[key] = future
+            future.add_done_callback(
+                lambda _: self.__running.pop(key, None),
+            )
+
+        try:
+            # shield: отключение одного клиента не отменяет задачу
+            # для остальных, ждущих тот же результат.
+            return await asyncio.shield(future)
+        except ValueError as error:
+            raise HTTPError(400, str(error)) from error
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int,
+                       content_type: str, payload: bytes,
+                       headers: Dict[str, str]) -> None:
+        """
+        Отправка ответа частями.
+
+        :param writer: Поток записи соединения.
+        :param status: Статус ответа.
+        :param content_type: Тип содержимого.
+        :param payload: Тело ответа.
+        :param headers: Дополнительные заголовки.
+        """
+
+        lines = [
+            f'HTTP/1.1 {status} {_REASONS.get(status, "")}',
+            f'Content-Type: {content_type}',
+            'Transfer-Encoding: chunked',
+            'Connection: close',
+        ]
+        lines.extend(f'{name}: {value}' for name, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+
+        view = memoryview(payload)
+        for offset in range(0, len(view), self.CHUNK_SIZE):
+            chunk = view[offset:offset + self.CHUNK_SIZE]
+            writer.write(f'{len(chunk):x}\r\n'.encode('ascii'))
+            writer.write(chunk)
+            writer.write(b'\r\n')
+            # Ждем, пока клиент примет данные, чтобы не копить их в памяти.
+            await writer.drain()
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Главная функция"""
+
+    parser = argparse.ArgumentParser(
+        description='HTTP-сервис генерации и решения лабиринтов',
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--processes', type=int,
+                        help='количество процессов пула')
+    parser.add_argument('--max-pending', type=int,
+                        help='наибольшее количество задач в пуле')
+    parser.add_argument('--cache-mb', type=int, default=64,
+                        help='размер кэша в памяти каждого процесса, МиБ')
+    parser.add_argument('--cache-dir', type=Path,
+                        help='каталог дискового уровня кэша')
+    args = parser.parse_args(argv)
+
+    async def run() -> None:
+        service = MazeService(args.processes, args.max_pending,
+                              args.cache_mb * 1024 * 1024, args.cache_dir)
+        await service.start(args.host, args.port)
+        host, port = service.address
+        print(f'Сервис запущен на http://{host}:{port}')
+        await service.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()